@@ -4,18 +4,31 @@ Chat Messages Log Generator for ft-transcendence
 Generates realistic chat message logs that match the ELK stack configuration
 """
 
-import json
 import random
-import time
-import datetime
+import argparse
+import functools
 import os
 import sys
 import threading
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
-from uuid import uuid4
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from loggen import (BufferedLogWriter, Population, WallClock, add_clock_arguments, add_metrics_arguments,
+                    add_population_arguments, add_rate_arguments, add_rotation_arguments,
+                    add_shard_arguments, build_clock, build_population, build_rotation, make_scheduler,
+                    run_sharded, serve_metrics)
+from loggen.beats import add_beats_arguments, build_beats_output
+from loggen.bulk import add_bulk_arguments, build_bulk_sink
+from loggen.sinks import add_sink_arguments, build_sink
+from loggen import TemplateEncoder, id_factory, uuid_factory
+
+NEW_UUID = uuid_factory().next
+NEW_SESSION_ID = id_factory("sess_", 8).next
+NEW_TOURNAMENT_ID = id_factory("tournament_", 8).next
+ENCODER = TemplateEncoder(separators=(',', ':'))
+
 @dataclass
 class ChatMessage:
     """Represents a chat message structure"""
@@ -38,12 +51,15 @@ class ChatMessage:
     error: Optional[str] = None
     error_reason: Optional[str] = None
     error_code: Optional[str] = None
+    tournament_id: Optional[str] = None
 
 class ChatLogGenerator:
     """Generates realistic chat message logs for ft-transcendence"""
     
-    def __init__(self, log_dir: str = "/var/log/ft-transcendence/chat-messages"):
+    def __init__(self, log_dir: str = "/var/log/ft-transcendence/chat-messages", clock=None,
+                 rotation=None, population: Optional[Population] = None):
         self.log_dir = Path(log_dir)
+        self.clock = clock or WallClock()
         self.log_file = self.log_dir / "chat-messages.log"
         self.archive_file = self.log_dir / "chat-messages-archive.log"
         
@@ -54,6 +70,8 @@ class ChatLogGenerator:
             "kate_legend", "luke_hero", "mia_expert", "noah_ace", "olivia_star",
             "peter_fox", "quinn_wolf", "ruby_phoenix", "sam_dragon", "tina_eagle"
         ]
+        if population is not None:
+            self.usernames = population.column("username")
         
         self.channels = [
             "general", "game-lobby", "tournament", "support", "random",
@@ -126,14 +144,16 @@ class ChatLogGenerator:
         # Initialize log files
         self.log_file.touch(exist_ok=True)
         self.archive_file.touch(exist_ok=True)
+        
+        self.writer = BufferedLogWriter(service="chat-messages", rotation=rotation)
     
     def generate_timestamp(self) -> str:
         """Generate ISO timestamp"""
-        return datetime.datetime.now().isoformat() + "Z"
+        return self.clock.now().isoformat() + "Z"
     
     def generate_id(self) -> str:
         """Generate UUID"""
-        return str(uuid4())
+        return NEW_UUID()
     
     def generate_user_id(self) -> str:
         """Generate user ID"""
@@ -141,7 +161,7 @@ class ChatLogGenerator:
     
     def generate_session_id(self) -> str:
         """Generate session ID"""
-        return f"sess_{self.generate_id()[:8]}"
+        return NEW_SESSION_ID()
     
     def generate_request_data(self, action: str) -> Dict:
         """Generate request data based on action"""
@@ -215,18 +235,56 @@ class ChatLogGenerator:
         
         return log_entry
     
+    def generate_tournament_message_log(self, tournament_id: Optional[str] = None, message: Optional[str] = None,
+                                        player: Optional[Dict] = None) -> ChatMessage:
+        """Generate a chat message posted in the tournament channel, by ``player`` if given
+
+        A given ``message`` is an announcement the tournament engine posts, so
+        it is always a successful send rather than a random chat action
+        """
+        log_entry = self.generate_chat_message_log()
+        log_entry.channel_id = "tournament"
+        log_entry.event_type = "tournament_message"
+        log_entry.tournament_id = tournament_id
+        if message is not None:
+            log_entry.level = "INFO"
+            log_entry.action = "send_message"
+            log_entry.success = True
+            log_entry.error = log_entry.error_reason = log_entry.error_code = None
+            log_entry.request = self.generate_request_data("send_message")
+            log_entry.response = self.generate_response_data(True)
+        log_entry.message = message or random.choice([
+            "Tournament bracket updated!",
+            "Next match starting in 5 minutes",
+            "Great game, advancing to next round!",
+            "Tournament leaderboard updated",
+            "Semifinal match results posted"
+        ])
+        if player is not None:
+            log_entry.user_id = player["user_id"]
+            log_entry.username = player["username"]
+        return log_entry
+    
+    def generate_error_message_log(self) -> ChatMessage:
+        """Generate a chat message that always failed"""
+        log_entry = self.generate_chat_message_log()
+        log_entry.success = False
+        log_entry.level = "ERROR"
+        log_entry.error = random.choice(self.error_messages)
+        log_entry.error_code = random.choice(self.error_codes)
+        return log_entry
+    
     def write_log_entry(self, log_entry: ChatMessage, archive: bool = False):
         """Write log entry to file"""
         log_dict = asdict(log_entry)
         # Remove None values
         log_dict = {k: v for k, v in log_dict.items() if v is not None}
         
-        log_line = json.dumps(log_dict, separators=(',', ':'))
+        log_line = ENCODER.encode(log_dict)
         
         target_file = self.archive_file if archive else self.log_file
         
-        with open(target_file, 'a') as f:
-            f.write(log_line + '\n')
+        self.writer.write(target_file, log_line, log_entry.level)
     
     def generate_batch_logs(self, count: int = 100, archive: bool = False):
         """Generate a batch of log entries"""
@@ -239,28 +297,39 @@ class ChatLogGenerator:
             if (i + 1) % 10 == 0:
                 print(f"Generated {i + 1}/{count} logs")
         
+        self.writer.flush()
         target = "archive" if archive else "main"
         print(f"✓ Successfully generated {count} logs in {target} file")
     
-    def generate_realtime_logs(self, interval: float = 2.0, duration: int = 300):
-        """Generate logs in real-time for specified duration"""
-        print(f"Starting real-time log generation for {duration} seconds...")
-        print(f"Generating a log every {interval} seconds")
+    def generate_realtime_logs(self, interval: float = 2.0, duration: Optional[float] = 300,
+                               rate: Optional[float] = None, arrivals: str = "constant"):
+        """Generate logs in real-time for specified duration (None runs until Ctrl+C)"""
+        if rate is None:
+            rate = 1.0 / interval
+        scheduler = make_scheduler(rate, arrivals, duration, name="chat-messages", clock=self.clock)
         
-        start_time = time.time()
-        count = 0
+        if self.clock.simulated:
+            print(f"Simulating {self.clock.start.isoformat()} -> {self.clock.end.isoformat()}...")
+        elif duration is None:
+            print("Starting real-time log generation until interrupted...")
+        else:
+            print(f"Starting real-time log generation for {duration} seconds...")
+        print(f"Target rate: {rate:.2f} logs/sec ({arrivals} arrivals)")
         
-        while (time.time() - start_time) < duration:
-            log_entry = self.generate_chat_message_log()
-            self.write_log_entry(log_entry)
-            count += 1
-            
-            if count % 10 == 0:
-                print(f"Generated {count} real-time logs")
-            
-            time.sleep(interval)
+        try:
+            for count in scheduler:
+                log_entry = self.generate_chat_message_log()
+                self.write_log_entry(log_entry)
+                
+                if (count + 1) % 10 == 0:
+                    print(f"Generated {count + 1} real-time logs")
+        except KeyboardInterrupt:
+            scheduler.stop()
+            print("\nStopping real-time generation...")
         
-        print(f"✓ Real-time generation completed. Total logs: {count}")
+        self.writer.flush()
+        print(f"✓ Real-time generation completed. Total logs: {scheduler.emitted}")
+        print(scheduler.report())
     
     def generate_mixed_scenario(self):
         """Generate a mixed scenario with different types of activities"""
@@ -271,28 +340,14 @@ class ChatLogGenerator:
         
         # High activity period (tournament)
         print("Simulating high activity period...")
+        tournament_id = NEW_TOURNAMENT_ID()
         for _ in range(20):
-            log_entry = self.generate_chat_message_log()
-            log_entry.channel_id = "tournament"
-            log_entry.event_type = "tournament_message"
-            log_entry.message = random.choice([
-                "Tournament bracket updated!",
-                "Next match starting in 5 minutes",
-                "Great game, advancing to next round!",
-                "Tournament leaderboard updated",
-                "Semifinal match results posted"
-            ])
-            self.write_log_entry(log_entry)
+            self.write_log_entry(self.generate_tournament_message_log(tournament_id))
         
         # Error scenario
         print("Simulating error scenario...")
         for _ in range(10):
-            log_entry = self.generate_chat_message_log()
-            log_entry.success = False
-            log_entry.level = "ERROR"
-            log_entry.error = random.choice(self.error_messages)
-            log_entry.error_code = random.choice(self.error_codes)
-            self.write_log_entry(log_entry)
+            self.write_log_entry(self.generate_error_message_log())
         
         # Archive some old logs
         print("Generating archive logs...")
@@ -305,6 +360,9 @@ class ChatLogGenerator:
         main_count = 0
         archive_count = 0
         
+        # Make sure buffered lines are on disk before counting them
+        self.writer.flush()
+        
         if self.log_file.exists():
             with open(self.log_file, 'r') as f:
                 main_count = sum(1 for _ in f)
@@ -319,9 +377,25 @@ class ChatLogGenerator:
         print(f"Total: {main_count + archive_count} entries")
         print(f"Main log file size: {self.log_file.stat().st_size if self.log_file.exists() else 0} bytes")
         print(f"Archive log file size: {self.archive_file.stat().st_size if self.archive_file.exists() else 0} bytes")
+        print(self.writer.report())
 
 def main():
     """Main function with CLI interface"""
+    # --options may appear anywhere; the rest stays positional
+    rate_parser = argparse.ArgumentParser(add_help=False)
+    add_rate_arguments(rate_parser, default_arrivals="constant")
+    add_shard_arguments(rate_parser)
+    add_clock_arguments(rate_parser)
+    add_metrics_arguments(rate_parser)
+    add_rotation_arguments(rate_parser)
+    add_population_arguments(rate_parser)
+    add_bulk_arguments(rate_parser)
+    add_beats_arguments(rate_parser)
+    add_sink_arguments(rate_parser)
+    rate_args, positional = rate_parser.parse_known_args(sys.argv[1:])
+    sys.argv = sys.argv[:1] + positional
+    serve_metrics(rate_args)
+    
     if len(sys.argv) < 2:
         print("Usage: python chat_log_generator.py <command> [options]")
         print("Commands:")
@@ -330,23 +404,45 @@ def main():
         print("  mixed                    - Generate mixed scenario")
         print("  stats                    - Show log statistics")
         print("  continuous               - Run continuously")
+        print("Options:")
+        print("  --rate N/s               - Target rate for realtime/continuous (overrides interval)")
+        print("  --arrivals constant|poisson")
+        print("  --processes N            - Split batch generation across N processes")
+        print("  --seed N                 - Base RNG seed")
+        print("  --start ISO [--end ISO]  - Backfill realtime/continuous on a simulated clock")
+        print("  --profile diurnal|flat   - Traffic profile for the simulated clock")
+        print("  --population N           - Simulate N users (e.g. 250k, 10M)")
+        print("  --sink KIND[:PATH]       - file, null, stdout, fifo:PATH or unix:PATH")
         sys.exit(1)
     
     # Use current directory for testing, change to /var/log/ft-transcendence/chat-messages for production
     log_dir = "./logs/chat-messages"  # Change this to /var/log/ft-transcendence/chat-messages
-    generator = ChatLogGenerator(log_dir)
+    if rate_args.seed is not None:
+        random.seed(rate_args.seed)
+    population = build_population(rate_args)
+    generator = ChatLogGenerator(log_dir, build_clock(rate_args), build_rotation(rate_args), population)
+    sink = (build_bulk_sink(rate_args, "chat-messages")
+            or build_beats_output(rate_args, "chat-messages", generator.writer.base_dir)
+            or build_sink(rate_args, "chat-messages"))
+    if sink is not None:
+        generator.writer.close()
+        generator.writer = sink
     
     command = sys.argv[1]
     
     if command == "batch":
         count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
         archive = len(sys.argv) > 3 and sys.argv[3].lower() == "archive"
-        generator.generate_batch_logs(count, archive)
+        if rate_args.processes > 1:
+            run_sharded(functools.partial(ChatLogGenerator, population=population), "generate_batch_logs",
+                        count, rate_args.processes, log_dir, seed=rate_args.seed, sink=sink, archive=archive)
+        else:
+            generator.generate_batch_logs(count, archive)
     
     elif command == "realtime":
         interval = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
         duration = int(sys.argv[3]) if len(sys.argv) > 3 else 300
-        generator.generate_realtime_logs(interval, duration)
+        generator.generate_realtime_logs(interval, duration, rate_args.rate, rate_args.arrivals)
     
     elif command == "mixed":
         generator.generate_mixed_scenario()
@@ -356,12 +452,8 @@ def main():
     
     elif command == "continuous":
         print("Running continuous log generation. Press Ctrl+C to stop.")
-        try:
-            while True:
-                generator.generate_realtime_logs(interval=1.0, duration=60)
-                time.sleep(5)
-        except KeyboardInterrupt:
-            print("\nStopping continuous generation...")
+        generator.generate_realtime_logs(interval=1.0, duration=None,
+                                         rate=rate_args.rate, arrivals=rate_args.arrivals)
     
     else:
         print(f"Unknown command: {command}")
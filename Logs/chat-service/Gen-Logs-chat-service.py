@@ -4,18 +4,36 @@ Chat Service Log Generator for ft-transcendence
 Generates realistic logs that match the ELK stack configuration
 """
 
-import json
+import asyncio
 import random
 import time
 import datetime
-import uuid
 import threading
+import multiprocessing
+import itertools
+import functools
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Set
 import logging
 from dataclasses import dataclass
 from enum import Enum
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from loggen import (AliasTable, BufferedLogWriter, IndexedDict, Population, RateScheduler, SchedulerStats,
+                    WallClock, add_clock_arguments, add_metrics_arguments, add_population_arguments,
+                    add_rate_arguments, add_rotation_arguments, add_shard_arguments, build_clock,
+                    build_population, build_rotation, make_scheduler, run_sharded, serve_metrics)
+from loggen.beats import add_beats_arguments, build_beats_output
+from loggen.bulk import add_bulk_arguments, build_bulk_sink
+from loggen.sinks import add_sink_arguments, build_sink
+from loggen import metrics
+from loggen import TemplateEncoder, id_factory, uuid_factory
+
+NEW_UUID = uuid_factory().next
+NEW_REQUEST_ID = id_factory("req_", 12).next
+ENCODER = TemplateEncoder()
+
 class LogLevel(Enum):
     DEBUG = "DEBUG"
     INFO = "INFO"
@@ -38,7 +56,7 @@ class EventType(Enum):
     SPAM_DETECTED = "spam_detected"
     MODERATION_ACTION = "moderation_action"
 
-@dataclass
+@dataclass(slots=True)
 class User:
     user_id: str
     username: str
@@ -46,18 +64,62 @@ class User:
     ip_address: str
     user_agent: str
 
-@dataclass
+@dataclass(slots=True)
 class Room:
     to_username: str
     channel_id: str
     name: str
-    participants: List[str]
+    participants: Set[str]
     created_at: datetime.datetime
 
+def _population_user(population: Population, index: int) -> User:
+    return User(
+        user_id=population.user_id(index),
+        username=population.username(index),
+        session_id=population.session_id(index),
+        ip_address=population.ip_address(index),
+        user_agent=population.user_agent(index)
+    )
+
+class ChatPartition:
+    """Users, rooms and live session state owned by a single worker"""
+    def __init__(self, users: List[User], rooms: List[Room]):
+        self.users = users
+        self.rooms = rooms
+        # Indexed so every event is O(1) whatever the simulated population
+        self.active_sessions: IndexedDict[str, User] = IndexedDict()
+        self.active_rooms: Dict[str, Room] = {}
+        self.user_rooms: Dict[str, Room] = {}
+        self.message_counter = 0
+        self.error_counter = 0
+
+    def join(self, user: User, room: Room):
+        """Put ``user`` in ``room``, moving them out of any previous room"""
+        self.active_sessions[user.session_id] = user
+        self.active_rooms.setdefault(room.to_username, room)
+        previous = self.user_rooms.get(user.user_id)
+        if previous is not None and previous is not room:
+            previous.participants.discard(user.user_id)
+        room.participants.add(user.user_id)
+        self.user_rooms[user.user_id] = room
+
+    def leave(self, user: User) -> Optional[Room]:
+        """End ``user``'s session; returns the room they were in"""
+        self.active_sessions.pop(user.session_id, None)
+        room = self.user_rooms.pop(user.user_id, None)
+        if room is not None:
+            room.participants.discard(user.user_id)
+        return room
+
 class ChatLogGenerator:
-    def __init__(self, log_dir: str = "/var/log/ft-transcendence/chat-service"):
+    def __init__(self, log_dir: str = "/var/log/ft-transcendence/chat-service", clock=None,
+                 seed: Optional[int] = None, rotation=None, population: Optional[Population] = None):
         self.log_dir = Path(log_dir)
+        self.clock = clock or WallClock()
+        self.rotation = rotation
+        self.population = population
         self.setup_directories()
+        self.writer = BufferedLogWriter(self.log_dir, service="chat-service", rotation=rotation)
         
         # Sample data
         self.users = self._generate_sample_users()
@@ -65,17 +127,19 @@ class ChatLogGenerator:
         self.message_templates = self._load_message_templates()
         self.user_agents = self._load_user_agents()
         
-        # Active sessions
-        self.active_sessions: Dict[str, User] = {}
-        self.active_rooms: Dict[str, Room] = {}
+        # Mutable session/room state is partitioned per worker so threads never
+        # share dicts or participant lists; batch mode uses a single partition
+        self.partitions = [ChatPartition(self.users, self.rooms)]
         
-        # Counters
-        self.message_counter = 0
-        self.error_counter = 0
+        # Worker threads get their own seeded RNG; everyone else uses this one
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self._rng = random.Random(self.seed)
+        self._local = threading.local()
         
         # Threading control
         self.running = False
         self.threads = []
+        self.schedulers: List[RateScheduler] = []
 
     def setup_directories(self):
         """Create log directories if they don't exist"""
@@ -86,8 +150,10 @@ class ChatLogGenerator:
         for log_file in ["chat.log", "chat-error.log", "messages/messages.log", "messages/messages-archive.log"]:
             (self.log_dir / log_file).touch()
 
-    def _generate_sample_users(self) -> List[User]:
+    def _generate_sample_users(self) -> Sequence[User]:
         """Generate sample users for simulation"""
+        if self.population is not None:
+            return self.population.view(_population_user)
         usernames = ["alice", "bob", "charlie", "diana", "eve", "frank", "grace", "henry", "iris", "jack"]
         users = []
         
@@ -95,7 +161,7 @@ class ChatLogGenerator:
             user = User(
                 user_id=f"user_{random.randint(1000, 9999)}",
                 username=username,
-                session_id=str(uuid.uuid4()),
+                session_id=NEW_UUID(),
                 ip_address=f"192.168.1.{random.randint(1, 254)}",
                 user_agent=random.choice(self._load_user_agents())
             )
@@ -107,14 +173,23 @@ class ChatLogGenerator:
         """Generate sample chat rooms"""
         room_names = ["general", "random", "gaming", "help", "announcements", "off-topic"]
         rooms = []
+        if self.population is not None:
+            # Sequential IDs: random four-digit ones would collide across thousands of rooms
+            created_at = self.clock.now()
+            for i in range(self.population.rooms()):
+                name = room_names[i % len(room_names)]
+                rooms.append(Room(f"room_{1000 + i}", f"channel_{100 + i}",
+                                  name if i < len(room_names) else f"{name}-{i // len(room_names)}",
+                                  set(), created_at))
+            return rooms
         
         for room_name in room_names:
             room = Room(
                 to_username=f"room_{random.randint(1000, 9999)}",
                 channel_id=f"channel_{random.randint(100, 999)}",
                 name=room_name,
-                participants=[],
-                created_at=datetime.datetime.now()
+                participants=set(),
+                created_at=self.clock.now()
             )
             rooms.append(room)
         
@@ -155,13 +230,54 @@ class ChatLogGenerator:
             "Mozilla/5.0 (Android 10; Mobile; rv:81.0) Gecko/81.0 Firefox/81.0"
         ]
 
+    @property
+    def state(self) -> ChatPartition:
+        """Partition owned by the calling worker"""
+        return getattr(self._local, "partition", self.partitions[0])
+
+    @property
+    def rng(self) -> random.Random:
+        """RNG stream of the calling worker"""
+        return getattr(self._local, "rng", self._rng)
+
+    @property
+    def message_counter(self) -> int:
+        return sum(partition.message_counter for partition in self.partitions)
+
+    @property
+    def error_counter(self) -> int:
+        return sum(partition.error_counter for partition in self.partitions)
+
+    @property
+    def active_session_count(self) -> int:
+        return sum(len(partition.active_sessions) for partition in self.partitions)
+
+    @property
+    def active_room_count(self) -> int:
+        return sum(len(partition.active_rooms) for partition in self.partitions)
+
+    def partition(self, num_workers: int):
+        """Split users and room membership into one partition per worker"""
+        self.partitions = []
+        for i in range(num_workers):
+            # Users are read-only; share the pool if it is too small to split
+            users = self.users[i::num_workers] if len(self.users) >= num_workers else self.users
+            rooms = [Room(room.to_username, room.channel_id, room.name, set(), room.created_at)
+                     for room in self.rooms]
+            self.partitions.append(ChatPartition(users, rooms))
+
+    def bind_worker(self, index: int):
+        """Attach partition ``index`` and its RNG stream to the calling thread"""
+        self._local.partition = self.partitions[index]
+        self._local.rng = random.Random(self.seed + index + 1)
+
     def generate_request_id(self) -> str:
         """Generate unique request ID"""
-        return f"req_{int(time.time() * 1000)}_{random.randint(1000, 9999)}"
+        return NEW_REQUEST_ID()
 
     def get_timestamp(self) -> str:
         """Get current timestamp in ISO format"""
-        return datetime.datetime.now().isoformat() + "Z"
+        return self.clock.now().isoformat() + "Z"
 
     def create_log_entry(self, level: LogLevel, message: str, **kwargs) -> Dict:
         """Create a standardized log entry"""
@@ -170,34 +286,30 @@ class ChatLogGenerator:
             "level": level.value,
             "service": "chat-service",
             "message": message,
-            "request_id": self.generate_request_id(),
+            "request_id": kwargs.pop("request_id", None) or self.generate_request_id(),
             **kwargs
         }
         return log_entry
 
     def write_log(self, log_file: str, entry: Dict):
         """Write log entry to file"""
-        log_path = self.log_dir / log_file
-        with open(log_path, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+        self.writer.write(log_file, ENCODER.encode(entry), entry["level"])
 
-    def generate_user_join_event(self):
+    def generate_user_join_event(self, user: Optional[User] = None, room: Optional[Room] = None,
+                                 request_id: Optional[str] = None):
         """Generate user join event"""
-        user = random.choice(self.users)
-        room = random.choice(self.rooms)
+        state = self.state
+        user = user or self.rng.choice(state.users)
+        room = room or self.rng.choice(state.rooms)
         
         # Add to active sessions
-        self.active_sessions[user.session_id] = user
-        if room.to_username not in self.active_rooms:
-            self.active_rooms[room.to_username] = room
-        
-        if user.user_id not in room.participants:
-            room.participants.append(user.user_id)
+        state.join(user, room)
 
         # Main chat log
         log_entry = self.create_log_entry(
             LogLevel.INFO,
             f"User {user.username} joined room {room.name}",
+            request_id=request_id,
             user_id=user.user_id,
             username=user.username,
             session_id=user.session_id,
@@ -214,8 +326,8 @@ class ChatLogGenerator:
             },
             response={
                 "status": 200,
-                "time": random.uniform(0.01, 0.1),
-                "duration": random.uniform(0.005, 0.05)
+                "time": self.rng.uniform(0.01, 0.1),
+                "duration": self.rng.uniform(0.005, 0.05)
             }
         )
         self.write_log("chat.log", log_entry)
@@ -224,41 +336,34 @@ class ChatLogGenerator:
         message_entry = self.create_log_entry(
             LogLevel.INFO,
             f"System message: {user.username} joined the room",
+            request_id=request_id,
             user_id="system",
             username="system",
             to_username=room.to_username,
             channel_id=room.channel_id,
-            message_id=str(uuid.uuid4()),
+            message_id=NEW_UUID(),
             event_type="system_message",
             message_type="join_notification"
         )
         self.write_log("messages/messages.log", message_entry)
 
-    def generate_user_leave_event(self):
+    def generate_user_leave_event(self, user: Optional[User] = None, request_id: Optional[str] = None):
         """Generate user leave event"""
-        if not self.active_sessions:
-            return
-            
-        session_id = random.choice(list(self.active_sessions.keys()))
-        user = self.active_sessions[session_id]
-        
-        # Find room user is in
-        user_room = None
-        for room in self.active_rooms.values():
-            if user.user_id in room.participants:
-                user_room = room
-                break
-        
-        if not user_room:
+        state = self.state
+        if user is None:
+            if not state.active_sessions:
+                return
+            _, user = state.active_sessions.choice_item(self.rng)
+        if user.user_id not in state.user_rooms:
             return
 
         # Remove from room
-        room.participants.remove(user.user_id)
-        del self.active_sessions[session_id]
+        user_room = state.leave(user)
 
         log_entry = self.create_log_entry(
             LogLevel.INFO,
             f"User {user.username} left room {user_room.name}",
+            request_id=request_id,
             user_id=user.user_id,
             username=user.username,
             session_id=user.session_id,
@@ -275,31 +380,25 @@ class ChatLogGenerator:
             },
             response={
                 "status": 200,
-                "time": random.uniform(0.01, 0.1)
+                "time": self.rng.uniform(0.01, 0.1)
             }
         )
         self.write_log("chat.log", log_entry)
 
-    def generate_message_sent_event(self):
+    def generate_message_sent_event(self, user: Optional[User] = None):
         """Generate message sent event"""
-        if not self.active_sessions:
-            return
-            
-        user = random.choice(list(self.active_sessions.values()))
-        
-        # Find room user is in
-        user_room = None
-        for room in self.active_rooms.values():
-            if user.user_id in room.participants:
-                user_room = room
-                break
-        
+        state = self.state
+        if user is None:
+            if not state.active_sessions:
+                return
+            _, user = state.active_sessions.choice_item(self.rng)
+        user_room = state.user_rooms.get(user.user_id)
         if not user_room:
             return
 
-        message_id = str(uuid.uuid4())
-        message_text = random.choice(self.message_templates)
-        self.message_counter += 1
+        message_id = NEW_UUID()
+        message_text = self.rng.choice(self.message_templates)
+        state.message_counter += 1
 
         # Main chat log
         log_entry = self.create_log_entry(
@@ -322,8 +421,8 @@ class ChatLogGenerator:
             },
             response={
                 "status": 201,
-                "time": random.uniform(0.02, 0.15),
-                "duration": random.uniform(0.01, 0.08)
+                "time": self.rng.uniform(0.02, 0.15),
+                "duration": self.rng.uniform(0.01, 0.08)
             }
         )
         self.write_log("chat.log", log_entry)
@@ -344,14 +443,18 @@ class ChatLogGenerator:
         )
         self.write_log("messages/messages.log", message_entry)
 
-    def generate_connection_event(self):
+    def generate_connection_event(self, user: Optional[User] = None, connected: Optional[bool] = None,
+                                  reason: str = "connection_timeout", request_id: Optional[str] = None):
         """Generate WebSocket connection events"""
-        user = random.choice(self.users)
+        user = user or self.rng.choice(self.state.users)
+        if connected is None:
+            connected = self.rng.choice([True, False])
         
-        if random.choice([True, False]):  # Connection established
+        if connected:  # Connection established
             log_entry = self.create_log_entry(
                 LogLevel.INFO,
                 f"WebSocket connection established for user {user.username}",
+                request_id=request_id,
                 user_id=user.user_id,
                 username=user.username,
                 session_id=user.session_id,
@@ -366,20 +469,21 @@ class ChatLogGenerator:
                 },
                 response={
                     "status": 101,
-                    "time": random.uniform(0.001, 0.01)
+                    "time": self.rng.uniform(0.001, 0.01)
                 }
             )
         else:  # Connection lost
             log_entry = self.create_log_entry(
                 LogLevel.WARN,
                 f"WebSocket connection lost for user {user.username}",
+                request_id=request_id,
                 user_id=user.user_id,
                 username=user.username,
                 session_id=user.session_id,
                 action="websocket_disconnect",
                 success=False,
                 event_type=EventType.CONNECTION_LOST.value,
-                error_reason="connection_timeout",
+                error_reason=reason,
                 request={
                     "ip": user.ip_address,
                     "user_agent": user.user_agent
@@ -390,7 +494,7 @@ class ChatLogGenerator:
 
     def generate_error_event(self):
         """Generate error events"""
-        user = random.choice(self.users)
+        user = self.rng.choice(self.state.users)
         error_types = [
             ("rate_limit_exceeded", "Rate limit exceeded for user", 429),
             ("message_too_long", "Message exceeds maximum length", 400),
@@ -401,8 +505,8 @@ class ChatLogGenerator:
             ("spam_detected", "Spam message detected", 400)
         ]
         
-        error_code, error_message, status_code = random.choice(error_types)
-        self.error_counter += 1
+        error_code, error_message, status_code = self.rng.choice(error_types)
+        self.state.error_counter += 1
 
         log_entry = self.create_log_entry(
             LogLevel.ERROR,
@@ -424,14 +528,14 @@ class ChatLogGenerator:
             },
             response={
                 "status": status_code,
-                "time": random.uniform(0.001, 0.05)
+                "time": self.rng.uniform(0.001, 0.05)
             }
         )
         self.write_log("chat-error.log", log_entry)
 
     def generate_security_event(self):
         """Generate security-related events"""
-        user = random.choice(self.users)
+        user = self.rng.choice(self.state.users)
         
         security_events = [
             ("failed_authentication", "Authentication failed", "medium"),
@@ -441,7 +545,7 @@ class ChatLogGenerator:
             ("unauthorized_room_access", "Unauthorized room access attempt", "high")
         ]
         
-        event_type, message, threat_level = random.choice(security_events)
+        event_type, message, threat_level = self.rng.choice(security_events)
 
         log_entry = self.create_log_entry(
             LogLevel.WARN,
@@ -463,7 +567,7 @@ class ChatLogGenerator:
             },
             response={
                 "status": 403,
-                "time": random.uniform(0.001, 0.02)
+                "time": self.rng.uniform(0.001, 0.02)
             }
         )
         self.write_log("chat.log", log_entry)
@@ -472,11 +576,11 @@ class ChatLogGenerator:
         """Periodically archive old messages"""
         archive_entry = self.create_log_entry(
             LogLevel.INFO,
-            f"Archived {random.randint(50, 200)} old messages",
+            f"Archived {self.rng.randint(50, 200)} old messages",
             action="message_archival",
             success=True,
             event_type="maintenance",
-            archived_count=random.randint(50, 200),
+            archived_count=self.rng.randint(50, 200),
             archive_date=self.get_timestamp()
         )
         self.write_log("messages/messages-archive.log", archive_entry)
@@ -489,72 +593,188 @@ class ChatLogGenerator:
             action="stats_report",
             success=True,
             event_type="statistics",
-            active_users=len(self.active_sessions),
-            active_rooms=len(self.active_rooms),
+            active_users=self.active_session_count,
+            active_rooms=self.active_room_count,
             messages_sent=self.message_counter,
             errors_occurred=self.error_counter,
-            uptime_seconds=random.randint(3600, 86400)
+            uptime_seconds=self.rng.randint(3600, 86400)
         )
         self.write_log("chat.log", stats_entry)
 
-    def log_generation_worker(self):
+    def log_generation_worker(self, scheduler, index: int = 0):
         """Worker thread for generating logs"""
-        while self.running:
+        self.bind_worker(index)
+        events = [
+            self.generate_message_sent_event,
+            self.generate_user_join_event,
+            self.generate_user_leave_event,
+            self.generate_connection_event,
+            self.generate_error_event,
+            self.generate_security_event,
+            self.archive_messages,
+            self.generate_stats_log
+        ]
+        # Built per worker so draws come from this worker's RNG
+        next_event = AliasTable(events, [40, 10, 8, 15, 12, 8, 2, 5], rng=self.rng).draw
+        
+        # Initialize some users in rooms
+        for _ in range(5):
+            self.generate_user_join_event()
+        
+        for _ in scheduler:
+            if not self.running:
+                break
             try:
                 # Generate different types of events with varying probabilities
-                event_type = random.choices(
-                    [
-                        self.generate_message_sent_event,
-                        self.generate_user_join_event,
-                        self.generate_user_leave_event,
-                        self.generate_connection_event,
-                        self.generate_error_event,
-                        self.generate_security_event,
-                        self.archive_messages,
-                        self.generate_stats_log
-                    ],
-                    weights=[40, 10, 8, 15, 12, 8, 2, 5]
-                )[0]
-                
-                event_type()
-                
-                # Random delay between events
-                time.sleep(random.uniform(0.1, 3.0))
-                
+                next_event()()
             except Exception as e:
-                print(f"Error in log generation worker: {e}")
-                time.sleep(1)
+                metrics.record_drop("chat-service", "error")
+                print(f"Error in log generation worker {index}: {e}")
 
-    def start(self, num_workers: int = 2):
+    def start(self, num_workers: int = 2, rate: Optional[float] = None,
+              arrivals: str = "poisson", duration: Optional[float] = None,
+              worker_mode: str = "thread"):
         """Start log generation with multiple workers"""
+        if rate is None:
+            # Same average pace as the old 0.1-3.0s random sleep per worker
+            rate = num_workers / 1.55
+
         print(f"Starting chat service log generation...")
         print(f"Log directory: {self.log_dir}")
-        print(f"Workers: {num_workers}")
+        print(f"Workers: {num_workers} ({worker_mode}s)")
+        print(f"Target rate: {rate:.1f} events/sec ({arrivals} arrivals)")
         
         self.running = True
         
-        # Start worker threads
+        if self.clock.simulated:
+            # Virtual time is a single timeline, so one worker drives it
+            scheduler = make_scheduler(rate, arrivals, name="chat-service", clock=self.clock)
+            self.schedulers = [scheduler]
+            try:
+                self.log_generation_worker(scheduler)
+            except KeyboardInterrupt:
+                print("\nStopping log generation...")
+            self.stop()
+            return
+        
+        self.partition(num_workers)
+        if worker_mode == "process":
+            self._run_worker_processes(num_workers, rate, arrivals, duration)
+            return
+        
+        # Start worker threads, each with its own partition and share of the target rate
         for i in range(num_workers):
-            thread = threading.Thread(target=self.log_generation_worker, daemon=True)
+            scheduler = RateScheduler(rate / num_workers, arrivals, duration,
+                                      name=f"chat-service worker {i}")
+            self.schedulers.append(scheduler)
+            thread = threading.Thread(target=self.log_generation_worker, args=(scheduler, i), daemon=True)
             thread.start()
             self.threads.append(thread)
         
-        # Initialize some users in rooms
-        for _ in range(5):
-            self.generate_user_join_event()
-        
         try:
-            while self.running:
+            while self.running and any(thread.is_alive() for thread in self.threads):
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\nStopping log generation...")
-            self.stop()
+        self.stop()
+
+    def _process_worker(self, index: int, scheduler, results):
+        """Entry point of a worker process: own partition, RNG and writer"""
+        # The parent's writer (and its lock) must not be reused after fork
+        self.writer = BufferedLogWriter(self.log_dir, service="chat-service", rotation=self.rotation)
+        self.running = True
+        try:
+            self.log_generation_worker(scheduler, index)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.writer.close()
+            stats = scheduler.stats() if isinstance(scheduler, RateScheduler) else None
+            results.put((index, stats, self.writer.total_stats().lines))
+
+    def _run_worker_processes(self, num_workers: int, rate: Optional[float], arrivals: str,
+                              duration: Optional[float], deadline: Optional[float] = None) -> int:
+        """Run one worker per process; returns the number of lines they wrote"""
+        self.writer.flush()
+        results = multiprocessing.Queue()
+        processes = []
+        for i in range(num_workers):
+            if deadline is None:
+                scheduler = RateScheduler(rate / num_workers, arrivals, duration,
+                                          name=f"chat-service worker {i}")
+            else:
+                scheduler = _until(deadline)
+            process = multiprocessing.Process(target=self._process_worker,
+                                              args=(i, scheduler, results), daemon=True)
+            process.start()
+            processes.append(process)
+        
+        collected = []
+        while len(collected) < num_workers:
+            try:
+                collected.append(results.get())
+            except KeyboardInterrupt:
+                # Workers got the same SIGINT and are closing their writers
+                print("\nStopping log generation...")
+        for process in processes:
+            process.join(timeout=1)
+        
+        collected.sort(key=lambda result: result[0])
+        lines = sum(worker_lines for _, _, worker_lines in collected)
+        if deadline is None:
+            stats = [worker_stats for _, worker_stats, _ in collected]
+            for worker_stats in stats:
+                print(worker_stats)
+            print(SchedulerStats.combine("chat-service", stats))
+            print(f"Worker processes wrote {lines} lines")
+            print("Log generation stopped.")
+        return lines
+
+    def benchmark(self, worker_counts: List[int], seconds: float = 5.0,
+                  worker_mode: str = "thread") -> Dict[int, float]:
+        """Measure unpaced lines/sec for each worker count"""
+        print(f"Benchmarking {worker_mode} workers for {seconds:.0f}s each (logs go to {self.log_dir})")
+        results = {}
+        for num_workers in worker_counts:
+            self.partition(num_workers)
+            self.running = True
+            started = time.perf_counter()
+            deadline = time.monotonic() + seconds
+            
+            if worker_mode == "process":
+                lines = self._run_worker_processes(num_workers, None, "constant", None, deadline)
+            else:
+                before = self.writer.total_stats().lines
+                threads = [threading.Thread(target=self.log_generation_worker, args=(_until(deadline), i))
+                           for i in range(num_workers)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.writer.flush()
+                lines = self.writer.total_stats().lines - before
+            
+            elapsed = time.perf_counter() - started
+            results[num_workers] = lines / elapsed
+            speedup = results[num_workers] / results[worker_counts[0]]
+            print(f"  {num_workers:3d} workers: {results[num_workers]:10.0f} lines/sec ({speedup:.2f}x)")
+        self.running = False
+        self.writer.close()
+        return results
 
     def stop(self):
         """Stop log generation"""
         self.running = False
+        for scheduler in self.schedulers:
+            scheduler.stop()
         for thread in self.threads:
             thread.join(timeout=1)
+        self.writer.close()
+        print(self.writer.report())
+        for scheduler in self.schedulers:
+            print(scheduler.report())
+        if len(self.schedulers) > 1:
+            print(SchedulerStats.combine("chat-service", [s.stats() for s in self.schedulers]))
         print("Log generation stopped.")
 
     def generate_batch(self, count: int = 100):
@@ -565,28 +785,166 @@ class ChatLogGenerator:
         for _ in range(3):
             self.generate_user_join_event()
         
+        next_event_type = AliasTable([
+            self.generate_message_sent_event,
+            self.generate_user_join_event,
+            self.generate_user_leave_event,
+            self.generate_connection_event,
+            self.generate_error_event,
+            self.generate_security_event
+        ], [50, 10, 8, 15, 12, 5], rng=self.rng).draw
+        
         for i in range(count):
-            event_type = random.choices(
-                [
-                    self.generate_message_sent_event,
-                    self.generate_user_join_event,
-                    self.generate_user_leave_event,
-                    self.generate_connection_event,
-                    self.generate_error_event,
-                    self.generate_security_event
-                ],
-                weights=[50, 10, 8, 15, 12, 5]
-            )[0]
-            
-            event_type()
+            next_event_type()()
             
             if i % 10 == 0:
                 print(f"Generated {i + 1}/{count} logs")
         
+        self.writer.flush()
         print(f"Batch generation complete!")
         print(f"Messages sent: {self.message_counter}")
         print(f"Errors occurred: {self.error_counter}")
-        print(f"Active sessions: {len(self.active_sessions)}")
+        print(f"Active sessions: {self.active_session_count}")
+        print(self.writer.report())
+
+class ChatSessionEngine:
+    """Simulated WebSocket clients, one asyncio coroutine per session.
+
+    Every client runs connect -> join -> chat -> leave -> disconnect with
+    exponential think times, stays offline for a while and reconnects with
+    a fresh session. Outages drop a fraction of the connected clients at
+    once; they log a connection timeout and reconnect after a jittered
+    backoff, which reproduces the reconnect waves seen on /ws/chat.
+    """
+
+    def __init__(self, generator: ChatLogGenerator, clients: int, ramp: float = 10.0,
+                 think: float = 5.0, messages: float = 20.0, offline: float = 30.0,
+                 backoff: float = 2.0, outage_every: Optional[float] = None,
+                 outage_fraction: float = 0.3):
+        if generator.population is not None and clients > len(generator.population):
+            raise ValueError(f"{clients} clients need at least as many users, "
+                             f"the population has {len(generator.population)}")
+        self.generator = generator
+        self.clients = clients
+        self.ramp = ramp
+        self.think = think
+        self.messages = messages
+        self.offline = offline
+        self.backoff = backoff
+        self.outage_every = outage_every
+        self.outage_fraction = outage_fraction
+        self.rng = generator.rng
+        self.state = generator.state
+        self.running = False
+        # Tasks of the clients that currently hold an open connection
+        self.connected: IndexedDict[int, asyncio.Task] = IndexedDict()
+        self.sessions = 0
+        self.drops = 0
+
+    def _make_user(self, index: int) -> User:
+        population = self.generator.population
+        if population is not None:
+            return _population_user(population, index)
+        rng = self.rng
+        return User(
+            user_id=f"user_{10000 + index}",
+            username=f"client{index}",
+            session_id=NEW_UUID(),
+            ip_address=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            user_agent=rng.choice(self.generator.user_agents)
+        )
+
+    async def _client(self, index: int):
+        """Lifecycle of one simulated client"""
+        generator, rng, state = self.generator, self.rng, self.state
+        user = self._make_user(index)
+        await asyncio.sleep(rng.uniform(0, self.ramp))
+        
+        while self.running:
+            # connect -> join
+            self.sessions += 1
+            self.connected[index] = asyncio.current_task()
+            generator.generate_connection_event(user, connected=True)
+            generator.generate_user_join_event(user, rng.choice(state.rooms))
+            
+            try:
+                # chat, one message per think time
+                for _ in range(int(rng.expovariate(1.0 / self.messages)) + 1):
+                    await asyncio.sleep(rng.expovariate(1.0 / self.think))
+                    generator.generate_message_sent_event(user)
+            except asyncio.CancelledError:
+                self.connected.pop(index, None)
+                if not self.running:
+                    raise
+                # Dropped by an outage: no leave, just a timeout and a reconnect
+                self.drops += 1
+                state.leave(user)
+                generator.generate_connection_event(user, connected=False)
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * self.backoff)
+            else:
+                # leave -> disconnect, then stay offline for a while
+                self.connected.pop(index, None)
+                generator.generate_user_leave_event(user)
+                generator.generate_connection_event(user, connected=False, reason="client_closed")
+                await asyncio.sleep(rng.expovariate(1.0 / self.offline))
+            user.session_id = NEW_UUID()
+
+    async def _outages(self):
+        """Periodically drop a fraction of the connected clients at once"""
+        while self.running:
+            await asyncio.sleep(self.rng.expovariate(1.0 / self.outage_every))
+            victims = self.rng.sample(list(self.connected), int(len(self.connected) * self.outage_fraction))
+            print(f"Outage: dropping {len(victims)} of {len(self.connected)} connected clients")
+            for index in victims:
+                self.connected[index].cancel()
+
+    async def _monitor(self, interval: float = 10.0):
+        """Print progress and write the periodic stats log"""
+        writer = self.generator.writer
+        last = writer.total_stats().lines
+        while self.running:
+            await asyncio.sleep(interval)
+            self.generator.generate_stats_log()
+            lines = writer.total_stats().lines
+            print(f"Connected: {len(self.connected)}, in rooms: {len(self.state.user_rooms)}, "
+                  f"sessions: {self.sessions}, drops: {self.drops}, "
+                  f"{(lines - last) / interval:.0f} lines/sec")
+            last = lines
+
+    async def _main(self, duration: Optional[float]):
+        self.running = True
+        tasks = [asyncio.create_task(self._client(i)) for i in range(self.clients)]
+        tasks.append(asyncio.create_task(self._monitor()))
+        if self.outage_every:
+            tasks.append(asyncio.create_task(self._outages()))
+        try:
+            if duration is None:
+                await asyncio.gather(*tasks)
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run(self, duration: Optional[float] = None):
+        """Run the clients until ``duration`` seconds pass or Ctrl+C"""
+        print(f"Simulating {self.clients} chat clients (ramp {self.ramp:.0f}s, think {self.think:.1f}s)")
+        print(f"Log directory: {self.generator.log_dir}")
+        started = time.perf_counter()
+        try:
+            asyncio.run(self._main(duration))
+        except KeyboardInterrupt:
+            print("\nStopping log generation...")
+        elapsed = time.perf_counter() - started
+        self.generator.writer.close()
+        print(self.generator.writer.report())
+        print(f"{self.sessions} sessions and {self.drops} dropped connections in {elapsed:.1f}s")
+
+def _until(deadline: float):
+    """Unpaced slot iterator that runs until ``deadline`` (time.monotonic)"""
+    return itertools.takewhile(lambda _: time.monotonic() < deadline, itertools.count())
 
 def main():
     """Main function to run the log generator"""
@@ -596,16 +954,70 @@ def main():
     parser.add_argument("--log-dir", default="/var/log/ft-transcendence/chat-service", 
                        help="Log directory path")
     parser.add_argument("--batch", type=int, help="Generate batch of N logs and exit")
-    parser.add_argument("--workers", type=int, default=2, help="Number of worker threads")
+    parser.add_argument("--workers", type=int, default=2, help="Number of workers")
+    parser.add_argument("--worker-mode", choices=["thread", "process"], default="thread",
+                       help="Run workers as threads or as processes (scales past one core)")
+    parser.add_argument("--benchmark", metavar="COUNTS",
+                       help="Measure unpaced throughput for comma-separated worker counts, e.g. 1,2,4")
+    parser.add_argument("--duration", type=float, help="Stop continuous generation after N seconds")
+    parser.add_argument("--clients", type=int,
+                       help="Simulate N concurrent WebSocket clients with full session lifecycles")
+    parser.add_argument("--ramp", type=float, default=10.0,
+                       help="Spread the initial client connects over N seconds (0 = connect storm)")
+    parser.add_argument("--think", type=float, default=5.0,
+                       help="Mean seconds between a client's chat messages")
+    parser.add_argument("--outage-every", type=float,
+                       help="Mean seconds between network outages that drop connected clients")
+    parser.add_argument("--outage-fraction", type=float, default=0.3,
+                       help="Fraction of connected clients dropped by each outage")
+    add_rate_arguments(parser)
+    add_shard_arguments(parser)
+    add_clock_arguments(parser)
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
     
     args = parser.parse_args()
+    serve_metrics(args)
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    population = build_population(args)
+    generator = ChatLogGenerator(args.log_dir, build_clock(args), seed=args.seed,
+                                 rotation=build_rotation(args), population=population)
+    sink = (build_bulk_sink(args, "chat-service")
+            or build_beats_output(args, "chat-service", generator.writer.base_dir)
+            or build_sink(args, "chat-service"))
+    if sink is not None:
+        generator.writer.close()
+        generator.writer = sink
     
-    generator = ChatLogGenerator(args.log_dir)
+    if args.batch and args.processes > 1:
+        run_sharded(functools.partial(ChatLogGenerator, population=population), "generate_batch",
+                    args.batch, args.processes, args.log_dir, seed=args.seed, sink=sink)
+        return
     
-    if args.batch:
+    if args.benchmark:
+        counts = [int(count) for count in args.benchmark.split(",")]
+        generator.benchmark(counts, args.duration or 5.0, args.worker_mode)
+    elif args.clients:
+        if generator.clock.simulated:
+            parser.error("--clients runs on the wall clock; drop --start/--end")
+        if population is not None and args.clients > len(population):
+            parser.error(f"--clients {args.clients} exceeds --population {len(population)}; "
+                         "every client is a distinct user")
+        engine = ChatSessionEngine(generator, args.clients, ramp=args.ramp, think=args.think,
+                                   outage_every=args.outage_every,
+                                   outage_fraction=args.outage_fraction)
+        engine.run(args.duration)
+    elif args.batch:
         generator.generate_batch(args.batch)
     else:
-        generator.start(args.workers)
+        generator.start(args.workers, args.rate, args.arrivals, args.duration, args.worker_mode)
 
 if __name__ == "__main__":
     main()
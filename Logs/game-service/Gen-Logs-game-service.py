@@ -6,29 +6,77 @@ Generates realistic logs for game service including:
 - game-error.log: Error logs
 - events/game-events.log: Game-specific events
 - events/match-events.log: Match-specific events
+- events/rating-events.log: Elo rating changes
 """
 
-import json
+import functools
 import random
+from json.encoder import encode_basestring_ascii
 import time
 import os
-import uuid
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+import sys
+from pathlib import Path
+from datetime import timedelta
+from typing import Dict, List, Any, Optional, Sequence
 import threading
 from concurrent.futures import ThreadPoolExecutor
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from loggen import (AliasTable, BufferedLogWriter, Population, WallClock, add_clock_arguments,
+                    add_metrics_arguments, add_population_arguments, add_rate_arguments,
+                    add_rotation_arguments, add_shard_arguments, build_clock, build_population,
+                    build_rotation, make_scheduler, run_sharded, serve_metrics)
+from loggen.beats import add_beats_arguments, build_beats_output
+from loggen.bulk import add_bulk_arguments, build_bulk_sink
+from loggen.columnar import DEFAULT_CHUNK, randints, spread_timestamps, uniforms, write_lines
+from loggen.lifecycle import (ACTIVE, CANCELLED, FINISHED, PAUSED, STARTING, STATES, WAITING,
+                              GameLifecycle)
+from loggen.pong import DEFAULT_TICK, PongArena
+from loggen.rating import RatingTable
+from loggen.sinks import add_sink_arguments, build_sink
+from loggen import TemplateEncoder, id_factory
+
+NEW_REQUEST_ID = id_factory("req_", 8).next
+NEW_GAME_ID = id_factory("game_", 8).next
+NEW_MATCH_ID = id_factory("match_", 8).next
+NEW_ROOM_ID = id_factory("room_", 6).next
+TAKE_REQUEST_IDS = id_factory("req_", 8).take
+TAKE_MATCH_IDS = id_factory("match_", 8).take
+ENCODER = TemplateEncoder()
+
+# Population --ratings plays among when none is given on the command line
+DEFAULT_POPULATION = 100_000
+
+# One rating change, rendered as ENCODER would render the same entry
+RATING_ROW = (
+    '{"timestamp": "%sZ", "level": "INFO", "service": "game-service", "message": "Player rating updated", '
+    '"request_id": "%s", "match_id": "%s", "user_id": "%s", "username": %s, "event_type": "rating_change", '
+    '"result": "%s", "rating_before": %d, "rating_after": %d, "rating_change": %d, "opponent": %s, '
+    '"opponent_rating": %d, "games_played": %d, "action": "rating_update"}')
+
+def _population_player(population: Population, index: int) -> Dict:
+    return {
+        "user_id": population.user_id(index),
+        "username": population.username(index),
+        "skill_level": population.skill_level(index),
+        "games_played": population.games_played(index)
+    }
+
 class GameServiceLogGenerator:
-    def __init__(self, log_base_path: str = "/var/log/ft-transcendence/game-service"):
+    def __init__(self, log_base_path: str = "/var/log/ft-transcendence/game-service", clock=None,
+                 rotation=None, population: Optional[Population] = None):
         self.log_base_path = log_base_path
+        self.clock = clock or WallClock()
+        self.population = population
         self.ensure_directories()
+        self.writer = BufferedLogWriter(self.log_base_path, service="game-service", rotation=rotation)
         
-        # Game states and data
+        # Game states and data; the lifecycle engine keeps the first two keyed by game and match ID
         self.active_games = {}
         self.active_matches = {}
         self.players = self.generate_players()
         self.game_types = ["pong", "tournament", "ranked", "casual"]
-        self.match_statuses = ["waiting", "starting", "active", "paused", "finished", "cancelled"]
+        self.match_statuses = list(STATES)
         self.game_events = ["player_join", "player_leave", "game_start", "game_end", "score_update", "pause", "resume"]
         self.match_events = ["match_created", "match_started", "match_ended", "player_scored", "ball_hit", "power_up_used"]
         
@@ -38,6 +86,9 @@ class GameServiceLogGenerator:
         # Request IDs for correlation
         self.request_ids = []
         
+        # Elo ratings by player index, allocated on first use
+        self._ratings: Optional[RatingTable] = None
+        
     def ensure_directories(self):
         """Create necessary directories if they don't exist"""
         directories = [
@@ -53,7 +104,8 @@ class GameServiceLogGenerator:
             f"{self.log_base_path}/game.log",
             f"{self.log_base_path}/game-error.log",
             f"{self.log_base_path}/events/game-events.log",
-            f"{self.log_base_path}/events/match-events.log"
+            f"{self.log_base_path}/events/match-events.log",
+            f"{self.log_base_path}/events/rating-events.log"
         ]
         
         for log_file in log_files:
@@ -61,8 +113,10 @@ class GameServiceLogGenerator:
                 with open(log_file, 'w') as f:
                     f.write("")
     
-    def generate_players(self) -> List[Dict]:
+    def generate_players(self) -> Sequence[Dict]:
         """Generate a pool of fake players"""
+        if self.population is not None:
+            return self.population.view(_population_player)
         usernames = [
             "player1", "pongmaster", "ballbuster", "paddle_pro", "gameking",
             "speedster", "champion42", "rookie_player", "pro_gamer", "legend123",
@@ -80,31 +134,104 @@ class GameServiceLogGenerator:
         
         return players
     
+    @property
+    def ratings(self) -> RatingTable:
+        """Elo ratings of every player, by index into ``self.players``"""
+        if self._ratings is None:
+            if self.population is not None:
+                skill, history = self.population.skill_level, self.population.games_played
+            else:
+                skill = lambda index: self.players[index]["skill_level"]
+                history = lambda index: self.players[index]["games_played"]
+            self._ratings = RatingTable(len(self.players), skill, history)
+        return self._ratings
+    
+    def player_names(self, index: int):
+        """User ID and username of player ``index``"""
+        if self.population is not None:
+            return self.population.user_id(index), self.population.username(index)
+        player = self.players[index]
+        return player["user_id"], player["username"]
+    
+    def rating_lines(self, stamps: Sequence[str], request_ids: Sequence[str], match_ids: Sequence[str],
+                     results) -> List[str]:
+        """Two rating_change lines, winner's first, per rated match result"""
+        names = self.player_names
+        rows = []
+        for stamp, request_id, match_id, (winner, loser, before_w, after_w, before_l, after_l, games_w,
+                                          games_l) in zip(stamps, request_ids, match_ids, results):
+            winner_id, winner_name = names(winner)
+            loser_id, loser_name = names(loser)
+            winner_name, loser_name = encode_basestring_ascii(winner_name), encode_basestring_ascii(loser_name)
+            before_w, after_w, before_l, after_l = round(before_w), round(after_w), round(before_l), round(after_l)
+            rows.append((stamp, request_id, match_id, winner_id, winner_name, "win", before_w, after_w,
+                         after_w - before_w, loser_name, before_l, games_w))
+            rows.append((stamp, request_id, match_id, loser_id, loser_name, "loss", before_l, after_l,
+                         after_l - before_l, winner_name, before_w, games_l))
+        return list(map(RATING_ROW.__mod__, rows))
+    
+    def write_rating_change(self, match: Dict, winner: int, loser: int):
+        """Apply a finished match to the ratings and log both players' changes"""
+        result = self.ratings.record(winner, loser)
+        write_lines(self.writer, "events/rating-events.log",
+                    self.rating_lines([self.clock.utcnow().isoformat()], [match["request_id"]],
+                                      [match["match_id"]], [result]), "INFO")
+    
+    def generate_rating_results(self, count: int = 100, chunk: int = DEFAULT_CHUNK):
+        """Play ``count`` rated matches between random players as fast as possible, logging rating changes
+        
+        Pairings and outcome draws come a chunk at a time; the ratings
+        themselves change match by match.
+        """
+        print(f"Playing {count} rated matches between {len(self.players)} players...")
+        ratings = self.ratings
+        last = len(self.players) - 1
+        done = 0
+        started = time.perf_counter()
+        previous = self.clock.utcnow()
+        while done < count:
+            n = min(chunk, count - done)
+            # The second player is drawn from everyone but the first
+            firsts = randints(n, 0, last)
+            seconds = [second + (second >= first) for first, second in zip(firsts, randints(n, 0, last - 1))]
+            results = ratings.play_many(firsts, seconds, uniforms(n, 0.0, 1.0))
+            now = self.clock.utcnow()
+            stamps = spread_timestamps(previous, now, n)
+            previous = now
+            write_lines(self.writer, "events/rating-events.log",
+                        self.rating_lines(stamps, TAKE_REQUEST_IDS(n), TAKE_MATCH_IDS(n), results), "INFO")
+            done += n
+            print(f"Played {done}/{count} matches")
+        
+        self.writer.flush()
+        elapsed = time.perf_counter() - started
+        print(f"Played {count} matches in {elapsed:.2f}s ({count / max(elapsed, 1e-9) * 60:,.0f} results/min)")
+        print(ratings.report())
+        print(self.writer.report())
+    
     def get_random_player(self) -> Dict:
         """Get a random player from the pool"""
         return random.choice(self.players)
     
     def generate_request_id(self) -> str:
         """Generate a unique request ID"""
-        return f"req_{uuid.uuid4().hex[:8]}"
+        return NEW_REQUEST_ID()
     
     def generate_game_id(self) -> str:
         """Generate a unique game ID"""
-        return f"game_{uuid.uuid4().hex[:8]}"
+        return NEW_GAME_ID()
     
     def generate_match_id(self) -> str:
         """Generate a unique match ID"""
-        return f"match_{uuid.uuid4().hex[:8]}"
+        return NEW_MATCH_ID()
     
     def get_timestamp(self) -> str:
         """Get current timestamp in ISO format"""
-        return datetime.utcnow().isoformat() + "Z"
+        return self.clock.utcnow().isoformat() + "Z"
     
     def write_log(self, log_file: str, log_entry: Dict):
         """Write a log entry to the specified file"""
-        log_path = f"{self.log_base_path}/{log_file}"
-        with open(log_path, 'a') as f:
-            f.write(json.dumps(log_entry) + "\n")
+        self.writer.write(log_file, ENCODER.encode(log_entry), log_entry.get("level"))
     
     def generate_general_game_log(self):
         """Generate general game service logs"""
@@ -144,7 +271,7 @@ class GameServiceLogGenerator:
                 "service": "game-service",
                 "message": "Game room created",
                 "request_id": request_id,
-                "to_username": f"room_{uuid.uuid4().hex[:6]}",
+                "to_username": NEW_ROOM_ID(),
                 "action": "room_create"
             },
             {
@@ -228,7 +355,11 @@ class GameServiceLogGenerator:
         self.write_log("game-error.log", log_entry)
     
     def generate_game_events_log(self):
-        """Generate game-specific events logs"""
+        """Generate game-specific events logs
+
+        Each call logs one event of a fresh game, so the batch and continuous
+        mixes do not follow a game's lifecycle; ``simulate_lifecycle`` does
+        """
         request_id = self.generate_request_id()
         game_id = self.generate_game_id()
         player = self.get_random_player()
@@ -301,13 +432,13 @@ class GameServiceLogGenerator:
         log_entry = random.choice(event_patterns)
         self.write_log("events/game-events.log", log_entry)
     
-    def generate_match_events_log(self):
-        """Generate match-specific events logs"""
-        request_id = self.generate_request_id()
-        match_id = self.generate_match_id()
-        game_id = self.generate_game_id()
-        player1 = self.get_random_player()
-        player2 = self.get_random_player()
+    def generate_match_events_log(self, event_type: Optional[str] = None, match: Optional[Dict] = None):
+        """Generate match-specific events logs (``match`` pins the IDs and players of a known match)"""
+        request_id = match["request_id"] if match else self.generate_request_id()
+        match_id = match["match_id"] if match else self.generate_match_id()
+        game_id = match["game_id"] if match else self.generate_game_id()
+        player1 = match["player1"] if match else self.get_random_player()
+        player2 = match["player2"] if match else self.get_random_player()
         
         event_patterns = [
             {
@@ -393,39 +524,254 @@ class GameServiceLogGenerator:
             }
         ]
         
-        log_entry = random.choice(event_patterns)
+        if event_type is None:
+            log_entry = random.choice(event_patterns)
+        else:
+            log_entry = next(p for p in event_patterns if p["event_type"] == event_type)
+        if match:
+            # Correlation fields for cross-service journeys
+            log_entry["user_id"] = player1["user_id"]
+            if "session_id" in player1:
+                log_entry["session_id"] = player1["session_id"]
+        self.write_log("events/match-events.log", log_entry)
+    
+    def new_match(self) -> Dict:
+        """IDs and two distinct players for a match that is about to start"""
+        first, second = random.sample(range(len(self.players)), 2)
+        return {
+            "request_id": self.generate_request_id(),
+            "match_id": self.generate_match_id(),
+            "game_id": self.generate_game_id(),
+            "player1": self.players[first],
+            "player2": self.players[second],
+            "player_indices": (first, second)
+        }
+    
+    def write_match_event(self, timestamp: str, match: Dict, level: str, message: str, event_type: str,
+                          fields: Dict, action: str):
+        """Write one match event of a known match to match-events.log"""
+        log_entry = {
+            "timestamp": timestamp,
+            "level": level,
+            "service": "game-service",
+            "message": message,
+            "request_id": match["request_id"],
+            "match_id": match["match_id"],
+            "game_id": match["game_id"]
+        }
+        if "tournament_id" in match:
+            log_entry["tournament_id"] = match["tournament_id"]
+        log_entry["event_type"] = event_type
+        log_entry.update(fields)
+        log_entry["action"] = action
         self.write_log("events/match-events.log", log_entry)
     
-    def generate_logs_continuously(self, duration_seconds: int = 300):
+    def _write_pong_event(self, timestamp: str, match: Dict, event):
+        player = match["player1"] if event.side == 1 else match["player2"]
+        opponent = match["player2"] if event.side == 1 else match["player1"]
+        if event.kind == "ball_hit":
+            speed, hit_type = event.detail
+            self.write_match_event(timestamp, match, "DEBUG", "Ball hit detected", "ball_hit",
+                                   {"player": player["username"], "ball_speed": speed, "hit_type": hit_type},
+                                   "ball_hit")
+        elif event.kind == "player_scored":
+            self.write_match_event(timestamp, match, "INFO", "Player scored", "player_scored",
+                                   {"scorer": player["username"], "score": "%d-%d" % event.detail},
+                                   "score_update")
+        elif event.kind == "power_up_used":
+            self.write_match_event(timestamp, match, "INFO", "Power-up used", "power_up_used",
+                                   {"player": player["username"], "powerup_type": event.detail},
+                                   "powerup_use")
+        else:
+            score1, score2, seconds = event.detail
+            self.write_match_event(timestamp, match, "INFO", "Match ended", "match_ended",
+                                   {"winner": player["username"], "loser": opponent["username"],
+                                    "final_score": f"{max(score1, score2)}-{min(score1, score2)}",
+                                    "duration": seconds},
+                                   "match_end")
+            first, second = match["player_indices"]
+            self.write_rating_change(match, *((first, second) if event.side == 1 else (second, first)))
+    
+    def simulate_matches(self, concurrent: int = 1000, duration: float = 300, tick: float = DEFAULT_TICK):
+        """Play ``concurrent`` Pong matches at once for ``duration`` seconds, logging what happens in them
+        
+        Every event comes from the match's physics, so hits, scores and final
+        scores add up; a finished match is replaced by a new one. Simulated
+        clocks run as fast as the CPU allows, the wall clock is kept in step.
+        """
+        arena = PongArena(concurrent, tick, random.Random(random.getrandbits(64)))
+        matches: List[Optional[Dict]] = [None] * concurrent
+        
+        def start(slot: int):
+            match = matches[slot] = self.new_match()
+            arena.start(slot, match["player1"]["skill_level"], match["player2"]["skill_level"])
+            self.generate_match_events_log("match_created", match)
+            self.generate_match_events_log("match_started", match)
+        
+        print(f"Simulating {concurrent} concurrent matches for {duration:g} seconds "
+              f"({tick * 1000:g} ms ticks)...")
+        simulated = self.clock.simulated
+        clock_start = self.clock.now()
+        wall_start = time.perf_counter()
+        for slot in range(concurrent):
+            start(slot)
+        
+        try:
+            for _ in range(max(1, round(duration / tick))):
+                events = arena.step()
+                if simulated:
+                    self.clock.current = clock_start + timedelta(seconds=arena.now)
+                else:
+                    wait = arena.now - (time.perf_counter() - wall_start)
+                    if wait > 0:
+                        time.sleep(wait)
+                if not events:
+                    continue
+                timestamp = self.get_timestamp()
+                for event in events:
+                    self._write_pong_event(timestamp, matches[event.slot], event)
+                for event in events:
+                    if event.kind == "match_ended":
+                        start(event.slot)
+        except KeyboardInterrupt:
+            print("\nMatch simulation stopped by user.")
+        
+        self.writer.flush()
+        elapsed = time.perf_counter() - wall_start
+        print(f"Simulated {arena.now:.0f}s of play in {elapsed:.1f}s")
+        print(arena.report())
+        print(self.writer.report())
+    
+    def write_game_event(self, game: Dict, level: str, message: str, event_type: str, fields: Dict,
+                         action: str, player: Optional[Dict] = None):
+        """Write one event of a known game to game-events.log"""
+        log_entry = {
+            "timestamp": self.get_timestamp(),
+            "level": level,
+            "service": "game-service",
+            "message": message,
+            "request_id": game["request_id"],
+            "game_id": game["game_id"]
+        }
+        if player is not None:
+            log_entry["user_id"] = player["user_id"]
+            log_entry["username"] = player["username"]
+        log_entry["event_type"] = event_type
+        log_entry.update(fields)
+        log_entry["action"] = action
+        self.write_log("events/game-events.log", log_entry)
+    
+    def _lifecycle_transition(self, lifecycle: GameLifecycle, slot: int, old: Optional[int], new: int):
+        """Log a game's move from state ``old`` to ``new`` (``old`` is None for a new game)"""
+        if old is None:
+            game = lifecycle.context[slot] = self.new_match()
+            game["game_type"] = random.choice(self.game_types)
+            self.active_games[game["game_id"]] = game
+            self.write_game_event(game, "INFO", "New game created", "game_created",
+                                  {"game_type": game["game_type"], "max_players": 2}, "game_create")
+            self.generate_match_events_log("match_created", game)
+            return
+        game = lifecycle.context[slot]
+        if new == STARTING:
+            for count, player in enumerate((game["player1"], game["player2"]), 1):
+                self.write_game_event(game, "INFO", "Player joined game", "player_join",
+                                      {"player_count": count}, "player_join", player)
+        elif new == ACTIVE and old == STARTING:
+            self.write_game_event(game, "INFO", "Game started", "game_start",
+                                  {"player_count": 2, "game_mode": random.choice(["classic", "tournament", "ranked"])},
+                                  "game_start")
+            self.generate_match_events_log("match_started", game)
+            self.active_matches[game["match_id"]] = game
+        elif new == PAUSED:
+            game["paused_by"] = random.choice((game["player1"], game["player2"]))["username"]
+            self.write_game_event(game, "INFO", "Game paused", "game_pause",
+                                  {"paused_by": game["paused_by"],
+                                   "reason": random.choice(["player_request", "network_issue", "admin_action"])},
+                                  "game_pause")
+        elif new == ACTIVE:
+            self.write_game_event(game, "INFO", "Game resumed", "game_resume",
+                                  {"resumed_by": game["paused_by"], "pause_count": lifecycle.pauses(slot)},
+                                  "game_resume")
+        elif new == FINISHED:
+            # Stronger players win more often; the ratings then move toward their strength
+            first, second = game["player_indices"]
+            if random.random() >= self.ratings.win_probability(first, second):
+                first, second = second, first
+            winner, loser = self.players[first], self.players[second]
+            final_score = f"11-{random.randint(0, 9)}"
+            duration = round(lifecycle.played(slot))
+            self.write_game_event(game, "INFO", "Game ended", "game_end",
+                                  {"winner": winner["username"], "duration": duration, "final_score": final_score},
+                                  "game_end")
+            self.write_match_event(self.get_timestamp(), game, "INFO", "Match ended", "match_ended",
+                                   {"winner": winner["username"], "loser": loser["username"],
+                                    "final_score": final_score, "duration": duration},
+                                   "match_end")
+            self.write_rating_change(game, first, second)
+        else:
+            self.write_game_event(game, "WARN", "Game cancelled", "game_cancel",
+                                  {"previous_status": STATES[old],
+                                   "reason": "lobby_timeout" if old == WAITING else "player_abandoned"},
+                                  "game_cancel")
+        if new in (FINISHED, CANCELLED):
+            self.active_games.pop(game["game_id"], None)
+            self.active_matches.pop(game["match_id"], None)
+    
+    def simulate_lifecycle(self, rate: float = 5.0, duration: float = 300, drain: bool = True):
+        """Open ``rate`` games per second for ``duration`` seconds and walk each through its lifecycle
+        
+        Games wait for players, count down, play (with the odd pause) and
+        finish or get cancelled; every event of one game shares its IDs.
+        Simulated clocks run as fast as the CPU allows, the wall clock is kept in step.
+        """
+        lifecycle = GameLifecycle(lambda slot, old, new: self._lifecycle_transition(lifecycle, slot, old, new),
+                                  rng=random.Random(random.getrandbits(64)))
+        print(f"Opening {rate:g} games/s for {duration:g} seconds...")
+        started = time.perf_counter()
+        try:
+            lifecycle.run(self.clock, rate, duration, realtime=not self.clock.simulated, drain=drain)
+        except KeyboardInterrupt:
+            print("\nGame lifecycle simulation stopped by user.")
+        self.writer.flush()
+        print(f"Simulated {lifecycle.now:.0f}s in {time.perf_counter() - started:.1f}s")
+        print(lifecycle.report())
+        print(self.writer.report())
+    
+    def generate_logs_continuously(self, duration_seconds: int = 300, rate: Optional[float] = None,
+                                   arrivals: str = "poisson"):
         """Generate logs continuously for the specified duration"""
-        start_time = time.time()
+        if rate is None:
+            # Same average output as the old loop: ~1.1 logs per 0.5-2.0s tick
+            rate = 1.1 / 1.25
+        scheduler = make_scheduler(rate, arrivals, duration_seconds, name="game-service", clock=self.clock)
         
-        print(f"Starting log generation for {duration_seconds} seconds...")
+        if self.clock.simulated:
+            print(f"Simulating {self.clock.start.isoformat()} -> {self.clock.end.isoformat()}...")
+        else:
+            print(f"Starting log generation for {duration_seconds} seconds...")
+        print(f"Target rate: {rate:.1f} events/sec ({arrivals} arrivals)")
         print(f"Logs will be written to: {self.log_base_path}")
         
-        while time.time() - start_time < duration_seconds:
-            # Generate different types of logs with different frequencies
-            
-            # General game logs (most frequent)
-            if random.random() < 0.4:
-                self.generate_general_game_log()
-            
-            # Game events (frequent)
-            if random.random() < 0.3:
-                self.generate_game_events_log()
-            
-            # Match events (frequent)
-            if random.random() < 0.3:
-                self.generate_match_events_log()
-            
-            # Error logs (less frequent)
-            if random.random() < 0.1:
-                self.generate_game_error_log()
-            
-            # Wait between log generations
-            time.sleep(random.uniform(0.5, 2.0))
+        # General game logs are most frequent, errors the least
+        log_generators = [
+            self.generate_general_game_log,
+            self.generate_game_events_log,
+            self.generate_match_events_log,
+            self.generate_game_error_log
+        ]
+        next_log_generator = AliasTable(log_generators, [0.4, 0.3, 0.3, 0.1]).draw
         
+        try:
+            for _ in scheduler:
+                next_log_generator()()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            print("\nLog generation stopped by user.")
+        
+        self.writer.flush()
         print("Log generation completed!")
+        print(self.writer.report())
+        print(scheduler.report())
     
     def generate_batch_logs(self, num_logs: int = 100):
         """Generate a batch of logs quickly"""
@@ -446,7 +792,9 @@ class GameServiceLogGenerator:
             if (i + 1) % 25 == 0:
                 print(f"Generated {i + 1} logs...")
         
+        self.writer.flush()
         print("Batch log generation completed!")
+        print(self.writer.report())
 
 def main():
     """Main function to run the log generator"""
@@ -460,16 +808,62 @@ def main():
     parser.add_argument('--batch', type=int, help='Generate a batch of N logs and exit')
     parser.add_argument('--continuous', action='store_true', 
                        help='Generate logs continuously')
+    parser.add_argument('--matches', type=int,
+                       help='Simulate N concurrent Pong matches for --duration seconds (match events only)')
+    parser.add_argument('--tick', type=float, default=DEFAULT_TICK,
+                       help=f'Physics step of --matches in seconds (default: {DEFAULT_TICK})')
+    parser.add_argument('--ratings', type=int,
+                       help='Play N rated matches as fast as possible and log the rating changes '
+                            f'(among --population players, default {DEFAULT_POPULATION:,})')
+    parser.add_argument('--lifecycle', action='store_true',
+                       help='Open --rate games per second for --duration seconds and log each one '
+                            'from creation to its end')
+    parser.add_argument('--no-drain', action='store_true',
+                       help='With --lifecycle, stop at --duration instead of playing out open games')
+    add_rate_arguments(parser)
+    add_shard_arguments(parser)
+    add_clock_arguments(parser)
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
     
     args = parser.parse_args()
+    serve_metrics(args)
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    clock = build_clock(args)
+    population = build_population(args)
+    if args.ratings and population is None:
+        population = Population(DEFAULT_POPULATION, args.population_seed)
+    generator = GameServiceLogGenerator(args.path, clock, build_rotation(args), population)
+    sink = (build_bulk_sink(args, "game-service")
+            or build_beats_output(args, "game-service", generator.writer.base_dir)
+            or build_sink(args, "game-service"))
+    if sink is not None:
+        generator.writer.close()
+        generator.writer = sink
     
-    generator = GameServiceLogGenerator(args.path)
+    if args.batch and args.processes > 1:
+        run_sharded(functools.partial(GameServiceLogGenerator, population=population), "generate_batch_logs",
+                    args.batch, args.processes, args.path, seed=args.seed, sink=sink)
+        return
     
-    if args.batch:
+    if args.ratings:
+        generator.generate_rating_results(args.ratings)
+    elif args.lifecycle:
+        generator.simulate_lifecycle(args.rate or 5.0, args.duration, drain=not args.no_drain)
+    elif args.matches:
+        generator.simulate_matches(args.matches, args.duration, args.tick)
+    elif args.batch:
         generator.generate_batch_logs(args.batch)
-    elif args.continuous:
+    elif args.continuous or clock.simulated:
         try:
-            generator.generate_logs_continuously(args.duration)
+            generator.generate_logs_continuously(args.duration, args.rate, args.arrivals)
         except KeyboardInterrupt:
             print("\nLog generation stopped by user.")
     else:
@@ -0,0 +1,49 @@
+"""
+Shared building blocks for the ft-transcendence log generators
+"""
+
+from .clock import (DiurnalProfile, SimulatedClock, SimulatedScheduler, WallClock,
+                    add_clock_arguments, build_clock, make_scheduler)
+from .encoding import TemplateEncoder
+from .ids import IdFactory, UuidFactory, id_factory, uuid_factory
+from .metrics import add_metrics_arguments, serve_metrics, start_metrics_server
+from .population import Population, add_population_arguments, build_population
+from .rotation import RotationPolicy, add_rotation_arguments, build_rotation
+from .sampling import AliasTable, IndexedDict
+from .scheduler import RateScheduler, SchedulerStats, add_rate_arguments, parse_rate
+from .sharding import add_shard_arguments, run_sharded
+from .writer import BufferedLogWriter, WriterStats
+
+__all__ = [
+    "DiurnalProfile",
+    "SimulatedClock",
+    "SimulatedScheduler",
+    "WallClock",
+    "add_clock_arguments",
+    "build_clock",
+    "make_scheduler",
+    "TemplateEncoder",
+    "IdFactory",
+    "UuidFactory",
+    "id_factory",
+    "uuid_factory",
+    "add_metrics_arguments",
+    "serve_metrics",
+    "start_metrics_server",
+    "Population",
+    "add_population_arguments",
+    "build_population",
+    "RotationPolicy",
+    "add_rotation_arguments",
+    "build_rotation",
+    "AliasTable",
+    "IndexedDict",
+    "RateScheduler",
+    "SchedulerStats",
+    "add_rate_arguments",
+    "parse_rate",
+    "add_shard_arguments",
+    "run_sharded",
+    "BufferedLogWriter",
+    "WriterStats",
+]
@@ -0,0 +1,518 @@
+"""
+Lumberjack v2 (Beats protocol) output for the ft-transcendence log generators
+Ships generated lines to a Logstash ``beats { port => 5044 }`` input the way
+filebeat would, in windowed, zlib-compressed batches acknowledged by the
+receiver; a bundled receiver stands in for Logstash to measure the output alone
+
+Run from Logs/:  python -m loggen.beats serve --port 5044
+                 python -m loggen.beats bench --workers 1,2,4
+"""
+
+import argparse
+import atexit
+import datetime
+import json
+import multiprocessing
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+from .pipeline import COMMON_FIELDS, LOG_ROOT, input_fields
+from .writer import PathLike, WriterStats
+
+DEFAULT_PORT = 5044
+# filebeat's output.logstash defaults
+DEFAULT_WINDOW = 2048
+DEFAULT_COMPRESSION = 3
+
+VERSION = b"2"
+FRAME_WINDOW = b"W"
+FRAME_JSON = b"J"
+FRAME_COMPRESSED = b"C"
+FRAME_ACK = b"A"
+
+_U32 = struct.Struct(">I")
+_JSON_HEADER = struct.Struct(">2sII")
+
+
+def encode_window(events: List[bytes], compression_level: int = DEFAULT_COMPRESSION) -> bytes:
+    """One window: the ``W`` frame and the events as ``J`` frames numbered from 1, compressed"""
+    frames = b"".join(_JSON_HEADER.pack(VERSION + FRAME_JSON, seq, len(event)) + event
+                      for seq, event in enumerate(events, 1))
+    header = VERSION + FRAME_WINDOW + _U32.pack(len(events))
+    if compression_level <= 0:
+        return header + frames
+    payload = zlib.compress(frames, compression_level)
+    return header + VERSION + FRAME_COMPRESSED + _U32.pack(len(payload)) + payload
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed by peer")
+        data += chunk
+    return bytes(data)
+
+
+@dataclass
+class BeatsStats:
+    """Counters for everything a Beats output has had acknowledged"""
+    events: int = 0
+    windows: int = 0
+    # Uncompressed event bytes, and what actually went over the wire
+    bytes: int = 0
+    wire_bytes: int = 0
+    failed_events: int = 0
+    retries: int = 0
+    # Summed send-to-final-ACK time, and time writers spent blocked on a full pipeline
+    ack_seconds: float = 0.0
+    stalled_seconds: float = 0.0
+
+    def __str__(self) -> str:
+        latency = 1000 * self.ack_seconds / self.windows if self.windows else 0.0
+        ratio = self.bytes / self.wire_bytes if self.wire_bytes else 0.0
+        return (f"{self.events} events in {self.windows} windows ({latency:.1f} ms to ACK), "
+                f"{self.wire_bytes} bytes on the wire ({ratio:.1f}x compression), "
+                f"{self.failed_events} failed, {self.retries} retries, {self.stalled_seconds:.2f}s stalled")
+
+
+class BeatsOutput:
+    """Drop-in replacement for a generator's ``BufferedLogWriter`` that talks lumberjack v2.
+
+    Every line becomes a filebeat-shaped event: the line as ``message``, the
+    file as ``log.file.path`` under LOG_ROOT, and the fields of the filebeat
+    input that harvests that file, so main.conf routes it as it would in the
+    stack. Events are grouped into windows of ``window_size``; each of the
+    ``workers`` connections sends one window at a time and waits for the ACK
+    of its last sequence number, resending the whole window on a new
+    connection if it fails (at-least-once, like filebeat).
+    """
+
+    def __init__(self, host: str = "localhost", port: int = DEFAULT_PORT, service: Optional[str] = None,
+                 base_dir: Optional[PathLike] = None, window_size: int = DEFAULT_WINDOW,
+                 compression_level: int = DEFAULT_COMPRESSION, workers: int = 1, flush_interval: float = 1.0,
+                 timeout: float = 30.0, max_retries: int = 3):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.host = host
+        self.port = port
+        self.service = service
+        self.base_dir = Path(base_dir) if base_dir is not None else None
+        self.window_size = window_size
+        self.compression_level = compression_level
+        self.workers = workers
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self._stats = BeatsStats()
+        # path -> (event prefix up to "message", event suffix after it)
+        self._templates: Dict[PathLike, Tuple[bytes, bytes]] = {}
+        self._second = -1
+        self._second_text = ""
+        self._window: List[bytes] = []
+        self._window_bytes = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        self._queue: "queue.Queue[Optional[Tuple[List[bytes], int]]]" = queue.Queue(maxsize=workers)
+        self._senders = [threading.Thread(target=self._send_worker, name=f"loggen-beats-{i}", daemon=True)
+                         for i in range(workers)]
+        for sender in self._senders:
+            sender.start()
+        atexit.register(self.close)
+        metrics.track_writer(self)
+
+    def _template(self, path: PathLike) -> Tuple[bytes, bytes]:
+        full_path = Path(path) if self.base_dir is None else self.base_dir / path
+        parts = full_path.as_posix().split("/")
+        # Find the filebeat input by the longest path suffix it matches, so output
+        # written outside LOG_ROOT is still routed as if it lived there; failing that,
+        # place the file directly under the service's own directory
+        relative = f"{self.service or 'loggen'}/{parts[-1]}"
+        candidates = ["/".join(parts[start:]) for start in range(1, len(parts))] + [relative]
+        for candidate in candidates:
+            fields = input_fields(candidate)
+            if fields is not None:
+                relative = candidate
+                break
+        else:
+            fields = dict(COMMON_FIELDS)
+            if self.service:
+                fields["service"] = self.service
+        tail = {"log": {"file": {"path": f"{LOG_ROOT}/{relative}"}}, "input": {"type": "log"},
+                "agent": {"type": "loggen", "name": self.service or "loggen"}, **fields}
+        suffix = "," + json.dumps(tail, separators=(",", ":"))[1:]
+        return b'{"@timestamp":"', suffix.encode()
+
+    def _timestamp(self) -> str:
+        now = time.time()
+        second = int(now)
+        if second != self._second:
+            self._second = second
+            self._second_text = datetime.datetime.utcfromtimestamp(second).strftime("%Y-%m-%dT%H:%M:%S")
+        return f"{self._second_text}.{int((now - second) * 1000):03d}Z"
+
+    def write(self, path: PathLike, line: str, level: Optional[str] = None):
+        """Queue one log line as a filebeat event read from ``path``"""
+        with self._lock:
+            if self._closed:
+                metrics.record_drop(self.service, "writer_closed")
+                raise ValueError("write to closed BeatsOutput")
+            metrics.record_event(self.service, path, level)
+            template = self._templates.get(path)
+            if template is None:
+                template = self._templates[path] = self._template(path)
+            prefix, suffix = template
+            event = b"".join((prefix, self._timestamp().encode(), b'","message":',
+                              json.dumps(line).encode("utf-8"), suffix))
+            self._window.append(event)
+            self._window_bytes += len(event)
+            if (len(self._window) >= self.window_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._hand_off_locked()
+
+    def _hand_off_locked(self):
+        if not self._window:
+            return
+        item = (self._window, self._window_bytes)
+        self._window = []
+        self._window_bytes = 0
+        self._last_flush = time.monotonic()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            started = time.perf_counter()
+            self._queue.put(item)
+            with self._stats_lock:
+                self._stats.stalled_seconds += time.perf_counter() - started
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _send_worker(self):
+        sock: Optional[socket.socket] = None
+        try:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+                    sock = self._send(sock, *item)
+                finally:
+                    self._queue.task_done()
+        finally:
+            if sock is not None:
+                sock.close()
+
+    def _send(self, sock: Optional[socket.socket], events: List[bytes], size: int) -> Optional[socket.socket]:
+        # zlib releases the GIL, so compressing here overlaps with generation
+        data = encode_window(events, self.compression_level)
+        retries = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                if sock is None:
+                    sock = self._connect()
+                sock.sendall(data)
+                self._await_ack(sock, len(events))
+                acked = True
+            except (OSError, ValueError) as e:
+                acked = False
+                error = e
+                if sock is not None:
+                    sock.close()
+                    sock = None
+            elapsed = time.perf_counter() - started
+            if acked or retries >= self.max_retries:
+                break
+            retries += 1
+            time.sleep(min(0.05 * 2 ** retries, 2.0))
+
+        with self._stats_lock:
+            self._stats.retries += retries
+            if acked:
+                self._stats.events += len(events)
+                self._stats.windows += 1
+                self._stats.bytes += size
+                self._stats.wire_bytes += len(data)
+                self._stats.ack_seconds += elapsed
+            else:
+                self._stats.failed_events += len(events)
+        if metrics.ENABLED:
+            metrics.WRITE_LATENCY.observe((self.service or "unknown", "beats"), elapsed)
+        if not acked:
+            metrics.record_drop(self.service, "beats_unacked", len(events))
+            print(f"Beats window of {len(events)} events to {self.host}:{self.port} failed: {error}")
+        return sock
+
+    @staticmethod
+    def _await_ack(sock: socket.socket, count: int):
+        # Logstash sends ACKs for partial progress as keep-alives; only the last one completes the window
+        while True:
+            header = _recv_exact(sock, 6)
+            if header[:2] != VERSION + FRAME_ACK:
+                raise ValueError(f"unexpected frame {header[:2]!r} while waiting for ACK")
+            if _U32.unpack_from(header, 2)[0] >= count:
+                return
+
+    def flush(self):
+        """Send the partial window and wait until every queued window is acknowledged"""
+        with self._lock:
+            self._hand_off_locked()
+        self._queue.join()
+
+    def close(self):
+        """Flush and stop the sender threads"""
+        with self._lock:
+            if self._closed:
+                return
+            self._hand_off_locked()
+            self._closed = True
+        for _ in self._senders:
+            self._queue.put(None)
+        for sender in self._senders:
+            sender.join(timeout=self.timeout)
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes in the window currently being filled"""
+        return self._window_bytes
+
+    def beats_stats(self) -> BeatsStats:
+        with self._stats_lock:
+            return BeatsStats(**vars(self._stats))
+
+    def total_stats(self) -> WriterStats:
+        """Acknowledged events, in the writer's counters"""
+        stats = self.beats_stats()
+        return WriterStats(stats.events, stats.bytes, stats.windows)
+
+    def report(self) -> str:
+        return (f"Beats output stats ({self.host}:{self.port}, {self.workers} workers):\n"
+                f"  {self.beats_stats()}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def parse_address(text: str) -> Tuple[str, int]:
+    """Split ``host[:port]``, defaulting to the Beats port"""
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host or "localhost", int(port) if port else DEFAULT_PORT
+
+
+def add_beats_arguments(parser):
+    """Add the shared ``--beats*`` options to an argparse parser"""
+    parser.add_argument("--beats", type=parse_address, metavar="HOST[:PORT]",
+                        help="Send events to a Logstash beats input instead of writing log files")
+    parser.add_argument("--beats-window", type=int, default=DEFAULT_WINDOW,
+                        help="Events per lumberjack window (filebeat's bulk_max_size)")
+    parser.add_argument("--beats-compression", type=int, default=DEFAULT_COMPRESSION,
+                        help="zlib level for each window, 0 to send uncompressed")
+    parser.add_argument("--beats-workers", type=int, default=1,
+                        help="Connections sending windows concurrently (filebeat's worker)")
+
+
+def build_beats_output(args, service: str, base_dir: Optional[PathLike] = None) -> Optional[BeatsOutput]:
+    """Beats output selected by the options from ``add_beats_arguments``"""
+    if getattr(args, "beats", None) is None:
+        return None
+    host, port = args.beats
+    return BeatsOutput(host, port, service, base_dir, args.beats_window, args.beats_compression,
+                       args.beats_workers)
+
+
+# --- receiver -------------------------------------------------------------------------------
+
+
+class _ReceiverStats:
+    def __init__(self):
+        self.connections = 0
+        self.windows = 0
+        self.events = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, int]:
+        with self.lock:
+            return {"connections": self.connections, "windows": self.windows,
+                    "events": self.events, "bytes": self.bytes}
+
+
+class _ReceiverHandler(socketserver.BaseRequestHandler):
+    """Decodes lumberjack v2 windows and ACKs them without doing anything with the events"""
+    stats: _ReceiverStats = None
+    decode = False
+
+    def handle(self):
+        with self.stats.lock:
+            self.stats.connections += 1
+        sock = self.request
+        try:
+            while True:
+                header = _recv_exact(sock, 6)
+                if header[:2] != VERSION + FRAME_WINDOW:
+                    raise ValueError(f"expected a window frame, got {header[:2]!r}")
+                expected = _U32.unpack_from(header, 2)[0]
+                last, size = 0, 0
+                while last < expected:
+                    frame = _recv_exact(sock, 2)
+                    if frame == VERSION + FRAME_COMPRESSED:
+                        length = _U32.unpack(_recv_exact(sock, 4))[0]
+                        frames = zlib.decompress(_recv_exact(sock, length))
+                    elif frame == VERSION + FRAME_JSON:
+                        seq, length = struct.unpack(">II", _recv_exact(sock, 8))
+                        frames = frame + _U32.pack(seq) + _U32.pack(length) + _recv_exact(sock, length)
+                    else:
+                        raise ValueError(f"unsupported frame {frame!r}")
+                    last, window_bytes = self._consume(frames)
+                    size += window_bytes
+                with self.stats.lock:
+                    self.stats.windows += 1
+                    self.stats.events += expected
+                    self.stats.bytes += size
+                sock.sendall(VERSION + FRAME_ACK + _U32.pack(last))
+        except (ConnectionError, ValueError, zlib.error):
+            pass
+
+    def _consume(self, frames: bytes) -> Tuple[int, int]:
+        offset, last, size = 0, 0, 0
+        while offset < len(frames):
+            kind, seq, length = _JSON_HEADER.unpack_from(frames, offset)
+            if kind != VERSION + FRAME_JSON:
+                raise ValueError(f"unsupported frame {kind!r}")
+            offset += _JSON_HEADER.size
+            if self.decode:
+                json.loads(frames[offset:offset + length])
+            offset += length
+            last, size = seq, size + length
+        return last, size
+
+
+class _Receiver(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_receiver(port: int = DEFAULT_PORT, addr: str = "127.0.0.1", decode: bool = False) -> _Receiver:
+    """Accept lumberjack v2 connections from a daemon thread"""
+    handler = type("ReceiverHandler", (_ReceiverHandler,), {"stats": _ReceiverStats(), "decode": decode})
+    server = _Receiver((addr, port), handler)
+    server.stats = handler.stats
+    threading.Thread(target=server.serve_forever, name="loggen-beats-receiver", daemon=True).start()
+    return server
+
+
+def _serve_receiver_process(port: int, decode: bool, ready):
+    server = start_receiver(port, decode=decode)
+    ready.send(server.server_address[1])
+    threading.Event().wait()
+
+
+# --- command line ---------------------------------------------------------------------------
+
+
+def _bench(args) -> int:
+    from .bench import capture_lines
+
+    host, port = args.beats or (None, None)
+    receiver = None
+    if host is None:
+        # A separate process, so decoding does not compete with the senders for the GIL
+        ready, sender = multiprocessing.Pipe(duplex=False)
+        receiver = multiprocessing.Process(target=_serve_receiver_process,
+                                           args=(0, args.decode, sender), daemon=True)
+        receiver.start()
+        host, port = "127.0.0.1", ready.recv()
+
+    service, lines = capture_lines(args.generator, args.count, args.seed)
+    print(f"Replaying {len(lines)} {service} lines to {host}:{port}, windows of {args.window}, "
+          f"compression level {args.compression}")
+    try:
+        for workers in args.workers:
+            output = BeatsOutput(host, port, service, window_size=args.window,
+                                 compression_level=args.compression, workers=workers,
+                                 flush_interval=float("inf"))
+            write = output.write
+            started = time.perf_counter()
+            for path, line, level in lines:
+                write(path, line, level)
+            output.close()
+            elapsed = time.perf_counter() - started
+            stats = output.beats_stats()
+            print(f"  workers {workers:3d}: {stats.events / elapsed:10.0f} events/s "
+                  f"{stats.wire_bytes / elapsed / 1e6:8.2f} MB/s wire   {stats}")
+    finally:
+        if receiver is not None:
+            receiver.terminate()
+    return 0
+
+
+def _serve(args) -> int:
+    server = start_receiver(args.port, args.addr, args.decode)
+    print(f"Beats receiver listening on {args.addr}:{server.server_address[1]}")
+    started, last = time.monotonic(), server.stats.to_dict()
+    try:
+        while True:
+            time.sleep(args.interval)
+            current = server.stats.to_dict()
+            elapsed = time.monotonic() - started
+            print(f"[{elapsed:7.0f}s] {(current['events'] - last['events']) / args.interval:10.0f} events/s "
+                  f"{(current['bytes'] - last['bytes']) / args.interval / 1e6:8.2f} MB/s   "
+                  f"total {current['events']} events in {current['windows']} windows "
+                  f"over {current['connections']} connections")
+            last = current
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lumberjack v2 (Beats) output load tests")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the local Beats receiver")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--addr", default="127.0.0.1")
+    serve.add_argument("--interval", type=float, default=5.0, help="Seconds between throughput lines")
+
+    bench = commands.add_parser("bench", help="Measure how fast the output can feed a Beats input")
+    bench.add_argument("--beats", type=parse_address, metavar="HOST[:PORT]",
+                       help="Receiver to load (default: a local receiver in a child process)")
+    bench.add_argument("--generator", default="chat-service", help="Bench case whose lines are replayed")
+    bench.add_argument("--count", type=int, default=100000, help="Units to generate and replay")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    bench.add_argument("--compression", type=int, default=DEFAULT_COMPRESSION)
+    bench.add_argument("--workers", type=lambda text: [int(n) for n in text.split(",")], default=[1, 2, 4],
+                       help="Comma-separated connection counts to sweep, e.g. 1,2,4")
+
+    for sub in (serve, bench):
+        sub.add_argument("--decode", action="store_true",
+                         help="Receiver parses every event's JSON, like Logstash's codec would")
+
+    args = parser.parse_args(argv)
+    return _serve(args) if args.command == "serve" else _bench(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
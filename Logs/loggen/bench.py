@@ -0,0 +1,284 @@
+"""
+Benchmark suite for the ft-transcendence log generators
+Measures lines/sec and bytes/sec per generator, splits the time into
+generate / serialize / write, and compares runs against a saved JSON baseline
+
+Run from Logs/:  python -m loggen.bench --save bench-baseline.json
+                 python -m loggen.bench --compare bench-baseline.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Tuple
+
+LOGS_DIR = Path(__file__).resolve().parent.parent
+
+# Relative slowdown (percent) that counts as a regression
+DEFAULT_THRESHOLD = 10.0
+
+
+def load_script(relative_path: str) -> ModuleType:
+    """Import a generator script by path (their hyphenated names are not importable)"""
+    path = LOGS_DIR / relative_path
+    name = "bench_" + path.stem.replace("-", "_").lower()
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _writer_hooks(generator) -> List[Tuple[object, str]]:
+    return [(generator.writer, "write"), (generator.writer, "write_many")]
+
+
+@dataclass
+class BenchCase:
+    """One generator class driven through its batch method"""
+    name: str
+    script: str
+    class_name: str
+    method: str
+    # Batch units per requested count (user-service writes three lines per unit)
+    scale: float = 1.0
+    write_hooks: Callable[[object], List[Tuple[object, str]]] = _writer_hooks
+
+
+CASES = [
+    BenchCase("chat-service", "chat-service/Gen-Logs-chat-service.py", "ChatLogGenerator", "generate_batch"),
+    BenchCase("chat-messages", "chat-messages/Gen-Logs-chat-messages.py", "ChatLogGenerator",
+              "generate_batch_logs"),
+    BenchCase("user-service", "user-service/GenLogs-user-service.py", "UserServiceLogGenerator",
+              "generate_sample_logs", scale=1 / 3),
+    BenchCase("file-service", "user-service/Gen-logs-file-service.py", "FileServiceLogger",
+              "generate_batch_logs"),
+    BenchCase("file-service-columnar", "user-service/Gen-logs-file-service.py", "FileServiceLogger",
+              "generate_columnar_logs"),
+    BenchCase("game-service", "game-service/Gen-Logs-game-service.py", "GameServiceLogGenerator",
+              "generate_batch_logs"),
+    BenchCase("tournament-service", "tournament-service/Gen-Logs-tournament-service.py",
+              "TournamentServiceLogGenerator", "generate_batch_logs"),
+]
+
+
+@dataclass
+class BenchResult:
+    """Throughput and stage breakdown of one benchmark case"""
+    name: str
+    lines: int
+    bytes: int
+    seconds: float
+    generate: float
+    serialize: float
+    write: float
+    runs: int = 1
+
+    @property
+    def lines_per_sec(self) -> float:
+        return self.lines / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["lines_per_sec"] = self.lines_per_sec
+        data["bytes_per_sec"] = self.bytes_per_sec
+        return data
+
+    def __str__(self) -> str:
+        total = self.seconds or 1.0
+        return (f"{self.name:14s} {self.lines_per_sec:10.0f} lines/s {self.bytes_per_sec / 1e6:8.2f} MB/s   "
+                f"generate {100 * self.generate / total:4.1f}%  serialize {100 * self.serialize / total:4.1f}%  "
+                f"write {100 * self.write / total:4.1f}%")
+
+
+@dataclass
+class _StageTimer:
+    seconds: float = 0.0
+    calls: int = 0
+
+    def wrap(self, func: Callable) -> Callable:
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds += clock() - started
+                self.calls += 1
+        return timed
+
+
+class _TimedEncoder:
+    """Stand-in for a generator module's ``ENCODER`` that times ``encode``"""
+
+    def __init__(self, encoder, timer: _StageTimer):
+        self._encoder = encoder
+        self.encode = timer.wrap(encoder.encode)
+
+    def __getattr__(self, name):
+        return getattr(self._encoder, name)
+
+
+def _count_output(log_dir: Path) -> Tuple[int, int]:
+    lines = size = 0
+    for path in log_dir.rglob("*.log"):
+        data = path.read_bytes()
+        lines += data.count(b"\n")
+        size += len(data)
+    return lines, size
+
+
+def run_case(case: BenchCase, count: int, seed: int = 0) -> BenchResult:
+    """Run one batch of ``case`` in a scratch directory and time its stages"""
+    module = load_script(case.script)
+    scratch = Path(tempfile.mkdtemp(prefix=f"bench-{case.name}-"))
+    serialize, write = _StageTimer(), _StageTimer()
+    original_encoder = module.ENCODER
+    try:
+        random.seed(seed)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            generator = getattr(module, case.class_name)(str(scratch))
+            for owner, attribute in case.write_hooks(generator):
+                setattr(owner, attribute, write.wrap(getattr(owner, attribute)))
+            module.ENCODER = _TimedEncoder(original_encoder, serialize)
+
+            started = time.perf_counter()
+            getattr(generator, case.method)(max(1, int(count * case.scale)))
+            writer = getattr(generator, "writer", None)
+            if writer is not None:
+                write.wrap(writer.close)()
+            elapsed = time.perf_counter() - started
+
+        lines, size = _count_output(scratch)
+    finally:
+        module.ENCODER = original_encoder
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    # write() hooks run inside the batch loop, so generate is what is left over
+    generate = max(0.0, elapsed - serialize.seconds - write.seconds)
+    return BenchResult(case.name, lines, size, elapsed, generate, serialize.seconds, write.seconds)
+
+
+def capture_lines(case_name: str, count: int, seed: int = 0) -> Tuple[str, List[Tuple[str, str, Optional[str]]]]:
+    """Generate ``count`` units of a case once and keep its ``(path, line, level)`` writes in memory"""
+    case = next((c for c in CASES if c.name == case_name), None)
+    if case is None:
+        raise ValueError(f"unknown generator {case_name}")
+    module = load_script(case.script)
+    scratch = Path(tempfile.mkdtemp(prefix=f"capture-{case.name}-"))
+    lines: List[Tuple[str, str, Optional[str]]] = []
+    try:
+        random.seed(seed)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            generator = getattr(module, case.class_name)(str(scratch))
+            writer = getattr(generator, "writer", None)
+            if writer is None:
+                raise ValueError(f"{case_name} does not write through a BufferedLogWriter")
+            writer.write = lambda path, line, level=None: lines.append((str(path), line, level))
+            writer.write_many = lambda path, block, level=None: lines.extend(
+                (str(path), line, level) for line in block)
+            getattr(generator, case.method)(max(1, int(count * case.scale)))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return case.name, lines
+
+
+def run_suite(cases: List[BenchCase], count: int, repeat: int = 3, seed: int = 0) -> List[BenchResult]:
+    """Best-of-``repeat`` result for every case"""
+    results = []
+    for case in cases:
+        best: Optional[BenchResult] = None
+        for _ in range(repeat):
+            result = run_case(case, count, seed)
+            if best is None or result.lines_per_sec > best.lines_per_sec:
+                best = result
+        best.runs = repeat
+        print(best)
+        results.append(best)
+    return results
+
+
+def save_baseline(path: Path, results: List[BenchResult], count: int):
+    data = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "count": count,
+        "results": {result.name: result.to_dict() for result in results},
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n")
+    print(f"Baseline written to {path}")
+
+
+def compare(path: Path, results: List[BenchResult], threshold: float) -> List[str]:
+    """Names of the cases whose lines/sec dropped more than ``threshold`` percent"""
+    baseline = json.loads(path.read_text())["results"]
+    regressions = []
+    print(f"\nAgainst {path} (regression threshold {threshold:.0f}%):")
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            print(f"  {result.name:14s} no baseline")
+            continue
+        change = 100.0 * (result.lines_per_sec / previous["lines_per_sec"] - 1.0)
+        flag = "REGRESSION" if change < -threshold else "ok"
+        if flag != "ok":
+            regressions.append(result.name)
+        print(f"  {result.name:14s} {previous['lines_per_sec']:10.0f} -> {result.lines_per_sec:10.0f} lines/s "
+              f"({change:+6.1f}%)  {flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ft-transcendence log generators")
+    parser.add_argument("--count", type=int, default=20000, help="Batch size per generator")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per generator; the best one counts")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed for every run")
+    parser.add_argument("--only", help="Comma-separated case names: " + ", ".join(c.name for c in CASES))
+    parser.add_argument("--save", type=Path, help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown in percent that fails --compare")
+    args = parser.parse_args(argv)
+
+    cases = CASES
+    if args.only:
+        wanted = set(args.only.split(","))
+        cases = [case for case in CASES if case.name in wanted]
+        if not cases:
+            parser.error(f"no case matches --only {args.only}")
+
+    print(f"Benchmarking {len(cases)} generators, {args.count} units each, best of {args.repeat}")
+    results = run_suite(cases, args.count, args.repeat, args.seed)
+
+    if args.save:
+        save_baseline(args.save, results, args.count)
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,492 @@
+"""
+Elasticsearch ``_bulk`` sink for the ft-transcendence log generators
+Packs generated lines into NDJSON bulk bodies and ships them over pooled
+keep-alive HTTP connections, bypassing filebeat and Logstash; a bundled stub
+server accepts the requests so the sink's own ceiling can be measured
+
+Run from Logs/:  python -m loggen.bulk serve --port 9200
+                 python -m loggen.bulk bench --in-flight 1,2,4,8
+"""
+
+import argparse
+import atexit
+import datetime
+import http.client
+import json
+import multiprocessing
+import queue
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import metrics
+from .pipeline import index_suffix, input_fields
+from .rotation import parse_size
+from .writer import PathLike, WriterStats
+
+DEFAULT_URL = "http://localhost:9200"
+# Same naming as the Logstash output, so Kibana index patterns still match; {service} is
+# the name part main.conf routes the file to (chat, game, user-service, ...)
+DEFAULT_INDEX = "ft-transcendence-{service}-%Y.%m.%d"
+DEFAULT_BULK_BYTES = 5 << 20
+
+# Status codes worth retrying: rejected by a full write queue, or the node going away
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# The hour a line is indexed under comes from its own timestamp, as main.conf's date filter does
+_HOUR_RE = re.compile(r'"timestamp":\s*"(\d{4}-\d\d-\d\dT\d\d)')
+# Cached index actions before the cache is dropped; a long backfill adds one per file and hour
+_MAX_ACTIONS = 4096
+
+
+@dataclass
+class BulkStats:
+    """Counters for everything a bulk sink has sent"""
+    docs: int = 0
+    bytes: int = 0
+    requests: int = 0
+    failed_docs: int = 0
+    retries: int = 0
+    # Summed request round trips, and time writers spent blocked on a full pipeline
+    request_seconds: float = 0.0
+    stalled_seconds: float = 0.0
+
+    def __str__(self) -> str:
+        latency = 1000 * self.request_seconds / self.requests if self.requests else 0.0
+        return (f"{self.docs} docs, {self.bytes} bytes in {self.requests} requests "
+                f"({latency:.1f} ms avg), {self.failed_docs} failed, {self.retries} retries, "
+                f"{self.stalled_seconds:.2f}s stalled")
+
+
+class _Connection:
+    """One keep-alive HTTP connection, reopened after the server drops it"""
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 9200)
+        self.https = parts.scheme == "https"
+        self.path = (parts.path.rstrip("/") or "") + "/_bulk"
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def post(self, body: bytes) -> Tuple[int, bytes]:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._conn = cls(self.host, self.port, timeout=self.timeout)
+        try:
+            self._conn.request("POST", self.path, body, {"Content-Type": "application/x-ndjson"})
+            response = self._conn.getresponse()
+            # The body must be read in full before the connection can be reused
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class BulkSink:
+    """Drop-in replacement for a generator's ``BufferedLogWriter`` that indexes into Elasticsearch.
+
+    Each ``write`` appends an ``index`` action and the line itself to the
+    current body; a body is handed to the sender pool once it reaches
+    ``max_bytes`` or ``max_docs`` (or ``flush_interval`` has passed). At most
+    ``in_flight`` bodies are on the wire and as many again are queued, after
+    which ``write`` blocks, so a slow cluster throttles the generator instead
+    of growing memory.
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, service: Optional[str] = None, index: str = DEFAULT_INDEX,
+                 max_bytes: int = DEFAULT_BULK_BYTES, max_docs: Optional[int] = None, in_flight: int = 2,
+                 flush_interval: float = 1.0, timeout: float = 30.0, max_retries: int = 3):
+        if in_flight < 1:
+            raise ValueError("in_flight must be at least 1")
+        self.url = url
+        self.service = service
+        self.index = index
+        self.max_bytes = max_bytes
+        self.max_docs = max_docs
+        self.in_flight = in_flight
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self._stats = BulkStats()
+        self._actions: Dict[Tuple[PathLike, str], bytes] = {}
+        self._suffixes: Dict[PathLike, str] = {}
+        self._body: List[bytes] = []
+        self._body_bytes = 0
+        self._body_docs = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        self._queue: "queue.Queue[Optional[Tuple[bytes, int]]]" = queue.Queue(maxsize=in_flight)
+        self._senders = [threading.Thread(target=self._send_worker, name=f"loggen-bulk-{i}", daemon=True)
+                         for i in range(in_flight)]
+        for sender in self._senders:
+            sender.start()
+        atexit.register(self.close)
+        metrics.track_writer(self)
+
+    def _suffix(self, path: PathLike) -> str:
+        """Index name part main.conf gives ``path`` once it sits under LOG_ROOT/<service>/"""
+        suffix = self._suffixes.get(path)
+        if suffix is None:
+            service = self.service or "logs"
+            parts = Path(path).parts
+            if service in parts:
+                relative = parts[len(parts) - parts[::-1].index(service):]
+            elif Path(path).is_absolute():
+                relative = parts[-1:]
+            else:
+                relative = parts
+            fields = input_fields("/".join((service,) + tuple(relative))) or {}
+            suffix = self._suffixes[path] = index_suffix(fields.get("logtype"), service)
+        return suffix
+
+    def _action(self, path: PathLike, line: str) -> bytes:
+        match = _HOUR_RE.search(line)
+        hour = match.group(1) if match else datetime.datetime.utcnow().strftime("%Y-%m-%dT%H")
+        action = self._actions.get((path, hour))
+        if action is None:
+            if len(self._actions) >= _MAX_ACTIONS:
+                self._actions.clear()
+            name = datetime.datetime.strptime(hour, "%Y-%m-%dT%H").strftime(
+                self.index.format(service=self._suffix(path), file=Path(path).stem))
+            action = self._actions[path, hour] = (json.dumps({"index": {"_index": name}}) + "\n").encode()
+        return action
+
+    def write(self, path: PathLike, line: str, level: Optional[str] = None):
+        """Queue one log line (a JSON document) for the index derived from ``path``"""
+        data = line.encode("utf-8") + b"\n"
+        with self._lock:
+            if self._closed:
+                metrics.record_drop(self.service, "writer_closed")
+                raise ValueError("write to closed BulkSink")
+            metrics.record_event(self.service, path, level)
+            action = self._action(path, line)
+            self._body.append(action)
+            self._body.append(data)
+            self._body_bytes += len(action) + len(data)
+            self._body_docs += 1
+            if (self._body_bytes >= self.max_bytes
+                    or (self.max_docs is not None and self._body_docs >= self.max_docs)
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._hand_off_locked()
+
+    def _hand_off_locked(self):
+        if not self._body:
+            return
+        body, docs = b"".join(self._body), self._body_docs
+        self._body = []
+        self._body_bytes = 0
+        self._body_docs = 0
+        self._last_flush = time.monotonic()
+        try:
+            self._queue.put_nowait((body, docs))
+        except queue.Full:
+            started = time.perf_counter()
+            self._queue.put((body, docs))
+            with self._stats_lock:
+                self._stats.stalled_seconds += time.perf_counter() - started
+
+    def _send_worker(self):
+        connection = _Connection(self.url, self.timeout)
+        try:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+                    self._send(connection, *item)
+                finally:
+                    self._queue.task_done()
+        finally:
+            connection.close()
+
+    def _send(self, connection: _Connection, body: bytes, docs: int):
+        retries = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                status, payload = connection.post(body)
+            except (OSError, http.client.HTTPException) as e:
+                status, payload = None, str(e).encode()
+            elapsed = time.perf_counter() - started
+            if status is not None and status not in RETRY_STATUSES:
+                break
+            if retries >= self.max_retries:
+                break
+            retries += 1
+            time.sleep(min(0.05 * 2 ** retries, 2.0))
+
+        failed = docs if status != 200 else self._failed_items(payload)
+        with self._stats_lock:
+            self._stats.requests += 1
+            self._stats.retries += retries
+            self._stats.request_seconds += elapsed
+            self._stats.docs += docs - failed
+            self._stats.bytes += len(body)
+            self._stats.failed_docs += failed
+        if metrics.ENABLED:
+            metrics.WRITE_LATENCY.observe((self.service or "unknown", "_bulk"), elapsed)
+        if failed:
+            metrics.record_drop(self.service, "bulk_rejected", failed)
+            if status != 200:
+                print(f"Bulk request failed ({status or 'connection error'}): {payload[:200]!r}")
+
+    @staticmethod
+    def _failed_items(payload: bytes) -> int:
+        # Only pay for parsing the items when Elasticsearch says some failed
+        if b'"errors":true' not in payload[:64]:
+            return 0
+        items = json.loads(payload).get("items", [])
+        return sum(1 for item in items if next(iter(item.values()), {}).get("error"))
+
+    def flush(self):
+        """Send the partial body and wait until every queued request has completed"""
+        with self._lock:
+            self._hand_off_locked()
+        self._queue.join()
+
+    def close(self):
+        """Flush and stop the sender threads"""
+        with self._lock:
+            if self._closed:
+                return
+            self._hand_off_locked()
+            self._closed = True
+        for _ in self._senders:
+            self._queue.put(None)
+        for sender in self._senders:
+            sender.join(timeout=self.timeout)
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes in the body currently being packed"""
+        return self._body_bytes
+
+    def bulk_stats(self) -> BulkStats:
+        with self._stats_lock:
+            return BulkStats(**vars(self._stats))
+
+    def total_stats(self) -> WriterStats:
+        """Acknowledged documents, in the writer's counters"""
+        stats = self.bulk_stats()
+        return WriterStats(stats.docs, stats.bytes, stats.requests)
+
+    def report(self) -> str:
+        return f"Bulk sink stats ({self.url}, {self.in_flight} in flight):\n  {self.bulk_stats()}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def add_bulk_arguments(parser):
+    """Add the shared ``--bulk-*`` options to an argparse parser"""
+    parser.add_argument("--bulk-url",
+                        help="Index straight into Elasticsearch at this URL instead of writing log files")
+    parser.add_argument("--bulk-index", default=DEFAULT_INDEX,
+                        help="Index name; {service} (the Logstash route, e.g. chat or game), {file} and "
+                             "strftime codes of each line's timestamp are expanded")
+    parser.add_argument("--bulk-size", type=parse_size, default=DEFAULT_BULK_BYTES,
+                        help="Send a _bulk request once its body reaches this size, e.g. 5M")
+    parser.add_argument("--bulk-docs", type=int, help="Also cap the documents per _bulk request")
+    parser.add_argument("--in-flight", type=int, default=2,
+                        help="Concurrent _bulk requests (one keep-alive connection each)")
+
+
+def build_bulk_sink(args, service: str) -> Optional[BulkSink]:
+    """Bulk sink selected by the options from ``add_bulk_arguments``"""
+    if getattr(args, "bulk_url", None) is None:
+        return None
+    return BulkSink(args.bulk_url, service, args.bulk_index, args.bulk_size, args.bulk_docs, args.in_flight)
+
+
+# --- stub server ---------------------------------------------------------------------------
+
+
+class _StubStats:
+    def __init__(self):
+        self.requests = 0
+        self.docs = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "docs": self.docs, "bytes": self.bytes, "rejected": self.rejected}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Accepts ``_bulk`` bodies and acknowledges them without indexing anything"""
+    protocol_version = "HTTP/1.1"
+    stats: _StubStats = None
+    reject_every = 0
+    with_items = False
+
+    def _reply(self, status: int, payload: Dict):
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/_stats":
+            self._reply(200, self.stats.to_dict())
+        else:
+            self._reply(200, {"name": "loggen-stub", "cluster_name": "loggen",
+                              "version": {"number": "8.8.0"}, "tagline": "You Know, for Search"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if not self.path.split("?")[0].endswith("/_bulk"):
+            self._reply(404, {"error": f"no handler for {self.path}"})
+            return
+        docs = body.count(b"\n") // 2
+        with self.stats.lock:
+            self.stats.requests += 1
+            rejected = self.reject_every and self.stats.requests % self.reject_every == 0
+            if rejected:
+                self.stats.rejected += 1
+            else:
+                self.stats.docs += docs
+                self.stats.bytes += length
+        if rejected:
+            self._reply(429, {"error": {"type": "es_rejected_execution_exception"}, "status": 429})
+            return
+        payload = {"took": 0, "errors": False}
+        if self.with_items:
+            item = {"index": {"result": "created", "status": 201}}
+            payload["items"] = [item] * docs
+        self._reply(200, payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port: int = 9200, addr: str = "127.0.0.1", reject_every: int = 0,
+                      with_items: bool = False) -> ThreadingHTTPServer:
+    """Serve a fake ``_bulk`` endpoint from a daemon thread; ``GET /_stats`` returns its counters"""
+    handler = type("StubHandler", (_StubHandler,),
+                   {"stats": _StubStats(), "reject_every": reject_every, "with_items": with_items})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    server.stats = handler.stats
+    threading.Thread(target=server.serve_forever, name="loggen-bulk-stub", daemon=True).start()
+    return server
+
+
+def _serve_stub_process(port: int, reject_every: int, with_items: bool, ready):
+    server = start_stub_server(port, reject_every=reject_every, with_items=with_items)
+    ready.send(server.server_address[1])
+    threading.Event().wait()
+
+
+# --- command line ---------------------------------------------------------------------------
+
+
+def _bench(args) -> int:
+    from .bench import capture_lines
+
+    url = args.url
+    stub = None
+    if url is None:
+        # A separate process, so the stub does not compete with the senders for the GIL
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        stub = multiprocessing.Process(target=_serve_stub_process,
+                                       args=(0, args.reject_every, args.items, sender), daemon=True)
+        stub.start()
+        url = f"http://127.0.0.1:{receiver.recv()}"
+
+    service, lines = capture_lines(args.generator, args.count, args.seed)
+    print(f"Replaying {len(lines)} {service} lines into {url}/_bulk, "
+          f"{args.bulk_size} byte bodies" + (f" / {args.bulk_docs} docs" if args.bulk_docs else ""))
+    try:
+        for in_flight in args.in_flight:
+            sink = BulkSink(url, service, max_bytes=args.bulk_size, max_docs=args.bulk_docs,
+                            in_flight=in_flight, flush_interval=float("inf"))
+            write = sink.write
+            started = time.perf_counter()
+            for path, line, level in lines:
+                write(path, line, level)
+            sink.close()
+            elapsed = time.perf_counter() - started
+            stats = sink.bulk_stats()
+            print(f"  in-flight {in_flight:3d}: {stats.docs / elapsed:10.0f} docs/s "
+                  f"{stats.bytes / elapsed / 1e6:8.2f} MB/s   {stats}")
+    finally:
+        if stub is not None:
+            stub.terminate()
+    return 0
+
+
+def _serve(args) -> int:
+    server = start_stub_server(args.port, args.addr, args.reject_every, args.items)
+    print(f"Bulk stub listening on http://{args.addr}:{server.server_address[1]}/_bulk")
+    started, last = time.monotonic(), server.stats.to_dict()
+    try:
+        while True:
+            time.sleep(args.interval)
+            current = server.stats.to_dict()
+            elapsed = time.monotonic() - started
+            print(f"[{elapsed:7.0f}s] {(current['docs'] - last['docs']) / args.interval:10.0f} docs/s "
+                  f"{(current['bytes'] - last['bytes']) / args.interval / 1e6:8.2f} MB/s   "
+                  f"total {current['docs']} docs in {current['requests']} requests, "
+                  f"{current['rejected']} rejected")
+            last = current
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Elasticsearch _bulk sink load tests")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the local _bulk stub server")
+    serve.add_argument("--port", type=int, default=9200)
+    serve.add_argument("--addr", default="127.0.0.1")
+    serve.add_argument("--interval", type=float, default=5.0, help="Seconds between throughput lines")
+
+    bench = commands.add_parser("bench", help="Measure how fast the sink can feed a _bulk endpoint")
+    bench.add_argument("--url", help="Endpoint to load (default: a stub server in a child process)")
+    bench.add_argument("--generator", default="chat-service", help="Bench case whose lines are replayed")
+    bench.add_argument("--count", type=int, default=100000, help="Units to generate and replay")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--bulk-size", type=parse_size, default=DEFAULT_BULK_BYTES)
+    bench.add_argument("--bulk-docs", type=int)
+    bench.add_argument("--in-flight", type=lambda text: [int(n) for n in text.split(",")], default=[1, 2, 4],
+                       help="Comma-separated in-flight request counts to sweep, e.g. 1,2,4,8")
+
+    for sub in (serve, bench):
+        sub.add_argument("--reject-every", type=int, default=0,
+                         help="Stub answers every Nth request with 429 to exercise retries")
+        sub.add_argument("--items", action="store_true",
+                         help="Stub returns a per-document items array like Elasticsearch does")
+
+    args = parser.parse_args(argv)
+    return _serve(args) if args.command == "serve" else _bench(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Wall and simulated clocks for the ft-transcendence log generators
+A simulated clock stamps events with synthetic times drawn from a diurnal
+traffic profile and never sleeps, so days of history generate at CPU speed
+"""
+
+import datetime
+import random
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from . import metrics
+from .scheduler import ARRIVALS, RateScheduler, SchedulerStats
+
+# Relative traffic per hour of day (local time); evenings peak, early mornings are quiet
+DIURNAL_WEIGHTS = [
+    0.60, 0.40, 0.30, 0.20, 0.15, 0.15, 0.20, 0.30,
+    0.45, 0.55, 0.60, 0.65, 0.75, 0.75, 0.70, 0.70,
+    0.80, 0.90, 1.00, 1.15, 1.30, 1.30, 1.10, 0.85,
+]
+
+PROFILES = {
+    "diurnal": DIURNAL_WEIGHTS,
+    "flat": [1.0] * 24,
+}
+
+
+class DiurnalProfile:
+    """Piecewise-constant hourly traffic multipliers, normalised to a daily mean of 1"""
+
+    def __init__(self, weights: List[float], weekend_factor: float = 1.0):
+        if len(weights) != 24:
+            raise ValueError(f"a diurnal profile needs 24 hourly weights, got {len(weights)}")
+        mean = sum(weights) / 24
+        self.weights = [w / mean for w in weights]
+        self.weekend_factor = weekend_factor
+
+    @classmethod
+    def parse(cls, text: str, weekend_factor: float = 1.0) -> "DiurnalProfile":
+        """Build a profile from a name in PROFILES or 24 comma-separated weights"""
+        if text in PROFILES:
+            return cls(PROFILES[text], weekend_factor)
+        return cls([float(w) for w in text.split(",")], weekend_factor)
+
+    def multiplier(self, when: datetime.datetime) -> float:
+        factor = self.weights[when.hour]
+        if when.weekday() >= 5:
+            factor *= self.weekend_factor
+        return factor
+
+
+class WallClock:
+    """Real time; the default for every generator"""
+    simulated = False
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def utcnow(self) -> datetime.datetime:
+        return datetime.datetime.utcnow()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """Virtual time running from ``start`` to ``end``.
+
+    The clock only moves when a ``SimulatedScheduler`` advances it to the
+    next arrival, so ``now()`` is the synthetic timestamp of the event being
+    generated. ``now()`` and ``utcnow()`` return the same virtual instant.
+    """
+    simulated = True
+
+    def __init__(self, start: datetime.datetime, end: datetime.datetime,
+                 profile: Optional[DiurnalProfile] = None):
+        if end <= start:
+            raise ValueError("simulated clock end must be after start")
+        self.start = start
+        self.end = end
+        self.profile = profile or DiurnalProfile(DIURNAL_WEIGHTS)
+        self.current = start
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime.datetime:
+        return self.current
+
+    def utcnow(self) -> datetime.datetime:
+        return self.current
+
+    def sleep(self, seconds: float):
+        """Virtual sleep: move time forward without blocking"""
+        with self._lock:
+            self.current = min(self.end, self.current + datetime.timedelta(seconds=seconds))
+
+    @property
+    def span(self) -> float:
+        return (self.end - self.start).total_seconds()
+
+    def scheduler(self, rate: float, arrivals: str = "poisson", name: str = "scheduler",
+                  seed: Optional[int] = None) -> "SimulatedScheduler":
+        return SimulatedScheduler(self, rate, arrivals, name, seed)
+
+
+class SimulatedScheduler:
+    """Advances a SimulatedClock through arrivals of a profile-modulated process.
+
+    ``rate`` is the daily-average events per simulated second; the instantaneous
+    rate is ``rate`` times the profile multiplier for the current hour.
+    Mirrors the RateScheduler interface (iterate, stop, stats, report).
+    """
+
+    def __init__(self, clock: SimulatedClock, rate: float, arrivals: str = "poisson",
+                 name: str = "scheduler", seed: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if arrivals not in ARRIVALS:
+            raise ValueError(f"arrivals must be one of {ARRIVALS}, got '{arrivals}'")
+        self.clock = clock
+        self.rate = rate
+        self.arrivals = arrivals
+        self.name = name
+        self.rng = random.Random(seed)
+        self.emitted = 0
+        # Virtual time never falls behind; kept for the metrics gauge
+        self.lag = 0.0
+        self._offset = (clock.current - clock.start).total_seconds()
+        self._wall_start: Optional[float] = None
+        self._wall_end: Optional[float] = None
+        self._stopped = False
+        metrics.track_scheduler(self)
+
+    def _advance(self) -> bool:
+        """Move the clock to the next arrival; False once past the end"""
+        clock = self.clock
+        span = clock.span
+        need = self.rng.expovariate(1.0) if self.arrivals == "poisson" else 1.0
+        offset = self._offset
+
+        # Integrate the piecewise-constant hourly rate until ``need`` is used up
+        while offset < span:
+            when = clock.start + datetime.timedelta(seconds=offset)
+            lam = self.rate * clock.profile.multiplier(when)
+            hour_left = 3600.0 - (when.minute * 60 + when.second + when.microsecond / 1e6)
+            if lam > 0:
+                if need <= lam * hour_left:
+                    offset += need / lam
+                    break
+                need -= lam * hour_left
+            offset += hour_left
+        self._offset = offset
+
+        if offset >= span:
+            return False
+        clock.current = clock.start + datetime.timedelta(seconds=offset)
+        return True
+
+    def wait(self) -> bool:
+        if self._wall_start is None:
+            self._wall_start = time.monotonic()
+        if self._stopped or not self._advance():
+            if self._wall_end is None:
+                self._wall_end = time.monotonic()
+            return False
+        self.emitted += 1
+        return True
+
+    def __iter__(self) -> Iterator[int]:
+        while self.wait():
+            yield self.emitted - 1
+
+    def stop(self):
+        self._stopped = True
+
+    def wall_elapsed(self) -> float:
+        if self._wall_start is None:
+            return 0.0
+        end = self._wall_end if self._wall_end is not None else time.monotonic()
+        return end - self._wall_start
+
+    def stats(self) -> SchedulerStats:
+        """Target vs achieved in simulated time (max lag is always zero)"""
+        simulated = min(self._offset, self.clock.span)
+        return SchedulerStats(self.name, self.rate, self.emitted, simulated, 0.0)
+
+    def report(self) -> str:
+        wall = self.wall_elapsed()
+        simulated = min(self._offset, self.clock.span)
+        speedup = simulated / wall if wall > 0 else 0.0
+        return (f"{self.name}: simulated {self.clock.start.isoformat()} -> {self.clock.current.isoformat()} "
+                f"({simulated / 3600:.1f}h), {self.emitted} events in {wall:.1f}s wall "
+                f"({self.emitted / wall if wall > 0 else 0:.0f} events/sec, {speedup:.0f}x real time)")
+
+
+def make_scheduler(rate: float, arrivals: str = "poisson", duration: Optional[float] = None,
+                   name: str = "scheduler", clock=None):
+    """A RateScheduler on the wall clock, or a SimulatedScheduler on a simulated one"""
+    if clock is not None and clock.simulated:
+        return clock.scheduler(rate, arrivals, name)
+    return RateScheduler(rate, arrivals, duration, name)
+
+
+def add_clock_arguments(parser):
+    """Add the shared ``--start`` / ``--end`` / ``--profile`` options to an argparse parser"""
+    parser.add_argument("--start", type=datetime.datetime.fromisoformat,
+                        help="Simulate from this time (ISO 8601) instead of using the wall clock")
+    parser.add_argument("--end", type=datetime.datetime.fromisoformat,
+                        help="End of the simulated period (default: now)")
+    parser.add_argument("--profile", default="diurnal",
+                        help="Traffic profile: diurnal, flat or 24 comma-separated hourly weights")
+    parser.add_argument("--weekend-factor", type=float, default=1.0,
+                        help="Extra traffic multiplier on Saturdays and Sundays")
+
+
+def build_clock(args):
+    """Clock selected by the options from ``add_clock_arguments``"""
+    if args.start is None:
+        if args.end is not None:
+            raise SystemExit("--end requires --start")
+        return WallClock()
+    start = _naive(args.start)
+    end = _naive(args.end) if args.end is not None else datetime.datetime.now()
+    profile = DiurnalProfile.parse(args.profile, args.weekend_factor)
+    return SimulatedClock(start, end, profile)
+
+
+def _naive(when: datetime.datetime) -> datetime.datetime:
+    """Generators append their own 'Z', so keep simulated times zone-naive (UTC if given)"""
+    if when.tzinfo is None:
+        return when
+    return when.astimezone(datetime.timezone.utc).replace(tzinfo=None)
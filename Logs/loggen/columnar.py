@@ -0,0 +1,107 @@
+"""
+Columnar draws for bulk fixture generation in the ft-transcendence log generators
+Every field of a chunk of records is drawn as one column: the random bits
+for a whole column come from a single randbytes() call and are scaled in
+one list comprehension, so a row costs a few C-level steps per field
+instead of a random.randint() call each
+"""
+
+import bisect
+import datetime
+import random
+from array import array
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import List, Optional, Sequence
+
+# Rows drawn and rendered together; a chunk of file-service lines is a few MB
+DEFAULT_CHUNK = 8192
+
+# Vocabularies up to this size are JSON-quoted once instead of per drawn value
+QUOTE_CACHE_LIMIT = 4096
+
+# Ranges up to this size are drawn from 32-bit words (bias below 2**-16)
+SMALL_SPAN = 1 << 16
+
+_TWO_POW_53 = float(1 << 53)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def random_words(n: int, rng=random) -> array:
+    """``n`` independent 64-bit random integers"""
+    words = array("Q")
+    words.frombytes(rng.randbytes(8 * n))
+    return words
+
+
+def randints(n: int, low: int, high: int, rng=random) -> List[int]:
+    """``n`` integers uniform on ``low..high`` inclusive, like ``random.randint``"""
+    span = high - low + 1
+    if span <= 0:
+        raise ValueError(f"empty range {low}..{high}")
+    # Multiply-shift maps random bits onto the range with a bias of span / 2**bits;
+    # small ranges use 32-bit words, whose products stay machine-sized
+    if span <= SMALL_SPAN:
+        words = array("I")
+        words.frombytes(rng.randbytes(4 * n))
+        return [low + (word * span >> 32) for word in words]
+    return [low + (word * span >> 64) for word in random_words(n, rng)]
+
+
+def uniforms(n: int, low: float, high: float, rng=random) -> List[float]:
+    """``n`` floats uniform on ``[low, high)``, like ``random.uniform``"""
+    scale = (high - low) / _TWO_POW_53
+    return [low + (word >> 11) * scale for word in random_words(n, rng)]
+
+
+def picks(values: Sequence, n: int, rng=random) -> List:
+    """``n`` uniform choices from ``values``, like ``random.choice``"""
+    return list(map(values.__getitem__, randints(n, 0, len(values) - 1, rng)))
+
+
+def quoted_picks(values: Sequence[str], n: int, rng=random, ensure_ascii: bool = True) -> List[str]:
+    """``n`` uniform choices from ``values``, each already rendered as a JSON string literal"""
+    quote = encode_basestring_ascii if ensure_ascii else encode_basestring
+    if len(values) <= QUOTE_CACHE_LIMIT:
+        return picks([quote(value) for value in values], n, rng)
+    return list(map(quote, picks(values, n, rng)))
+
+
+def spread_timestamps(start: datetime.datetime, end: datetime.datetime, n: int) -> List[str]:
+    """``n`` isoformat() strings spaced evenly from ``start`` towards ``end``
+
+    Each second's prefix is rendered once and the microseconds appended, so
+    a row costs one string format instead of a datetime; the text is what
+    ``isoformat()`` gives, down to dropping a zero fraction.
+    """
+    total = max((end - start) // _MICROSECOND, 0)
+    if not total or not n:
+        return [start.isoformat()] * n
+    offsets = [start.microsecond + total * i // n for i in range(n)]
+    if start.tzinfo is not None:
+        base = start.replace(microsecond=0)
+        return [(base + offset * _MICROSECOND).isoformat() for offset in offsets]
+    stamps: List[str] = []
+    base = start.replace(microsecond=0)
+    i = 0
+    while i < n:
+        # Offsets only grow, so the rows of one second are a contiguous run
+        second = offsets[i] // 1_000_000
+        j = bisect.bisect_left(offsets, (second + 1) * 1_000_000, i)
+        prefix = (base + datetime.timedelta(seconds=second)).isoformat()
+        fraction = prefix + ".%06d"
+        skip = second * 1_000_000
+        stamps += [fraction % (offset - skip) if offset != skip else prefix for offset in offsets[i:j]]
+        i = j
+    return stamps
+
+
+def write_lines(writer, path, lines: List[str], level: Optional[str] = None):
+    """Hand a block of lines to ``writer`` in one call when it supports that, else line by line"""
+    if not lines:
+        return
+    write_many = getattr(writer, "write_many", None)
+    if write_many is not None:
+        write_many(path, lines, level)
+        return
+    for line in lines:
+        writer.write(path, line, level)
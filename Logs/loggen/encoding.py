@@ -0,0 +1,193 @@
+"""
+Template JSON encoding for the ft-transcendence log generators
+The first entry of each shape (keys, nesting and value types) is compiled
+into a small function holding every key, brace and separator as prebuilt
+text; later entries of that shape only splice their values in, skipping
+json.dumps while producing byte-identical output
+"""
+
+import json
+import operator
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Compiled templates kept per top-level key tuple; past this, that shape falls back to json.dumps
+MAX_TEMPLATES_PER_KEYS = 8
+
+_INFINITY = float("inf")
+# Bytes json.dumps escapes in any mode: control characters, the quote and the backslash
+_UNSAFE_BYTES = bytes(range(0x20)) + b'"\\'
+# ensure_ascii also escapes DEL (non-ASCII text never reaches the byte check there)
+_UNSAFE_ASCII_BYTES = _UNSAFE_BYTES + b"\x7f"
+
+
+class _Leaf:
+    """One value slot of a template: where to find it and how to render it"""
+    __slots__ = ("expr", "kind")
+
+    def __init__(self, expr: str, kind: str):
+        self.expr = expr
+        self.kind = kind
+
+
+class TemplateEncoder:
+    """Drop-in ``json.dumps`` for log entries that mostly share a few shapes
+
+    ``encode(entry)`` returns exactly what ``json.dumps(entry, ensure_ascii=...,
+    separators=...)`` would. Strings that need no escaping (nearly all) are
+    copied in as they are, numbers use the same reprs json does, None and
+    empty dicts are folded into the template, and lists and other values
+    go through json.
+    """
+
+    def __init__(self, ensure_ascii: bool = True, separators: Optional[Tuple[str, str]] = None):
+        self.ensure_ascii = ensure_ascii
+        self.item_separator, self.key_separator = separators or (", ", ": ")
+        self._escape = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self._dumps = json.JSONEncoder(ensure_ascii=ensure_ascii, separators=separators).encode
+        self._templates: Dict[Tuple[str, ...], List[Callable]] = {}
+        self.compiled = 0
+        self.fallbacks = 0
+
+    def encode(self, entry: Dict) -> str:
+        """Serialize ``entry`` as json.dumps would"""
+        keys = tuple(entry)
+        templates = self._templates.get(keys)
+        if templates is None:
+            templates = self._templates.setdefault(keys, [])
+        for template in templates:
+            line = template(entry)
+            if line is not None:
+                return line
+        if len(templates) < MAX_TEMPLATES_PER_KEYS:
+            template = self._compile(entry)
+            if template is not None:
+                templates.append(template)
+                line = template(entry)
+                if line is not None:
+                    return line
+        self.fallbacks += 1
+        return self._dumps(entry)
+
+    __call__ = encode
+
+    def _walk(self, value: Any, expr: str, fragments: List, dicts: List[Tuple[str, Tuple[str, ...]]]):
+        """Append ``value``'s template to ``fragments``: literal text, or a _Leaf slot"""
+        kind = type(value)
+        if value is None:
+            fragments.append(_Leaf(expr, "null"))
+        elif kind is dict:
+            keys = tuple(value)
+            if not all(type(key) is str for key in keys):
+                raise TypeError("only str keys are compiled")
+            # The dict's values are fetched in one itemgetter call into the tuple v<index>
+            index = len(dicts)
+            dicts.append((expr, keys))
+            fragments.append("{")
+            for position, key in enumerate(keys):
+                if position:
+                    fragments.append(self.item_separator)
+                fragments.append(self._escape(key) + self.key_separator)
+                self._walk(value[key], f"v{index}[{position}]", fragments, dicts)
+            fragments.append("}")
+        elif kind is str:
+            fragments.append(_Leaf(expr, "str"))
+        elif kind is bool:
+            fragments.append(_Leaf(expr, "bool"))
+        elif kind is int:
+            fragments.append(_Leaf(expr, "int"))
+        elif kind is float:
+            fragments.append(_Leaf(expr, "float"))
+        else:
+            fragments.append(_Leaf(expr, "json"))
+
+    def _compile(self, entry: Dict) -> Optional[Callable]:
+        fragments: List = []
+        dicts: List[Tuple[str, Tuple[str, ...]]] = []
+        try:
+            self._walk(entry, "e", fragments, dicts)
+        except TypeError:
+            return None
+
+        # encode() already matched the entry's keys; nested dicts must have exactly the compiled ones
+        namespace: Dict[str, Any] = {"ESCAPE": self._escape, "DUMPS": self._dumps, "INF": _INFINITY}
+        lines = ["def template(e):", "    try:"]
+        checks = []
+        for index, (expr, keys) in enumerate(dicts):
+            if index:
+                namespace[f"K{index}"] = keys
+                checks.append(f"type({expr}) is dict and tuple({expr}) == K{index}")
+            if len(keys) > 1:
+                namespace[f"G{index}"] = operator.itemgetter(*keys)
+                fetch = f"G{index}({expr})"
+            else:
+                fetch = f"({expr}[{keys[0]!r}],)" if keys else "()"
+            # A nested dict is only fetched once its type and keys are known to match
+            if index:
+                lines.append(f"        if not ({' and '.join(checks)}): return None")
+                checks = []
+            lines.append(f"        v{index} = {fetch}")
+
+        # Output is one join over literal fragments and values; literal text between two
+        # values is merged into a single fragment
+        parts, strings, pending = [], [], []
+        for fragment in fragments:
+            if not isinstance(fragment, _Leaf):
+                pending.append(fragment)
+                continue
+            expr = fragment.expr
+            if fragment.kind == "null":
+                pending.append("null")
+                checks.append(f"{expr} is None")
+                continue
+            if fragment.kind == "str":
+                pending.append('"')
+                value = expr
+            elif fragment.kind == "bool":
+                checks.append(f"type({expr}) is bool")
+                value = f"('true' if {expr} else 'false')"
+            elif fragment.kind == "int":
+                checks.append(f"type({expr}) is int")
+                value = f"int.__repr__({expr})"
+            elif fragment.kind == "float":
+                # Also rejects NaN and the infinities, which json.dumps spells differently
+                checks.append(f"type({expr}) is float and -INF < {expr} < INF")
+                value = f"float.__repr__({expr})"
+            else:
+                value = f"DUMPS({expr})"
+            if pending:
+                namespace[f"F{len(parts)}"] = "".join(pending)
+                parts.append(f"F{len(parts)}")
+                pending = ['"'] if fragment.kind == "str" else []
+            if fragment.kind == "str":
+                strings.append(len(parts))
+            parts.append(value)
+        if pending:
+            namespace[f"F{len(parts)}"] = "".join(pending)
+            parts.append(f"F{len(parts)}")
+
+        if checks:
+            lines.append(f"        if not ({' and '.join(checks)}): return None")
+        lines.append(f"        a = [{', '.join(parts)}]")
+        if strings:
+            # Nearly every string is plain text that json.dumps copies verbatim. One C pass
+            # over all of them proves that (quote, backslash and control bytes are deleted,
+            # so the length only holds if there were none); other entries escape value by value
+            namespace["STRINGS"] = operator.itemgetter(*strings) if len(strings) > 1 else (
+                lambda a, i=strings[0]: (a[i],))
+            namespace["POSITIONS"] = tuple(strings)
+            namespace["UNSAFE"] = _UNSAFE_ASCII_BYTES if self.ensure_ascii else _UNSAFE_BYTES
+            lines.append("        j = ''.join(STRINGS(a))")
+            check = "len(b.translate(None, UNSAFE)) != len(b)"
+            if self.ensure_ascii:
+                check = "not j.isascii() or " + check
+            lines.append("        b = j.encode()")
+            lines.append(f"        if {check}:")
+            lines.append("            for i in POSITIONS:")
+            lines.append("                a[i] = ESCAPE(a[i])[1:-1]")
+        lines.append("        return ''.join(a)")
+        lines.append("    except (KeyError, TypeError, UnicodeEncodeError):")
+        lines.append("        return None")
+        exec("\n".join(lines), namespace)
+        self.compiled += 1
+        return namespace["template"]
@@ -0,0 +1,190 @@
+"""
+Fast unique IDs for the ft-transcendence log generators
+An ID is a leased node number and a counter, scrambled by a fixed bijection
+so it looks random at the usual prefix and width; IDs are rendered in
+batches, so one costs a C-level next() instead of an os.urandom read
+"""
+
+import functools
+import itertools
+import os
+import re
+import tempfile
+import threading
+import weakref
+import zlib
+from typing import Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# IDs rendered per refill; large enough to amortise the loop, small enough to start fast.
+# Must be a power of two.
+BATCH = 1024
+_MULTIPLIER = 0xBF58476D1CE4E5B9
+_MULTIPLIER_2 = 0x94D049BB133111EB
+
+# Node leases are lock files here; processes on the host that share this directory and run
+# at the same time get distinct nodes. A lock is all a file holds, so nothing outlives a run
+NODE_DIR = os.environ.get("LOGGEN_NODE_DIR") or os.path.join(tempfile.gettempdir(), "loggen-nodes")
+
+_factories: "weakref.WeakSet[IdFactory]" = weakref.WeakSet()
+_registry: Dict[Tuple[str, int], "IdFactory"] = {}
+_registry_lock = threading.Lock()
+
+
+class IdFactory:
+    """``prefix`` followed by ``width`` hex digits, unique across threads and processes
+
+    The top quarter of the bits holds the node and the rest a counter. A
+    node is leased from NODE_DIR with a lock the OS drops when the process
+    exits, so no two running processes share one; a new run starts its
+    counters over, as IDs only need to be unique within a run. A node
+    whose counter space is used up (2**24 IDs at 8 hex digits, 2**36 at
+    12) stays held and is swapped for a free one; RuntimeError is raised
+    once no node is left, rather than wrapping around.
+    Call ``factory.next()`` for the next ID.
+    """
+
+    def __init__(self, prefix: str, width: int, batch: int = BATCH):
+        if not 4 <= width <= 16:
+            raise ValueError(f"width must be between 4 and 16 hex digits, got {width}")
+        if batch & (batch - 1):
+            raise ValueError(f"batch must be a power of two, got {batch}")
+        self.prefix = prefix
+        self.width = width
+        self.batch = batch
+        self.bits = 4 * width
+        self.node_bits = self.bits // 4
+        self._mask = (1 << self.bits) - 1
+        self._shift = self.bits // 2
+        # Keyed by the prefix, not hash(), so every process applies the same bijection
+        self._key = zlib.crc32(prefix.encode()) * 0x9E3779B97F4A7C15 & self._mask
+        self._format = prefix.replace("%", "%%") + f"%0{width}x"
+        self._lease_name = re.sub(r"[^A-Za-z0-9_-]", "_", prefix) + f"{width}"
+        self._block: List[str] = []
+        self._leases: List[int] = []
+        self._reset()
+        # next() on a chain of rendered blocks runs in C; Python only runs once per block.
+        # Racing threads may skip part of a block, never hand out the same ID twice.
+        self._chain = itertools.chain.from_iterable(iter(self._render, None))
+        self.next = functools.partial(next, self._chain)
+        _factories.add(self)
+
+    def _reset(self):
+        # A forked child shares its parent's locks; closing its copies leaves the parent's leases held
+        for fd in self._leases:
+            os.close(fd)
+        self._leases.clear()
+        self.node = None
+        self._next_block = 0
+        self._lock = threading.Lock()
+        # Emptying the block in use makes the chain move on to a block of the new node
+        self._block.clear()
+
+    def _lease(self):
+        """Lease the lowest node of this prefix and width that no process holds, this one included"""
+        os.makedirs(NODE_DIR, exist_ok=True)
+        for node in range(1 << self.node_bits):
+            fd = os.open(os.path.join(NODE_DIR, f"{self._lease_name}-{node}.lock"), os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            except OSError:
+                os.close(fd)
+                continue
+            # Used-up nodes stay locked until exit, so no other process repeats their IDs
+            self._leases.append(fd)
+            self.node, self._next_block = node, 0
+            return
+        raise RuntimeError(f"every {self.prefix!r} ID node in {NODE_DIR} is held by a running process "
+                           f"or used up by this one ({self.width} hex digits allow {1 << self.node_bits} nodes)")
+
+    def scramble(self, value: int) -> int:
+        """Bijection on ``bits``-bit integers: two rounds of odd multiply and xorshift"""
+        mask, shift = self._mask, self._shift
+        value = (value * _MULTIPLIER + self._key) & mask
+        value = ((value ^ (value >> shift)) * _MULTIPLIER_2) & mask
+        return value ^ (value >> shift)
+
+    def _first(self) -> int:
+        counter_bits = self.bits - self.node_bits
+        with self._lock:
+            if self.node is None or (self._next_block + 1) * self.batch > 1 << counter_bits:
+                self._lease()
+            block = self._next_block
+            self._next_block += 1
+            return self.node << counter_bits | block * self.batch
+
+    def _render(self) -> List[str]:
+        first = self._first()
+        mask, shift, key = self._mask, self._shift, self._key
+        multiplier, multiplier_2 = _MULTIPLIER & mask, _MULTIPLIER_2 & mask
+        # scramble() inlined: a method call per ID would cost more than the arithmetic
+        block = [self._format % ((mixed := ((value ^ (value >> shift)) * multiplier_2) & mask) ^ (mixed >> shift))
+                 for counter in range(first, first + self.batch)
+                 for value in ((counter * multiplier + key) & mask,)]
+        self._block = block
+        return block
+
+    def take(self, n: int) -> List[str]:
+        """The next ``n`` IDs as a list"""
+        return list(itertools.islice(self._chain, n))
+
+    def __call__(self) -> str:
+        return self.next()
+
+
+class UuidFactory(IdFactory):
+    """Version-4 shaped UUID strings built the same way"""
+
+    def __init__(self, batch: int = BATCH):
+        super().__init__("", 16, batch)
+
+    def _render(self) -> List[str]:
+        first = self._first()
+        scramble = self.scramble
+        block = []
+        for counter in range(first, first + self.batch):
+            high = scramble(counter)
+            # The unique half stays whole; the version and variant bits go in the other half
+            low = (high * 0xD6E8FEB86659FD93 >> 7) & 0x0FFF3FFFFFFFFFFF | 0x4000800000000000
+            text = format(high, "016x") + format(low, "016x")
+            block.append(f"{text[:8]}-{text[8:12]}-{text[16:20]}-{text[20:24]}-{text[12:16]}{text[24:]}")
+        self._block = block
+        return block
+
+
+def id_factory(prefix: str, width: int) -> IdFactory:
+    """The process-wide factory for ``prefix`` + ``width`` hex digits"""
+    key = (prefix, width)
+    factory = _registry.get(key)
+    if factory is None:
+        with _registry_lock:
+            factory = _registry.setdefault(key, IdFactory(prefix, width))
+    return factory
+
+
+def uuid_factory() -> UuidFactory:
+    """The process-wide factory for UUID strings"""
+    key = ("uuid", 36)
+    factory = _registry.get(key)
+    if factory is None:
+        with _registry_lock:
+            factory = _registry.setdefault(key, UuidFactory())
+    return factory
+
+
+def _after_fork():
+    # A forked child inherits the parent's node, counters and pools; give it its own
+    for factory in list(_factories):
+        factory._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
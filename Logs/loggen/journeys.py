@@ -0,0 +1,311 @@
+"""
+Correlated cross-service user journeys for the ft-transcendence log generators
+Each journey is one user walking login -> chat join -> game match -> avatar
+upload -> logout, with every event carrying the same request, session and
+user IDs, so Kibana can pivot from any one service to the others
+
+Run from Logs/:  python -m loggen.journeys --root /tmp/logs --rate 200 --duration 1h
+"""
+
+import argparse
+import datetime
+import heapq
+import random
+import sys
+import time
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .beats import add_beats_arguments
+from .bulk import add_bulk_arguments
+from .clock import SimulatedClock, WallClock
+from .metrics import add_metrics_arguments, serve_metrics
+from .population import Population, add_population_arguments, build_population, mix64, token_uuid
+from .rotation import add_rotation_arguments, build_rotation
+from .sinks import add_sink_arguments
+from .scenario import SERVICES, attach_sinks, build_generators, close_generators, parse_duration
+
+STAGES = ("login", "chat_join", "match_start", "match_end", "avatar_upload", "logout")
+LOGIN, CHAT_JOIN, MATCH_START, MATCH_END, AVATAR_UPLOAD, LOGOUT = range(len(STAGES))
+
+# Services a journey touches; the others are not built
+JOURNEY_SERVICES = ("user-service", "chat-service", "game-service", "file-service")
+
+# Population used when none is given on the command line
+DEFAULT_POPULATION = 100_000
+
+
+class Identity(NamedTuple):
+    """IDs shared by every event of one journey; attribute names match chat-service's User"""
+    user_id: str
+    username: str
+    session_id: str
+    request_id: str
+    ip_address: str
+    user_agent: str
+
+
+class JourneyRegistry:
+    """Columnar store of in-flight journeys, about 17 bytes each
+
+    A journey is a user index, a 64-bit token and a stage; user details come
+    from the population and session/request/match IDs are derived from the
+    token, so strings only exist while an event is being written. Slots of
+    finished journeys are reused, so memory tracks the in-flight peak.
+    """
+
+    def __init__(self, population: Population, seed: Optional[int] = None):
+        self.population = population
+        self.users = len(population)
+        self.rng = random.Random(seed)
+        self._user = array("I")
+        self._token = array("Q")
+        self._stage = array("B")
+        self._free = array("I")
+        self.started = 0
+        self.finished = 0
+        self.peak = 0
+
+    def start(self) -> int:
+        """Open a journey for a random user and return its slot"""
+        user = self.rng.randrange(self.users)
+        token = self.rng.getrandbits(64)
+        if self._free:
+            slot = self._free.pop()
+            self._user[slot] = user
+            self._token[slot] = token
+            self._stage[slot] = LOGIN
+        else:
+            slot = len(self._user)
+            self._user.append(user)
+            self._token.append(token)
+            self._stage.append(LOGIN)
+        self.started += 1
+        self.peak = max(self.peak, len(self))
+        return slot
+
+    def finish(self, slot: int):
+        """Close the journey in ``slot`` and make the slot reusable"""
+        self._free.append(slot)
+        self.finished += 1
+
+    def stage(self, slot: int) -> int:
+        return self._stage[slot]
+
+    def set_stage(self, slot: int, stage: int):
+        self._stage[slot] = stage
+
+    def user_index(self, slot: int) -> int:
+        return self._user[slot]
+
+    def identity(self, slot: int) -> Identity:
+        """Render the IDs of the journey in ``slot``"""
+        user = self._user[slot]
+        token = self._token[slot]
+        population = self.population
+        return Identity(
+            user_id=population.user_id(user),
+            username=population.username(user),
+            session_id=token_uuid(token),
+            request_id=f"req_{mix64(token ^ 0x5EED):016x}",
+            ip_address=population.ip_address(user),
+            user_agent=population.user_agent(user),
+        )
+
+    def match(self, slot: int, identity: Identity) -> Dict:
+        """Match context for the journey in ``slot``; stable between match start and end"""
+        token = self._token[slot]
+        salt = mix64(token ^ 0xA11CE)
+        opponent = (self._user[slot] + 1 + salt % max(self.users - 1, 1)) % self.users
+        return {
+            "request_id": identity.request_id,
+            "match_id": f"match_{salt & 0xFFFFFFFF:08x}",
+            "game_id": f"game_{salt >> 32:08x}",
+            "player1": {"user_id": identity.user_id, "username": identity.username,
+                        "session_id": identity.session_id},
+            "player2": {"user_id": self.population.user_id(opponent),
+                        "username": self.population.username(opponent)},
+        }
+
+    def __len__(self) -> int:
+        return len(self._user) - len(self._free)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * a.buffer_info()[1]
+                   for a in (self._user, self._token, self._stage, self._free))
+
+
+class JourneyEngine:
+    """Advances journeys through their stages on a timer heap of (due, slot)"""
+
+    def __init__(self, generators: Dict[str, Any], registry: JourneyRegistry, think: float = 20.0,
+                 match_seconds=(120.0, 900.0), abandon: float = 0.1):
+        self.generators = generators
+        self.registry = registry
+        self.rng = registry.rng
+        self.think = think
+        self.match_seconds = match_seconds
+        self.abandon = abandon
+        self.events: Dict[str, int] = {service: 0 for service in generators}
+        self.stage_counts = [0] * len(STAGES)
+        self._timers: List = []
+        self._sequence = 0
+
+    def _emit(self, service: str, action):
+        generator = self.generators.get(service)
+        if generator is not None:
+            action(generator)
+            self.events[service] += 1
+
+    def _run_stage(self, slot: int, stage: int, identity: Identity):
+        registry = self.registry
+        if stage == LOGIN:
+            self._emit("user-service", lambda g: g.write_log_entry(
+                g.generate_user_log(identity, "login"), g.user_log_path))
+            self._emit("user-service", lambda g: g.write_log_entry(
+                g.generate_access_log(identity, "POST", "/api/v1/users/login"), g.user_access_log_path))
+        elif stage == CHAT_JOIN:
+            self._emit("chat-service", lambda g: g.generate_connection_event(
+                identity, connected=True, request_id=identity.request_id))
+            self._emit("chat-service", lambda g: g.generate_user_join_event(
+                identity, request_id=identity.request_id))
+        elif stage == MATCH_START:
+            match = registry.match(slot, identity)
+            self._emit("game-service", lambda g: g.generate_match_events_log("match_created", match))
+            self._emit("game-service", lambda g: g.generate_match_events_log("match_started", match))
+        elif stage == MATCH_END:
+            match = registry.match(slot, identity)
+            self._emit("game-service", lambda g: g.generate_match_events_log("match_ended", match))
+        elif stage == AVATAR_UPLOAD:
+            self._emit("file-service", lambda g: g.write_log(
+                g.generate_upload_log(identity=identity, category="avatar")))
+        else:
+            self._emit("chat-service", lambda g: g.generate_user_leave_event(
+                identity, request_id=identity.request_id))
+            self._emit("chat-service", lambda g: g.generate_connection_event(
+                identity, connected=False, reason="client_logout", request_id=identity.request_id))
+            self._emit("user-service", lambda g: g.write_log_entry(
+                g.generate_user_log(identity, "logout"), g.user_log_path))
+        self.stage_counts[stage] += 1
+
+    def _schedule(self, due: float, slot: int):
+        # The sequence number keeps equal due times in FIFO order without comparing slots
+        self._sequence += 1
+        heapq.heappush(self._timers, (due, self._sequence, slot))
+
+    def step(self, slot: int, now: float):
+        """Run the journey's current stage and schedule its next one"""
+        registry = self.registry
+        stage = registry.stage(slot)
+        self._run_stage(slot, stage, registry.identity(slot))
+        if stage == LOGOUT:
+            registry.finish(slot)
+            return
+        if stage == MATCH_START:
+            delay = self.rng.uniform(*self.match_seconds)
+            following = MATCH_END
+        else:
+            delay = self.rng.expovariate(1.0 / self.think) if self.think > 0 else 0.0
+            following = stage + 1
+            if stage in (LOGIN, CHAT_JOIN) and self.rng.random() < self.abandon:
+                following = LOGOUT
+        registry.set_stage(slot, following)
+        self._schedule(now + delay, slot)
+
+    def run(self, clock, rate: float, duration: float, realtime: bool = False, speed: float = 1.0):
+        """Start journeys as a Poisson process for ``duration`` seconds, then drain the in-flight ones
+
+        Simulated runs move ``clock`` event by event; realtime runs sleep
+        until each event is due (``speed`` compresses the timeline).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        start = clock.now()
+        wall_start = time.perf_counter()
+        next_arrival = self.rng.expovariate(rate)
+        timers = self._timers
+        while True:
+            if timers and (timers[0][0] <= next_arrival or next_arrival >= duration):
+                now, _, slot = heapq.heappop(timers)
+            elif next_arrival < duration:
+                now, slot = next_arrival, self.registry.start()
+                next_arrival += self.rng.expovariate(rate)
+            else:
+                break
+            if realtime:
+                wait = now / speed - (time.perf_counter() - wall_start)
+                if wait > 0:
+                    time.sleep(wait)
+            else:
+                clock.current = start + datetime.timedelta(seconds=now)
+            self.step(slot, now)
+
+    def report(self) -> str:
+        registry = self.registry
+        stages = ", ".join(f"{name}={count}" for name, count in zip(STAGES, self.stage_counts))
+        return (f"Journeys: {registry.started} started, {registry.finished} finished, "
+                f"peak {registry.peak} in flight ({registry.nbytes} bytes of registry)\n"
+                f"  stages: {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate correlated cross-service user journeys")
+    parser.add_argument("--root", default="/var/log/ft-transcendence",
+                        help="Directory holding one log directory per service")
+    parser.add_argument("--rate", type=float, default=50.0, help="New journeys per second")
+    parser.add_argument("--duration", default="10m",
+                        help="How long new journeys keep starting (e.g. 90s, 15m, 2h)")
+    parser.add_argument("--think", default="20s", help="Mean pause between the stages of a journey")
+    parser.add_argument("--abandon", type=float, default=0.1,
+                        help="Chance a user logs out straight after login or chat join")
+    parser.add_argument("--start", help="Simulated start time (ISO 8601, defaults to now)")
+    parser.add_argument("--seed", type=int, help="Seed for a reproducible run")
+    parser.add_argument("--only", nargs="+", choices=JOURNEY_SERVICES,
+                        help="Write just these services' side of each journey")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Pace events on the wall clock instead of a simulated one")
+    parser.add_argument("--speed", type=float, default=1.0, help="Timeline compression for --realtime")
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        duration = parse_duration(args.duration)
+        think = parse_duration(args.think)
+        population = build_population(args) or Population(DEFAULT_POPULATION, args.population_seed)
+        registry = JourneyRegistry(population, args.seed)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    random.seed(args.seed)
+    if args.realtime:
+        clock = WallClock()
+    else:
+        start = datetime.datetime.fromisoformat(args.start) if args.start else datetime.datetime.now()
+        clock = SimulatedClock(start, start + datetime.timedelta(seconds=duration))
+    services = [s for s in SERVICES if s in (args.only or JOURNEY_SERVICES)]
+    generators = build_generators(services, args.root, clock, build_rotation(args), args.seed, population)
+    attach_sinks(generators, args)
+    engine = JourneyEngine(generators, registry, think=think, abandon=args.abandon)
+    serve_metrics(args)
+
+    started = time.perf_counter()
+    try:
+        engine.run(clock, args.rate, duration, args.realtime, args.speed)
+    except KeyboardInterrupt:
+        print("Interrupted")
+    elapsed = time.perf_counter() - started
+    close_generators(generators, engine.events)
+    total = sum(engine.events.values())
+    print(engine.report())
+    print(f"Wrote {total} events in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} events/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
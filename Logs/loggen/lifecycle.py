@@ -0,0 +1,208 @@
+"""
+Game and match lifecycles for the ft-transcendence game-service generator
+Each game walks waiting -> starting -> active (<-> paused) -> finished, or
+drops out as cancelled; its next transition sits on a timer heap, so a
+transition costs O(log n) however many games are in flight
+"""
+
+import datetime
+import heapq
+import random
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+STATES = ("waiting", "starting", "active", "paused", "finished", "cancelled")
+WAITING, STARTING, ACTIVE, PAUSED, FINISHED, CANCELLED = range(len(STATES))
+
+
+@dataclass
+class LifecycleTimings:
+    """How long games stay in each state and how often they branch off"""
+    # Mean seconds a game waits for its players, and the chance none turn up
+    lobby: float = 20.0
+    lobby_timeout: float = 0.1
+    # Countdown between both players joining and play starting
+    countdown: Tuple[float, float] = (3.0, 10.0)
+    # Seconds of actual play a finished game has
+    play: Tuple[float, float] = (120.0, 900.0)
+    # Pauses per second of play, mean pause length and the chance a pause ends the game
+    pause_rate: float = 1 / 1800
+    pause: float = 45.0
+    abandon: float = 0.1
+
+
+# Called as on_transition(slot, old_state, new_state); old_state is None for a new game
+TransitionCallback = Callable[[int, Optional[int], int], None]
+
+
+class GameLifecycle:
+    """Columnar store of in-flight games advanced by a timer heap of (due, sequence, slot)
+
+    Each game has exactly one pending timer, for its next transition. State,
+    play time and pause counts are typed arrays; ``context[slot]`` holds
+    whatever the caller attached to the game (its IDs and players). Slots
+    of finished and cancelled games are reused.
+    """
+
+    def __init__(self, on_transition: TransitionCallback, timings: Optional[LifecycleTimings] = None,
+                 rng: Optional[random.Random] = None):
+        self.on_transition = on_transition
+        self.timings = timings or LifecycleTimings()
+        self.rng = rng or random.Random()
+        self.now = 0.0
+        self.context: List[Any] = []
+        self._state = array("B")
+        # Seconds of play left and seconds played, kept across pauses
+        self._remaining = array("d")
+        self._played = array("d")
+        self._pauses = array("H")
+        self._free = array("I")
+        self._timers: List[Tuple[float, int, int]] = []
+        self._sequence = 0
+        self.created = 0
+        self.peak = 0
+        self.transitions = [0] * len(STATES)
+
+    def __len__(self) -> int:
+        return len(self._state) - len(self._free)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * a.buffer_info()[1]
+                   for a in (self._state, self._remaining, self._played, self._pauses, self._free))
+
+    def state(self, slot: int) -> int:
+        return self._state[slot]
+
+    def played(self, slot: int) -> float:
+        """Seconds the game in ``slot`` has been in play"""
+        return self._played[slot]
+
+    def pauses(self, slot: int) -> int:
+        return self._pauses[slot]
+
+    def _schedule(self, delay: float, slot: int):
+        # The sequence number keeps equal due times in FIFO order without comparing slots
+        self._sequence += 1
+        heapq.heappush(self._timers, (self.now + delay, self._sequence, slot))
+
+    def create(self, context: Any = None) -> int:
+        """Open a game in the waiting state and return its slot; the callback may replace its context"""
+        if self._free:
+            slot = self._free.pop()
+            self._state[slot] = WAITING
+            self._remaining[slot] = 0.0
+            self._played[slot] = 0.0
+            self._pauses[slot] = 0
+            self.context[slot] = context
+        else:
+            slot = len(self._state)
+            self._state.append(WAITING)
+            self._remaining.append(0.0)
+            self._played.append(0.0)
+            self._pauses.append(0)
+            self.context.append(context)
+        self.created += 1
+        self.peak = max(self.peak, len(self))
+        self.transitions[WAITING] += 1
+        self.on_transition(slot, None, WAITING)
+        self._schedule(self.rng.expovariate(1.0 / self.timings.lobby), slot)
+        return slot
+
+    def _play(self, slot: int):
+        """Schedule the next pause, or the end of the game if play runs out first"""
+        remaining = self._remaining[slot]
+        rate = self.timings.pause_rate
+        until_pause = self.rng.expovariate(rate) if rate > 0 else remaining
+        if until_pause < remaining:
+            self._remaining[slot] = remaining - until_pause
+            self._played[slot] += until_pause
+            self._schedule(until_pause, slot)
+        else:
+            self._remaining[slot] = 0.0
+            self._played[slot] += remaining
+            self._schedule(remaining, slot)
+
+    def _move(self, slot: int, state: int):
+        old = self._state[slot]
+        self._state[slot] = state
+        self.transitions[state] += 1
+        self.on_transition(slot, old, state)
+
+    def fire(self, slot: int):
+        """Run the transition the game in ``slot`` was waiting for, and schedule its next one"""
+        timings, rng = self.timings, self.rng
+        state = self._state[slot]
+        if state == WAITING:
+            if rng.random() < timings.lobby_timeout:
+                self._end(slot, CANCELLED)
+                return
+            self._move(slot, STARTING)
+            self._schedule(rng.uniform(*timings.countdown), slot)
+        elif state == STARTING:
+            self._remaining[slot] = rng.uniform(*timings.play)
+            self._move(slot, ACTIVE)
+            self._play(slot)
+        elif state == ACTIVE:
+            if self._remaining[slot] <= 0.0:
+                self._end(slot, FINISHED)
+                return
+            self._pauses[slot] = min(self._pauses[slot] + 1, 0xFFFF)
+            self._move(slot, PAUSED)
+            self._schedule(rng.expovariate(1.0 / timings.pause), slot)
+        elif state == PAUSED:
+            if rng.random() < timings.abandon:
+                self._end(slot, CANCELLED)
+                return
+            self._move(slot, ACTIVE)
+            self._play(slot)
+
+    def _end(self, slot: int, state: int):
+        self._move(slot, state)
+        self.context[slot] = None
+        self._free.append(slot)
+
+    def run(self, clock, rate: float, duration: float, realtime: bool = False, speed: float = 1.0,
+            drain: bool = True):
+        """Create games as a Poisson process for ``duration`` seconds, firing timers as they come due
+
+        Simulated runs move ``clock`` event by event; realtime runs sleep
+        until each event is due (``speed`` compresses the timeline). With
+        ``drain``, games still in flight afterwards play out to the end.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        start = clock.now()
+        wall_start = time.perf_counter()
+        next_arrival = self.rng.expovariate(rate)
+        timers = self._timers
+        while True:
+            if timers and (timers[0][0] <= next_arrival or next_arrival >= duration):
+                if not drain and timers[0][0] > duration:
+                    break
+                now, _, slot = heapq.heappop(timers)
+                arrival = False
+            elif next_arrival < duration:
+                now, arrival = next_arrival, True
+                next_arrival += self.rng.expovariate(rate)
+            else:
+                break
+            self.now = now
+            if realtime:
+                wait = now / speed - (time.perf_counter() - wall_start)
+                if wait > 0:
+                    time.sleep(wait)
+            else:
+                clock.current = start + datetime.timedelta(seconds=now)
+            if arrival:
+                self.create()
+            else:
+                self.fire(slot)
+
+    def report(self) -> str:
+        states = ", ".join(f"{name}={count}" for name, count in zip(STATES, self.transitions))
+        return (f"Games: {self.created} created, {len(self)} still in flight, peak {self.peak} "
+                f"({self.nbytes} bytes of state, {len(self._timers)} timers pending)\n"
+                f"  transitions into: {states}")
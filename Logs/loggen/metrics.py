@@ -0,0 +1,263 @@
+"""
+Prometheus metrics for the ft-transcendence log generators
+Dependency-free counters, gauges and histograms served in the text exposition
+format, so a load test can be watched in Grafana next to the ELK metrics
+"""
+
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) for flushing a batch to a log file
+WRITE_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Set by start_metrics_server(); hot paths skip recording entirely while False
+ENABLED = False
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def expose(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Gauge(_Metric):
+    """Point-in-time value per label combination, set directly or read from a callback"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, labels: LabelValues, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self._collect is not None:
+            for labels, value in self._collect():
+                values[labels] = values.get(labels, 0) + value
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket distribution per label combination"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = WRITE_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> [per-bucket counts..., sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, labels: LabelValues, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-1] += value
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Ordered set of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+# Writers and schedulers register themselves so gauges can read them at scrape time
+_writers: "weakref.WeakSet" = weakref.WeakSet()
+_schedulers: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def track_writer(writer):
+    _writers.add(writer)
+
+
+def track_scheduler(scheduler):
+    _schedulers.add(scheduler)
+
+
+def _buffer_depths():
+    for writer in list(_writers):
+        yield (writer.service or "unknown",), writer.buffered_bytes
+
+
+def _scheduler_lags():
+    for scheduler in list(_schedulers):
+        yield (scheduler.name,), scheduler.lag
+
+
+def _scheduler_targets():
+    for scheduler in list(_schedulers):
+        yield (scheduler.name,), scheduler.rate
+
+
+REGISTRY = Registry()
+
+EVENTS = REGISTRY.counter(
+    "loggen_events_total", "Log lines emitted", ("service", "file", "level"))
+DROPPED = REGISTRY.counter(
+    "loggen_dropped_events_total", "Events that were generated but never written", ("service", "reason"))
+WRITE_LATENCY = REGISTRY.histogram(
+    "loggen_write_latency_seconds", "Time to write and flush one batch to a log file", ("service", "file"))
+BUFFER_DEPTH = REGISTRY.gauge(
+    "loggen_buffer_bytes", "Bytes buffered in memory waiting to be flushed", ("service",),
+    collect=_buffer_depths)
+SCHEDULER_LAG = REGISTRY.gauge(
+    "loggen_scheduler_lag_seconds", "How far behind its schedule a rate scheduler is running",
+    ("scheduler",), collect=_scheduler_lags)
+SCHEDULER_TARGET = REGISTRY.gauge(
+    "loggen_scheduler_target_rate", "Events per second a rate scheduler is aiming for",
+    ("scheduler",), collect=_scheduler_targets)
+
+
+def record_event(service: Optional[str], file, level: Optional[str], amount: int = 1):
+    """Count emitted lines (no-op unless the metrics server is running)"""
+    if ENABLED:
+        EVENTS.inc((service or "unknown", str(file), level or "UNKNOWN"), amount)
+
+
+def record_drop(service: Optional[str], reason: str, amount: int = 1):
+    if ENABLED:
+        DROPPED.inc((service or "unknown", reason), amount)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown the generator's own output
+        pass
+
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve REGISTRY on ``http://addr:port/metrics`` from a daemon thread"""
+    global ENABLED
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="loggen-metrics", daemon=True)
+    thread.start()
+    ENABLED = True
+    print(f"Metrics: http://{addr}:{server.server_address[1]}/metrics")
+    return server
+
+
+def add_metrics_arguments(parser):
+    """Add the shared ``--metrics-port`` option to an argparse parser"""
+    parser.add_argument("--metrics-port", type=int,
+                        help="Expose Prometheus metrics on this port (e.g. 9464)")
+
+
+def serve_metrics(args) -> Optional[ThreadingHTTPServer]:
+    """Start the metrics server if ``--metrics-port`` was given"""
+    if getattr(args, "metrics_port", None) is None:
+        return None
+    return start_metrics_server(args.metrics_port)
@@ -0,0 +1,454 @@
+"""
+Offline stand-in for the Logstash main.conf pipeline
+Replays the filebeat input mapping and the main.conf filter chain (service
+extraction from the path, JSON parse, field flattening, date, conversions,
+tags, index name) over generator output and reports events/sec and the
+cost of every stage and flattened field
+
+Run from Logs/:  python -m loggen.pipeline /tmp/logs --field-costs
+"""
+
+import argparse
+import datetime
+import fnmatch
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+LOG_ROOT = "/var/log/ft-transcendence"
+
+# filebeat.yml inputs under LOG_ROOT: path globs and the fields they add (fields_under_root)
+FILEBEAT_INPUTS = [
+    (["auth-service/auth.log", "auth-service/auth-access.log", "auth-service/auth-error.log"],
+     {"logtype": "auth-service", "service": "auth-service"}),
+    (["auth-service/auth-security.log", "auth-service/security-events.log", "security/*.log"],
+     {"logtype": "security-events", "service": "auth-service"}),
+    (["api-gateway/*.log"], {"logtype": "api-gateway", "service": "api-gateway"}),
+    (["chat-service/messages/*.log", "chat-messages/*.log"],
+     {"logtype": "chat-messages", "service": "chat-service"}),
+    (["game-service/events/*.log", "game-events/*.log"],
+     {"logtype": "game-events", "service": "game-service"}),
+    (["user-service/*.log"], {"logtype": "user-service", "service": "user-service"}),
+    (["tournament-service/*.log", "notification-service/*.log", "file-service/*.log",
+      "stats-service/*.log", "match-service/*.log"],
+     {"logtype": "microservices"}),
+]
+
+COMMON_FIELDS = {"environment": "development", "service_group": "ft-transcendence", "datacenter": "local"}
+
+# main.conf "Extract basic fields" .. "security-specific fields", in order
+FLATTEN_RULES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("log_timestamp", ("timestamp",)),
+    ("log_level", ("level",)),
+    ("log_message", ("message",)),
+    ("log_service", ("service",)),
+    ("request_id", ("request_id",)),
+    ("user_id", ("user_id",)),
+    ("username", ("username",)),
+    ("session_id", ("session_id",)),
+    ("action", ("action",)),
+    ("success", ("success",)),
+    ("request_method", ("request", "method")),
+    ("request_url", ("request", "url")),
+    ("request_ip", ("request", "ip")),
+    ("request_user_agent", ("request", "user_agent")),
+    ("response_status", ("response", "status")),
+    ("response_time", ("response", "time")),
+    ("response_duration", ("response", "duration")),
+    ("error_message", ("error",)),
+    ("error_reason", ("error_reason",)),
+    ("error_code", ("error_code",)),
+    ("game_id", ("game_id",)),
+    ("match_id", ("match_id",)),
+    ("tournament_id", ("tournament_id",)),
+    ("event_type", ("event_type",)),
+    ("message_id", ("message_id",)),
+    ("channel_id", ("channel_id",)),
+    ("to_username", ("to_username",)),
+    ("security_event", ("security_event",)),
+    ("threat_level", ("threat_level",)),
+    ("source_ip", ("source_ip",)),
+]
+
+SERVICE_TAGS = {
+    "auth-service": ["authentication", "security"],
+    "api-gateway": ["gateway", "routing"],
+    "chat-service": ["messaging", "realtime"],
+    "game-service": ["gaming", "realtime"],
+    "user-service": ["user-management"],
+}
+
+REMOVED_FIELDS = ("message", "host", "agent", "ecs", "extracted_service", "log_service", "clientip",
+                  "verb", "request", "httpversion", "response", "bytes", "referrer", "auth")
+
+# main.conf output: index name part per logtype; other logtypes are used as they are
+INDEX_SUFFIXES = {"security-events": "security", "chat-messages": "chat",
+                  "game-events": "game", "api-gateway": "gateway"}
+
+STAGES = ("read", "service", "json", "flatten", "date", "normalize", "tags", "cleanup", "index")
+
+_SERVICE_PATTERNS = [
+    re.compile(r"/var/log/ft-transcendence/(?P<extracted_service>[^/]+)/.*"),
+    re.compile(r"/var/log/nginx/ft-transcendence-(?P<extracted_service>[^-]+)-.*"),
+    re.compile(r"/var/log/(?P<extracted_service>nginx)/.*"),
+]
+_JSON_RE = re.compile(r"^\s*\{.*\}\s*$")
+_LEVEL_RE = re.compile(r"(DEBUG|INFO|WARN|ERROR|FATAL|TRACE)")
+_MISSING = object()
+
+
+def _glob_match(relative: str, pattern: str) -> bool:
+    """filebeat glob semantics: ``*`` never crosses a path separator"""
+    parts, pattern_parts = relative.split("/"), pattern.split("/")
+    return len(parts) == len(pattern_parts) and all(
+        fnmatch.fnmatchcase(part, glob) for part, glob in zip(parts, pattern_parts))
+
+
+def input_fields(relative: str) -> Optional[Dict[str, str]]:
+    """Fields the matching filebeat input adds, or None if no input harvests the file"""
+    for patterns, fields in FILEBEAT_INPUTS:
+        if any(_glob_match(relative, pattern) for pattern in patterns):
+            return {**fields, **COMMON_FIELDS}
+    return None
+
+
+def index_suffix(logtype: Optional[str], service_name: Optional[str] = None) -> str:
+    """Part of the ``ft-transcendence-*`` index name main.conf picks from an event's logtype or service"""
+    if logtype:
+        return INDEX_SUFFIXES.get(logtype, logtype)
+    return service_name or "logs"
+
+
+def _sprintf(value: Any) -> str:
+    """How Logstash renders ``%{[field]}`` for a JSON value"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return str(value)
+
+
+def _lookup(parsed: Dict, path: Tuple[str, ...]) -> Any:
+    value: Any = parsed
+    for key in path:
+        if not isinstance(value, dict):
+            return _MISSING
+        value = value.get(key, _MISSING)
+    return value
+
+
+def _truthy(value: Any) -> bool:
+    # Logstash conditionals treat only nil and false as false
+    return value is not _MISSING and value is not None and value is not False
+
+
+def flatten_field(event: Dict, parsed: Dict, target: str, path: Tuple[str, ...]) -> bool:
+    """One ``if [parsed_json][..] { mutate add_field }`` step; True when it fired"""
+    value = _lookup(parsed, path)
+    if not _truthy(value):
+        return False
+    rendered = _sprintf(value)
+    existing = event.get(target)
+    # add_field on an existing field turns it into an array
+    if existing is None:
+        event[target] = rendered
+    elif isinstance(existing, list):
+        existing.append(rendered)
+    else:
+        event[target] = [existing, rendered]
+    return True
+
+
+def _parse_timestamp(text: str) -> Optional[datetime.datetime]:
+    try:
+        when = datetime.datetime.fromisoformat(text[:-1] if text.endswith("Z") else text)
+    except ValueError:
+        for pattern in ("%Y-%m-%d %H:%M:%S,%f", "%Y-%m-%d %H:%M:%S.%f"):
+            try:
+                return datetime.datetime.strptime(text, pattern)
+            except ValueError:
+                continue
+        return None
+    if when.tzinfo is not None:
+        when = when.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return when
+
+
+@dataclass
+class PipelineStats:
+    """Event counts and per-stage / per-field time for one replay"""
+    events: int = 0
+    json_events: int = 0
+    seconds: float = 0.0
+    stages: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    field_hits: Dict[str, int] = field(default_factory=lambda: {name: 0 for name, _ in FLATTEN_RULES})
+    field_costs: Dict[str, float] = field(default_factory=dict)
+    indices: Dict[str, int] = field(default_factory=dict)
+    tags: Dict[str, int] = field(default_factory=dict)
+    files: Dict[str, int] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+
+    @property
+    def events_per_sec(self) -> float:
+        return self.events / self.seconds if self.seconds > 0 else 0.0
+
+    def report(self) -> str:
+        lines = [f"Pipeline: {self.events} events ({self.json_events} JSON) in {self.seconds:.2f}s "
+                 f"= {self.events_per_sec:.0f} events/sec"]
+        for path, count in sorted(self.files.items()):
+            lines.append(f"  {path}: {count} events")
+        for path in self.skipped:
+            lines.append(f"  {path}: not harvested by any filebeat input (skipped)")
+
+        lines.append("Stages (us/event, share):")
+        total = sum(self.stages.values()) or 1.0
+        for stage in STAGES:
+            seconds = self.stages[stage]
+            lines.append(f"  {stage:10s} {1e6 * seconds / max(1, self.events):8.2f}  {100 * seconds / total:5.1f}%")
+
+        lines.append("Flattened fields (hit rate" + (", ns/event)" if self.field_costs else ")") + ":")
+        for name, _ in FLATTEN_RULES:
+            hits = self.field_hits[name]
+            rate = 100.0 * hits / max(1, self.json_events)
+            cost = f"  {self.field_costs[name]:7.0f}" if name in self.field_costs else ""
+            lines.append(f"  {name:20s} {rate:6.1f}%{cost}")
+
+        lines.append("Indices:")
+        for index, count in sorted(self.indices.items()):
+            lines.append(f"  {index}: {count}")
+        if self.tags:
+            lines.append("Tags: " + ", ".join(f"{tag}={count}" for tag, count in sorted(self.tags.items())))
+        return "\n".join(lines)
+
+
+class LogstashPipeline:
+    """Python replica of services/devops/logging/logstash/pipeline/main.conf"""
+
+    def __init__(self, include_unharvested: bool = False):
+        self.include_unharvested = include_unharvested
+        self.stats = PipelineStats()
+
+    def discover(self, root: Path) -> Iterator[Tuple[Path, str, Dict[str, str]]]:
+        """Log files under ``root`` laid out like LOG_ROOT, with their filebeat fields"""
+        for path in sorted(root.rglob("*.log")):
+            relative = path.relative_to(root).as_posix()
+            fields = input_fields(relative)
+            if fields is None:
+                if not self.include_unharvested:
+                    if relative not in self.stats.skipped:
+                        self.stats.skipped.append(relative)
+                    continue
+                fields = dict(COMMON_FIELDS)
+            yield path, relative, fields
+
+    def process(self, line: str, log_path: str, fields: Dict[str, str]) -> Dict:
+        """Run one filebeat event through the filter chain"""
+        stages = self.stats.stages
+        clock = time.perf_counter
+        started = clock()
+
+        event: Dict[str, Any] = {"message": line, "log": {"file": {"path": log_path}}, **fields}
+        event["@timestamp"] = datetime.datetime.utcnow()
+        event["tags"] = []
+
+        # Extract service name from log file path
+        for pattern in _SERVICE_PATTERNS:
+            match = pattern.match(log_path)
+            if match:
+                event["extracted_service"] = match.group("extracted_service")
+                break
+        else:
+            event["tags"].append("_grokparsefailure_service_extraction")
+        if "extracted_service" in event:
+            event["service_name"] = event["extracted_service"]
+        elif "service" in event:
+            event["service_name"] = event["service"]
+        checkpoint = clock()
+        stages["service"] += checkpoint - started
+
+        parsed = None
+        if _JSON_RE.match(line):
+            try:
+                parsed = json.loads(line)
+            except ValueError:
+                parsed = None
+            if not isinstance(parsed, dict):
+                parsed = None
+        elif (level := _LEVEL_RE.search(line)) is not None:
+            event["log_level"] = level.group(1)
+        else:
+            event["tags"].append("_grokparsefailure_loglevel")
+        now = clock()
+        stages["json"] += now - checkpoint
+        checkpoint = now
+
+        if parsed is not None:
+            self.stats.json_events += 1
+            hits = self.stats.field_hits
+            for target, path in FLATTEN_RULES:
+                if flatten_field(event, parsed, target, path):
+                    hits[target] += 1
+            if _truthy(parsed.get("service", _MISSING)) and "service_name" not in event:
+                event["service_name"] = _sprintf(parsed["service"])
+        now = clock()
+        stages["flatten"] += now - checkpoint
+        checkpoint = now
+
+        timestamp = event.get("log_timestamp")
+        if isinstance(timestamp, str):
+            when = _parse_timestamp(timestamp)
+            if when is None:
+                event["tags"].append("_dateparsefailure")
+            else:
+                event["@timestamp"] = when
+        now = clock()
+        stages["date"] += now - checkpoint
+        checkpoint = now
+
+        if isinstance(event.get("log_level"), str):
+            event["log_level"] = event["log_level"].upper()
+        for name, convert in (("response_status", int), ("response_time", float),
+                              ("response_duration", float)):
+            if isinstance(event.get(name), str):
+                try:
+                    event[name] = convert(float(event[name])) if convert is int else convert(event[name])
+                except ValueError:
+                    pass
+        if "environment" in event:
+            event["env"] = event["environment"]
+        if "datacenter" in event:
+            event["dc"] = event["datacenter"]
+        if "service_name" not in event and "log_service" in event:
+            event["service_name"] = event["log_service"]
+        now = clock()
+        stages["normalize"] += now - checkpoint
+        checkpoint = now
+
+        service_name = event.get("service_name")
+        if isinstance(service_name, str):
+            tags = SERVICE_TAGS.get(service_name)
+            if tags is None and "security" in service_name:
+                tags = ["security", "monitoring"]
+            if tags:
+                event["tags"].extend(tags)
+        now = clock()
+        stages["tags"] += now - checkpoint
+        checkpoint = now
+
+        for name in REMOVED_FIELDS:
+            event.pop(name, None)
+        now = clock()
+        stages["cleanup"] += now - checkpoint
+        checkpoint = now
+
+        day = event["@timestamp"].strftime("%Y.%m.%d")
+        index = f"ft-transcendence-{index_suffix(event.get('logtype'), service_name)}-{day}"
+        event["@metadata"] = {"index_name": index}
+        stages["index"] += clock() - checkpoint
+
+        self.stats.indices[index] = self.stats.indices.get(index, 0) + 1
+        for tag in event["tags"]:
+            self.stats.tags[tag] = self.stats.tags.get(tag, 0) + 1
+        return event
+
+    def run(self, root: Path, limit: Optional[int] = None, output=None) -> PipelineStats:
+        """Stream every harvested file under ``root`` through the pipeline"""
+        stats = self.stats
+        started = time.perf_counter()
+        for path, relative, fields in self.discover(root):
+            log_path = f"{LOG_ROOT}/{relative}"
+            count = 0
+            read_started = time.perf_counter()
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for raw in f:
+                    line = raw.rstrip("\n")
+                    if not line:
+                        continue
+                    stats.stages["read"] += time.perf_counter() - read_started
+                    event = self.process(line, log_path, fields)
+                    if output is not None:
+                        output.write(json.dumps(event, default=_json_default) + "\n")
+                    count += 1
+                    stats.events += 1
+                    if limit is not None and stats.events >= limit:
+                        break
+                    read_started = time.perf_counter()
+            stats.files[relative] = count
+            if limit is not None and stats.events >= limit:
+                break
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def measure_field_costs(self, root: Path, limit: int = 50000) -> Dict[str, float]:
+        """ns/event of each flatten rule, timed in isolation over a sample of parsed events"""
+        sample = []
+        for path, _, _ in self.discover(root):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if _JSON_RE.match(line):
+                        try:
+                            parsed = json.loads(line)
+                        except ValueError:
+                            continue
+                        if isinstance(parsed, dict):
+                            sample.append(parsed)
+                    if len(sample) >= limit:
+                        break
+            if len(sample) >= limit:
+                break
+        if not sample:
+            return {}
+
+        costs = {}
+        for target, rule_path in FLATTEN_RULES:
+            events = [{} for _ in sample]
+            started = time.perf_counter()
+            for event, parsed in zip(events, sample):
+                flatten_field(event, parsed, target, rule_path)
+            costs[target] = 1e9 * (time.perf_counter() - started) / len(sample)
+        self.stats.field_costs = costs
+        return costs
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat() + "Z"
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay generator output through a Python copy of "
+                                                 "the Logstash main.conf pipeline")
+    parser.add_argument("root", type=Path, nargs="?", default=Path(LOG_ROOT),
+                        help=f"Directory laid out like {LOG_ROOT} (default: that directory)")
+    parser.add_argument("--all", action="store_true",
+                        help="Also process *.log files no filebeat input harvests")
+    parser.add_argument("--limit", type=int, help="Stop after N events")
+    parser.add_argument("--output", type=Path, help="Write the processed events as NDJSON")
+    parser.add_argument("--field-costs", action="store_true",
+                        help="Time every flatten rule in isolation (ns/event)")
+    args = parser.parse_args(argv)
+
+    if not args.root.is_dir():
+        parser.error(f"{args.root} is not a directory")
+
+    pipeline = LogstashPipeline(include_unharvested=args.all)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output:
+            pipeline.run(args.root, args.limit, output)
+    else:
+        pipeline.run(args.root, args.limit)
+    if args.field_costs:
+        pipeline.measure_field_costs(args.root)
+    print(pipeline.stats.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
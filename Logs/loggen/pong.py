@@ -0,0 +1,225 @@
+"""
+Pong physics for the ft-transcendence game-service generator
+Thousands of concurrent matches live in parallel columns (ball position and
+velocity, paddle positions, scores); each tick advances every column in one
+pass, and only matches whose ball left the court or whose player fired a
+power-up drop to per-match code, which returns the events that happened
+"""
+
+import math
+import random
+from typing import Any, List, NamedTuple, Optional
+
+# Court in abstract units; ball speeds match the 50-150 range game-service logs have always used
+COURT_WIDTH = 100.0
+COURT_HEIGHT = 60.0
+PADDLE_HALF = 6.0
+SERVE_SPEED = 50.0
+MAX_SPEED = 150.0
+# Every paddle hit speeds the ball up, so long rallies end in a miss
+SPEEDUP = 1.06
+# Largest angle off the horizontal a ball leaves the paddle at (hit on the paddle's edge)
+MAX_BOUNCE_ANGLE = math.radians(55.0)
+MAX_SERVE_ANGLE = math.radians(30.0)
+# Paddle speed in units/s for skill 0 and its gain per skill point (skills run 1-100)
+PADDLE_SPEED = 30.0
+PADDLE_SPEED_PER_SKILL = 0.35
+# Standard deviation of where a skill-0 paddle aims, relative to the ball; shrinks with skill
+AIM_ERROR = 7.0
+POINTS_TO_WIN = 11
+POWER_UPS = ("speed_boost", "large_paddle", "slow_ball")
+# Mean seconds between power-ups in one match
+POWER_UP_INTERVAL = 30.0
+DEFAULT_TICK = 0.05
+
+_INF = float("inf")
+_MIDDLE = COURT_HEIGHT / 2
+
+
+class PongEvent(NamedTuple):
+    """Something that happened in the match in ``slot``; ``side`` is 1 or 2
+
+    ``detail`` depends on ``kind``: ``(ball_speed, hit_type)`` for ball_hit,
+    ``(score1, score2)`` for player_scored, the power-up name for
+    power_up_used and ``(score1, score2, seconds)`` for match_ended.
+    """
+    kind: str
+    slot: int
+    side: int
+    detail: Any
+
+
+class PongArena:
+    """Fixed number of match slots advanced together, ``tick`` seconds at a time
+
+    Start a match in a free slot with ``start(slot, skill1, skill2)``;
+    ``step()`` moves every ball and paddle and returns the tick's events.
+    A slot is free again once its match_ended event has been returned.
+    Paddles are AIs: the defending one chases the ball with an aim error
+    and top speed set by its player's skill, the other drifts back to the
+    middle.
+    """
+
+    def __init__(self, size: int, tick: float = DEFAULT_TICK, rng: Optional[random.Random] = None):
+        if size <= 0:
+            raise ValueError("an arena needs at least one slot")
+        if tick <= 0:
+            raise ValueError("tick must be positive")
+        self.size = size
+        self.tick = tick
+        self.rng = rng or random.Random()
+        self.now = 0.0
+        self.x = [COURT_WIDTH / 2] * size
+        self.y = [_MIDDLE] * size
+        self.vx = [0.0] * size
+        self.vy = [0.0] * size
+        self.paddle1 = [_MIDDLE] * size
+        self.paddle2 = [_MIDDLE] * size
+        # Distance each paddle may move per tick, and its current half-height
+        self.reach1 = [0.0] * size
+        self.reach2 = [0.0] * size
+        self.half1 = [PADDLE_HALF] * size
+        self.half2 = [PADDLE_HALF] * size
+        # Offset from the ball the defending paddle aims at during this crossing
+        self.aim = [0.0] * size
+        self.skill1 = [0] * size
+        self.skill2 = [0] * size
+        self.score1 = [0] * size
+        self.score2 = [0] * size
+        self.last_hit = [1] * size
+        self.power_at = [_INF] * size
+        self.started_at = [0.0] * size
+        self.active = [False] * size
+        self.counts = {"ball_hit": 0, "player_scored": 0, "power_up_used": 0, "match_ended": 0}
+
+    def start(self, slot: int, skill1: int, skill2: int):
+        """Begin a match in ``slot`` between players of the given skills (1-100)"""
+        if self.active[slot]:
+            raise ValueError(f"slot {slot} already holds a match")
+        self.active[slot] = True
+        self.skill1[slot] = skill1
+        self.skill2[slot] = skill2
+        self.reach1[slot] = (PADDLE_SPEED + PADDLE_SPEED_PER_SKILL * skill1) * self.tick
+        self.reach2[slot] = (PADDLE_SPEED + PADDLE_SPEED_PER_SKILL * skill2) * self.tick
+        self.paddle1[slot] = self.paddle2[slot] = _MIDDLE
+        self.score1[slot] = self.score2[slot] = 0
+        self.started_at[slot] = self.now
+        self.power_at[slot] = self.now + self.rng.expovariate(1.0 / POWER_UP_INTERVAL)
+        self._serve(slot, self.rng.choice((1, 2)))
+
+    def _serve(self, slot: int, toward: int):
+        """Put the ball in the middle, moving toward player ``toward``"""
+        angle = self.rng.uniform(-MAX_SERVE_ANGLE, MAX_SERVE_ANGLE)
+        self.x[slot] = COURT_WIDTH / 2
+        self.y[slot] = _MIDDLE
+        self.vx[slot] = SERVE_SPEED * math.cos(angle) * (-1.0 if toward == 1 else 1.0)
+        self.vy[slot] = SERVE_SPEED * math.sin(angle)
+        self.half1[slot] = self.half2[slot] = PADDLE_HALF
+        self.last_hit[slot] = 2 if toward == 1 else 1
+        self._new_aim(slot, toward)
+
+    def _new_aim(self, slot: int, defender: int):
+        skill = self.skill1[slot] if defender == 1 else self.skill2[slot]
+        self.aim[slot] = self.rng.gauss(0.0, AIM_ERROR * (101 - skill) / 100)
+
+    def step(self) -> List[PongEvent]:
+        """Advance every match by one tick and return what happened"""
+        dt = self.tick
+        self.now += dt
+        now = self.now
+        vx, aim = self.vx, self.aim
+        x = self.x = [bx + v * dt for bx, v in zip(self.x, vx)]
+        y = self.y = [by + v * dt for by, v in zip(self.y, self.vy)]
+        # The paddle the ball is heading for chases it, the other one recentres
+        self.paddle1 = [p + max(-r, min(r, (by + a if v < 0 else _MIDDLE) - p))
+                        for p, r, by, a, v in zip(self.paddle1, self.reach1, y, aim, vx)]
+        self.paddle2 = [p + max(-r, min(r, (by + a if v > 0 else _MIDDLE) - p))
+                        for p, r, by, a, v in zip(self.paddle2, self.reach2, y, aim, vx)]
+        # One scan finds the few matches that need per-match work this tick
+        due = [slot for slot, (bx, by, at) in enumerate(zip(x, y, self.power_at))
+               if at <= now or not (0.0 <= bx <= COURT_WIDTH and 0.0 <= by <= COURT_HEIGHT)]
+        events: List[PongEvent] = []
+        for slot in due:
+            self._resolve(slot, events)
+        counts = self.counts
+        for event in events:
+            counts[event.kind] += 1
+        return events
+
+    def _resolve(self, slot: int, events: List[PongEvent]):
+        if self.power_at[slot] <= self.now:
+            self._power_up(slot, events)
+        by = self.y[slot]
+        if by < 0.0 or by > COURT_HEIGHT:
+            self.y[slot] = -by if by < 0.0 else 2 * COURT_HEIGHT - by
+            self.vy[slot] = -self.vy[slot]
+            events.append(PongEvent("ball_hit", slot, self.last_hit[slot], (self._speed(slot), "wall")))
+        bx = self.x[slot]
+        if bx < 0.0:
+            self._goal_line(slot, 1, events)
+        elif bx > COURT_WIDTH:
+            self._goal_line(slot, 2, events)
+
+    def _speed(self, slot: int) -> int:
+        return round(math.hypot(self.vx[slot], self.vy[slot]))
+
+    def _goal_line(self, slot: int, side: int, events: List[PongEvent]):
+        """The ball reached player ``side``'s line: a return, or a point for the other player"""
+        paddle = self.paddle1[slot] if side == 1 else self.paddle2[slot]
+        half = self.half1[slot] if side == 1 else self.half2[slot]
+        offset = self.y[slot] - paddle
+        if abs(offset) <= half:
+            bx = self.x[slot]
+            self.x[slot] = -bx if side == 1 else 2 * COURT_WIDTH - bx
+            speed = min(math.hypot(self.vx[slot], self.vy[slot]) * SPEEDUP, MAX_SPEED)
+            angle = offset / half * MAX_BOUNCE_ANGLE
+            self.vx[slot] = speed * math.cos(angle) * (1.0 if side == 1 else -1.0)
+            self.vy[slot] = speed * math.sin(angle)
+            self.last_hit[slot] = side
+            self._new_aim(slot, 2 if side == 1 else 1)
+            events.append(PongEvent("ball_hit", slot, side, (round(speed), "paddle")))
+            return
+        if side == 1:
+            self.score2[slot] += 1
+        else:
+            self.score1[slot] += 1
+        scorer = 2 if side == 1 else 1
+        score = (self.score1[slot], self.score2[slot])
+        events.append(PongEvent("player_scored", slot, scorer, score))
+        if max(score) >= POINTS_TO_WIN:
+            events.append(PongEvent("match_ended", slot, scorer,
+                                    score + (round(self.now - self.started_at[slot]),)))
+            self._stop(slot)
+        else:
+            # The player who conceded receives the next serve
+            self._serve(slot, side)
+
+    def _power_up(self, slot: int, events: List[PongEvent]):
+        """A player fires a power-up; it changes the ball or their paddle until the point ends"""
+        rng = self.rng
+        side = rng.choice((1, 2))
+        kind = rng.choice(POWER_UPS)
+        if kind == "large_paddle":
+            if side == 1:
+                self.half1[slot] = PADDLE_HALF * 1.5
+            else:
+                self.half2[slot] = PADDLE_HALF * 1.5
+        else:
+            speed = math.hypot(self.vx[slot], self.vy[slot])
+            target = min(speed * 1.3, MAX_SPEED) if kind == "speed_boost" else max(speed * 0.7, SERVE_SPEED * 0.6)
+            self.vx[slot] *= target / speed
+            self.vy[slot] *= target / speed
+        self.power_at[slot] = self.now + rng.expovariate(1.0 / POWER_UP_INTERVAL)
+        events.append(PongEvent("power_up_used", slot, side, kind))
+
+    def _stop(self, slot: int):
+        self.active[slot] = False
+        self.x[slot] = COURT_WIDTH / 2
+        self.y[slot] = _MIDDLE
+        self.vx[slot] = self.vy[slot] = 0.0
+        self.reach1[slot] = self.reach2[slot] = 0.0
+        self.power_at[slot] = _INF
+
+    def report(self) -> str:
+        counts = ", ".join(f"{kind}={count}" for kind, count in self.counts.items())
+        return f"Pong arena: {self.size} slots, {self.now:.0f}s simulated\n  events: {counts}"
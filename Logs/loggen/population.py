@@ -0,0 +1,165 @@
+"""
+Columnar user populations for the ft-transcendence log generators
+Users live in parallel typed arrays (16 bytes each), so ten million of them
+take about 160 MB; names, IDs and addresses are rendered on access, and
+views over a population drop into code written for plain lists
+"""
+
+import functools
+import random
+import uuid
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Optional
+
+DEFAULT_NAMES = ("alice", "bob", "charlie", "diana", "eve", "frank", "grace", "henry",
+                 "iris", "jack", "karen", "leo", "mia", "noah", "olivia", "paul")
+DEFAULT_USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15",
+    "Mozilla/5.0 (Android 10; Mobile; rv:81.0) Gecko/81.0 Firefox/81.0",
+)
+
+_COUNT_UNITS = {"": 1, "k": 1_000, "m": 1_000_000, "g": 1_000_000_000}
+_MASK64 = (1 << 64) - 1
+
+
+def parse_count(text: str) -> int:
+    """Parse a count such as ``50000``, ``250k`` or ``10M``"""
+    value = str(text).strip().lower()
+    unit = value[-1] if value and value[-1] in _COUNT_UNITS else ""
+    count = int(float(value[:len(value) - len(unit)]) * _COUNT_UNITS[unit])
+    if count <= 0:
+        raise ValueError(f"count must be positive, got '{text}'")
+    return count
+
+
+def mix64(value: int) -> int:
+    """SplitMix64 finaliser: spreads a 64-bit token into an unrelated-looking one"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def token_uuid(token: int) -> str:
+    """Render a 64-bit token as a stable version-4 UUID string"""
+    return str(uuid.UUID(int=(token << 64) | mix64(token), version=4))
+
+
+class PopulationView(Sequence):
+    """Read-only list of whatever ``render(index)`` builds, over a range of user indices"""
+
+    __slots__ = ("_render", "_indices")
+
+    def __init__(self, render: Callable[[int], Any], indices: range):
+        self._render = render
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return PopulationView(self._render, self._indices[position])
+        return self._render(self._indices[position])
+
+
+class Population:
+    """Simulated users stored column by column
+
+    Every user has a session token, an IPv4 address, a user-agent choice, a
+    skill level and a games-played count; IDs and names are derived from the
+    user's index. The same size and seed always give the same users, so
+    separate generator processes agree on who exists.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = 0, names=DEFAULT_NAMES,
+                 user_agents=DEFAULT_USER_AGENTS):
+        if size < 1:
+            raise ValueError("population size must be at least 1")
+        self.size = size
+        self.seed = seed
+        self.names = tuple(names)
+        self.user_agents = tuple(user_agents)
+        self.rng = random.Random(seed)
+        # randbytes fills each column in one C call instead of a Python loop per user
+        self.sessions = array("Q")
+        self.sessions.frombytes(self.rng.randbytes(8 * size))
+        self.addresses = array("I")
+        self.addresses.frombytes(self.rng.randbytes(4 * size))
+        self.agents = array("B", self.rng.randbytes(size))
+        self.skills = array("B", self.rng.randbytes(size))
+        self.games = array("H")
+        self.games.frombytes(self.rng.randbytes(2 * size))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __reduce__(self):
+        # Worker processes rebuild the columns from the seed instead of receiving them
+        return Population, (self.size, self.seed, self.names, self.user_agents)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column)
+                   for column in (self.sessions, self.addresses, self.agents, self.skills, self.games))
+
+    def user_id(self, index: int) -> str:
+        return f"user_{index + 1:07d}"
+
+    def username(self, index: int) -> str:
+        names = self.names
+        if index < len(names):
+            return names[index]
+        return f"{names[index % len(names)]}{index // len(names)}"
+
+    def session_id(self, index: int) -> str:
+        return token_uuid(self.sessions[index])
+
+    def renew_session(self, index: int) -> str:
+        """Give user ``index`` a fresh session (a new login) and return its ID"""
+        self.sessions[index] = self.rng.getrandbits(64)
+        return self.session_id(index)
+
+    def ip_address(self, index: int) -> str:
+        address = self.addresses[index]
+        return f"{(address >> 24) % 223 + 1}.{(address >> 16) & 255}.{(address >> 8) & 255}.{address & 255}"
+
+    def user_agent(self, index: int) -> str:
+        return self.user_agents[self.agents[index] % len(self.user_agents)]
+
+    def skill_level(self, index: int) -> int:
+        return self.skills[index] % 100 + 1
+
+    def games_played(self, index: int) -> int:
+        return self.games[index] % 501
+
+    def column(self, name: str) -> PopulationView:
+        """One attribute of every user, e.g. ``column("username")``"""
+        return PopulationView(getattr(self, name), range(self.size))
+
+    def view(self, build: Callable[["Population", int], Any]) -> PopulationView:
+        """Every user as built by ``build(population, index)``"""
+        return PopulationView(functools.partial(build, self), range(self.size))
+
+    def rooms(self, per_room: int = 1000, minimum: int = 6) -> int:
+        """How many chat rooms a population this size should have"""
+        return max(minimum, self.size // per_room)
+
+
+def add_population_arguments(parser):
+    """Add the shared ``--population`` options to an argparse parser"""
+    parser.add_argument("--population", type=parse_count,
+                        help="Simulate this many users (e.g. 250k, 10M) instead of the built-in sample")
+    parser.add_argument("--population-seed", type=int, default=0,
+                        help="Seed of the population; processes with the same seed share the same users")
+
+
+def build_population(args) -> Optional[Population]:
+    """Population selected by the options from ``add_population_arguments``"""
+    if getattr(args, "population", None) is None:
+        return None
+    return Population(args.population, args.population_seed)
@@ -0,0 +1,122 @@
+"""
+Elo ratings for the ft-transcendence game-service generator
+Ratings live in compact arrays keyed by player index and change by the Elo
+rule after every match result; outcomes follow the Elo expectation on each
+player's true strength (from their skill level), so published ratings
+drift toward it the way a real ladder's do
+"""
+
+import statistics
+from array import array
+from typing import Callable, List, Sequence, Tuple
+
+INITIAL_RATING = 1200.0
+# True strength is this plus the per-point gain times skill_level (1-100)
+STRENGTH_BASE = 900.0
+STRENGTH_PER_SKILL = 12.0
+# K-factor while a player is provisional (fewer games than PROVISIONAL_GAMES), and after
+K_PROVISIONAL = 40.0
+K_ESTABLISHED = 20.0
+PROVISIONAL_GAMES = 30
+
+# One finished match: (winner, loser, winner before, winner after, loser before, loser after,
+# winner's and loser's rated games including this one)
+RatingResult = Tuple[int, int, float, float, float, float, int, int]
+
+
+class RatingTable:
+    """Elo ratings and rated-game counts of ``size`` players, 8 bytes each
+
+    A player's rating is set on first use: players with a history
+    (``history(index)`` earlier games) start between the initial rating
+    and their true strength, newcomers at the initial rating, so a large
+    population needs no upfront pass. ``skill(index)`` gives the
+    skill_level behind the true strength.
+    """
+
+    def __init__(self, size: int, skill: Callable[[int], int], history: Callable[[int], int],
+                 initial: float = INITIAL_RATING):
+        if size < 2:
+            raise ValueError("ratings need at least two players")
+        self.size = size
+        self.skill = skill
+        self.history = history
+        self.initial = initial
+        # 0.0 marks a player whose rating has not been set yet
+        self._rating = array("f", bytes(4 * size))
+        self._games = array("I", bytes(4 * size))
+        self.results = 0
+        self.upsets = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self._rating, self._games))
+
+    def strength(self, index: int) -> float:
+        """True playing strength on the rating scale"""
+        return STRENGTH_BASE + STRENGTH_PER_SKILL * self.skill(index)
+
+    def rating(self, index: int) -> float:
+        rating = self._rating[index]
+        if rating == 0.0:
+            rating = self._rating[index] = self._start_rating(index)
+        return rating
+
+    def _start_rating(self, index: int) -> float:
+        played = self.history(index)
+        weight = played / (played + PROVISIONAL_GAMES)
+        return self.initial + (self.strength(index) - self.initial) * weight
+
+    def games(self, index: int) -> int:
+        """Rated games so far, earlier history included"""
+        return self.history(index) + self._games[index]
+
+    @staticmethod
+    def expected(rating: float, opponent: float) -> float:
+        """Elo expected score of a player rated ``rating`` against ``opponent``"""
+        return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / 400.0))
+
+    def win_probability(self, first: int, second: int) -> float:
+        """Chance ``first`` beats ``second``, from their true strengths"""
+        return self.expected(self.strength(first), self.strength(second))
+
+    def record(self, winner: int, loser: int) -> RatingResult:
+        """Apply one result and return the ratings before and after"""
+        rating, games = self._rating, self._games
+        before_w, before_l = self.rating(winner), self.rating(loser)
+        expected_w = 1.0 / (1.0 + 10.0 ** ((before_l - before_w) / 400.0))
+        k_w = K_PROVISIONAL if self.games(winner) < PROVISIONAL_GAMES else K_ESTABLISHED
+        k_l = K_PROVISIONAL if self.games(loser) < PROVISIONAL_GAMES else K_ESTABLISHED
+        rating[winner] = before_w + k_w * (1.0 - expected_w)
+        rating[loser] = before_l - k_l * (1.0 - expected_w)
+        games[winner] += 1
+        games[loser] += 1
+        self.results += 1
+        if expected_w < 0.5:
+            self.upsets += 1
+        return (winner, loser, before_w, rating[winner], before_l, rating[loser],
+                self.games(winner), self.games(loser))
+
+    def play(self, first: int, second: int, draw: float) -> RatingResult:
+        """Decide a match with ``draw`` (uniform on [0, 1)) and record it"""
+        if draw < self.win_probability(first, second):
+            return self.record(first, second)
+        return self.record(second, first)
+
+    def play_many(self, firsts: Sequence[int], seconds: Sequence[int], draws: Sequence[float]) -> List[RatingResult]:
+        """Play a block of matches in order; a player may appear in several of them"""
+        play = self.play
+        return [play(first, second, draw) for first, second, draw in zip(firsts, seconds, draws)]
+
+    def report(self) -> str:
+        rated = [rating for rating in self._rating if rating]
+        lines = [f"Ratings: {self.results} results ({self.upsets} upsets), {len(rated)} of {self.size} "
+                 f"players rated ({self.nbytes} bytes)"]
+        if len(rated) >= 2:
+            cuts = statistics.quantiles(rated, n=100, method="inclusive")
+            lines.append(f"  mean {statistics.fmean(rated):.0f}, sd {statistics.pstdev(rated):.0f}, "
+                         f"p1 {cuts[0]:.0f}, median {cuts[49]:.0f}, p99 {cuts[98]:.0f}, top {max(rated):.0f}")
+        return "\n".join(lines)
@@ -0,0 +1,145 @@
+"""
+Size- and time-based log rotation for the ft-transcendence log generators
+Rotated segments are renamed out of filebeat's ``*.log`` globs and gzipped
+on a background thread, so rotation never blocks a generating thread
+"""
+
+import datetime
+import gzip
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+_SIZE_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as ``500000``, ``64k``, ``100M`` or ``2G`` into bytes"""
+    value = str(text).strip().lower().rstrip("b")
+    unit = value[-1] if value and value[-1] in _SIZE_UNITS else ""
+    size = int(float(value[:len(value) - len(unit)]) * _SIZE_UNITS[unit])
+    if size <= 0:
+        raise ValueError(f"size must be positive, got '{text}'")
+    return size
+
+
+class _Compressor:
+    """Background gzip of rotated segments, with retention of the newest ``keep``"""
+
+    def __init__(self, compress: bool, keep: Optional[int]):
+        self.compress = compress
+        self.keep = keep
+        self._queue: "queue.Queue[Path]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="loggen-rotation", daemon=True)
+                self._thread.start()
+        self._queue.put(path)
+
+    def drain(self):
+        """Block until every submitted segment has been processed"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                if self.compress:
+                    path = self._gzip(path)
+                if self.keep is not None:
+                    self._prune(path)
+            except OSError as e:
+                print(f"Rotation of {path} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _gzip(path: Path) -> Path:
+        target = path.with_name(path.name + ".gz")
+        with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        # A harvester still holding the old inode keeps reading it until it closes
+        path.unlink()
+        return target
+
+    def _prune(self, path: Path):
+        base = path.name[:path.name.index(".log.") + len(".log.")]
+        # Segments are processed in rotation order, so mtime orders them even
+        # when several share a timestamp
+        segments = sorted((p for p in path.parent.iterdir() if p.name.startswith(base)),
+                          key=lambda p: (p.stat().st_mtime, p.name))
+        for old in segments[:max(0, len(segments) - self.keep)]:
+            old.unlink()
+
+
+class RotationPolicy:
+    """When to rotate a log file and what to do with the rotated segment.
+
+    A file is rotated before a write would take it past ``max_bytes`` or
+    when the wall-clock hour changes (``hourly``). Rotation renames
+    ``chat.log`` to ``chat.log.20240101-130000`` and the writer reopens
+    ``chat.log``; the segment no longer matches ``*.log``, so filebeat
+    finishes it through the open handle without harvesting it twice.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, hourly: bool = False,
+                 compress: bool = True, keep: Optional[int] = None):
+        if max_bytes is None and not hourly:
+            raise ValueError("rotation needs max_bytes, hourly or both")
+        self.max_bytes = max_bytes
+        self.hourly = hourly
+        self._compressor = _Compressor(compress, keep)
+
+    @staticmethod
+    def period(now: Optional[float] = None) -> int:
+        """Wall-clock hour number used to detect hourly boundaries"""
+        return int((now if now is not None else time.time()) // 3600)
+
+    def due(self, size: int, incoming: int, opened_period: int) -> bool:
+        if self.max_bytes is not None and size > 0 and size + incoming > self.max_bytes:
+            return True
+        return self.hourly and self.period() != opened_period
+
+    def rotate(self, path: Path) -> Optional[Path]:
+        """Rename ``path`` to a timestamped segment and queue it for compression"""
+        if not path.exists():
+            return None
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        segment = path.with_name(f"{path.name}.{stamp}")
+        suffix = 1
+        while segment.exists() or segment.with_name(segment.name + ".gz").exists():
+            segment = path.with_name(f"{path.name}.{stamp}-{suffix}")
+            suffix += 1
+        path.rename(segment)
+        self._compressor.submit(segment)
+        return segment
+
+    def drain(self):
+        self._compressor.drain()
+
+
+def add_rotation_arguments(parser):
+    """Add the shared ``--rotate-*`` options to an argparse parser"""
+    parser.add_argument("--rotate-size", type=parse_size,
+                        help="Rotate a log file before it grows past this size, e.g. 100M")
+    parser.add_argument("--rotate-hourly", action="store_true",
+                        help="Rotate log files at every wall-clock hour")
+    parser.add_argument("--rotate-keep", type=int,
+                        help="Keep only the newest N rotated segments per file")
+    parser.add_argument("--no-compress", dest="rotate_compress", action="store_false",
+                        help="Leave rotated segments uncompressed")
+
+
+def build_rotation(args) -> Optional[RotationPolicy]:
+    """Rotation policy selected by the options from ``add_rotation_arguments``"""
+    if getattr(args, "rotate_size", None) is None and not getattr(args, "rotate_hourly", False):
+        return None
+    return RotationPolicy(args.rotate_size, args.rotate_hourly, args.rotate_compress, args.rotate_keep)
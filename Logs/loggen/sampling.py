@@ -0,0 +1,158 @@
+"""
+Random-sampling containers for the ft-transcendence log generators
+Keep simulated populations sampleable in O(1) however large they grow,
+and weighted choices O(1) however many options they have
+"""
+
+import functools
+import itertools
+import random
+from typing import Dict, Generic, Hashable, Iterator, List, Sequence, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Samples drawn per refill of AliasTable.draw()
+DRAW_BATCH = 256
+
+
+class IndexedDict(Generic[K, V]):
+    """Mapping with O(1) insert, delete and uniform random choice.
+
+    Keys live in a dense list alongside a key -> position index; deleting
+    swaps the last key into the freed slot, so ``choice()`` is a single
+    ``randrange`` instead of materialising ``list(d.keys())`` per draw.
+    """
+
+    def __init__(self):
+        self._keys: List[K] = []
+        self._values: Dict[K, V] = {}
+        self._positions: Dict[K, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __bool__(self) -> bool:
+        return bool(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._keys)
+
+    def __getitem__(self, key: K) -> V:
+        return self._values[key]
+
+    def __setitem__(self, key: K, value: V):
+        if key not in self._values:
+            self._positions[key] = len(self._keys)
+            self._keys.append(key)
+        self._values[key] = value
+
+    def __delitem__(self, key: K):
+        del self._values[key]
+        position = self._positions.pop(key)
+        last = self._keys.pop()
+        if position < len(self._keys):
+            self._keys[position] = last
+            self._positions[last] = position
+
+    def get(self, key: K, default=None):
+        return self._values.get(key, default)
+
+    def pop(self, key: K, *default):
+        if key not in self._values:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self._values[key]
+        del self[key]
+        return value
+
+    def keys(self):
+        return self._values.keys()
+
+    def values(self):
+        return self._values.values()
+
+    def items(self):
+        return self._values.items()
+
+    def choice(self, rng: random.Random = random) -> K:
+        """Uniformly random key; raises IndexError when empty"""
+        if not self._keys:
+            raise IndexError("cannot choose from an empty IndexedDict")
+        return self._keys[rng.randrange(len(self._keys))]
+
+    def choice_item(self, rng: random.Random = random) -> Tuple[K, V]:
+        key = self.choice(rng)
+        return key, self._values[key]
+
+
+class AliasTable(Generic[V]):
+    """Fixed weighted distribution over ``items`` with O(1) draws (Walker's alias method)
+
+    Built once in O(n) (Vose's construction): column ``i`` keeps item ``i``
+    with probability ``prob[i]`` and otherwise yields its alias, so a draw
+    is one ``rng.random()``, one int() and one comparison, where
+    ``random.choices(items, weights)`` rebuilds the cumulative weights on
+    every call. ``draw()`` hands out samples from a block of ``batch``
+    prefilled ones; ``sample(k)`` returns ``k`` at once.
+    """
+
+    def __init__(self, items: Sequence[V], weights: Sequence[float], rng: random.Random = random,
+                 batch: int = DRAW_BATCH):
+        if len(items) != len(weights):
+            raise ValueError("items and weights must have the same length")
+        total = float(sum(weights))
+        if not items or total <= 0 or any(weight < 0 for weight in weights):
+            raise ValueError("weights must be non-negative with a positive sum")
+        self.items: Tuple[V, ...] = tuple(items)
+        self.weights: Tuple[float, ...] = tuple(weights)
+        self.rng = rng
+        self.batch = batch
+
+        n = len(self.items)
+        scaled = [weight * n / total for weight in weights]
+        aliases = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            aliases[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1.0 up to rounding error
+        for i in small + large:
+            scaled[i] = 1.0
+        # r = rng.random() * n picks column int(r); its fraction is the coin, so the
+        # column keeps its own item while r < i + prob[i]
+        self._thresholds = tuple(i + p for i, p in enumerate(scaled))
+        self._aliased = tuple(self.items[alias] for alias in aliases)
+        # next() on a chain of prefilled blocks runs in C, as in ids.IdFactory
+        self.draw = functools.partial(next, itertools.chain.from_iterable(iter(self._refill, None)))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def choice(self) -> V:
+        """One sample, drawn on the spot"""
+        r = self.rng.random() * len(self.items)
+        i = int(r)
+        return self.items[i] if r < self._thresholds[i] else self._aliased[i]
+
+    def sample(self, k: int) -> List[V]:
+        """``k`` independent samples"""
+        n = len(self.items)
+        items, thresholds, aliased = self.items, self._thresholds, self._aliased
+        rnd = self.rng.random
+        return [items[i] if r < thresholds[i] else aliased[i]
+                for r in [rnd() * n for _ in range(k)]
+                for i in (int(r),)]
+
+    def _refill(self) -> List[V]:
+        return self.sample(self.batch)
+
+    def __call__(self) -> V:
+        return self.draw()
@@ -0,0 +1,628 @@
+"""
+Declarative traffic scenarios for the ft-transcendence log generators
+A JSON scenario describes phases per service (rate curves, event mixes,
+error-rate spikes, durations); it is compiled once into a precomputed arrival
+schedule, then replayed through every generator on one timeline
+
+Run from Logs/:  python -m loggen.scenario scenarios/tournament-final.json --root /tmp/logs
+"""
+
+import argparse
+import datetime
+import functools
+import heapq
+import itertools
+import json
+import random
+import re
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .beats import add_beats_arguments, build_beats_output
+from .bench import load_script
+from .bulk import add_bulk_arguments, build_bulk_sink
+from .clock import SimulatedClock, WallClock
+from .metrics import add_metrics_arguments, serve_metrics
+from .pipeline import LOG_ROOT
+from .population import Population, add_population_arguments, build_population
+from .rotation import add_rotation_arguments, build_rotation
+from .sampling import AliasTable
+from .scheduler import ARRIVALS, parse_rate
+from .sinks import add_sink_arguments, build_sink
+
+_DURATION_RE = re.compile(r"^([0-9]*\.?[0-9]+)\s*(ms|s|m|h|d)?$")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0}
+
+# Arrival times are integrated over bins this long, so curves are exact to the second
+_BIN_SECONDS = 1.0
+
+
+def parse_duration(value) -> float:
+    """Parse a duration such as ``90``, ``90s``, ``15m`` or ``2h`` into seconds"""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = _DURATION_RE.match(str(value).strip().lower())
+        if match is None:
+            raise ValueError(f"invalid duration '{value}'")
+        seconds = float(match.group(1)) * _DURATION_UNITS[match.group(2) or "s"]
+    if seconds < 0:
+        raise ValueError(f"duration must not be negative, got '{value}'")
+    return seconds
+
+
+@dataclass(frozen=True)
+class ServiceSpec:
+    """How to build one generator and the events a scenario can ask it for"""
+    script: str
+    class_name: str
+    # Event name -> action run against the generator instance
+    events: Dict[str, Callable[[Any], None]]
+    # Default mix, used when a phase does not give one
+    mix: Dict[str, float]
+    # Events an ``errors`` rate is spread over
+    errors: Tuple[str, ...] = ("error",)
+
+
+SERVICES: Dict[str, ServiceSpec] = {
+    "chat-service": ServiceSpec(
+        "chat-service/Gen-Logs-chat-service.py", "ChatLogGenerator",
+        {
+            "message": lambda g: g.generate_message_sent_event(),
+            "join": lambda g: g.generate_user_join_event(),
+            "leave": lambda g: g.generate_user_leave_event(),
+            "connection": lambda g: g.generate_connection_event(),
+            "error": lambda g: g.generate_error_event(),
+            "security": lambda g: g.generate_security_event(),
+            "archive": lambda g: g.archive_messages(),
+            "stats": lambda g: g.generate_stats_log(),
+        },
+        # Same weights as the continuous workers
+        {"message": 40, "join": 10, "leave": 8, "connection": 15, "error": 12, "security": 8,
+         "archive": 2, "stats": 5},
+    ),
+    "chat-messages": ServiceSpec(
+        "chat-messages/Gen-Logs-chat-messages.py", "ChatLogGenerator",
+        {
+            "message": lambda g: g.write_log_entry(g.generate_chat_message_log()),
+            "tournament": lambda g: g.write_log_entry(g.generate_tournament_message_log()),
+            "error": lambda g: g.write_log_entry(g.generate_error_message_log()),
+            "archive": lambda g: g.write_log_entry(g.generate_chat_message_log(), archive=True),
+        },
+        {"message": 1},
+    ),
+    "game-service": ServiceSpec(
+        "game-service/Gen-Logs-game-service.py", "GameServiceLogGenerator",
+        {
+            "general": lambda g: g.generate_general_game_log(),
+            "events": lambda g: g.generate_game_events_log(),
+            "match": lambda g: g.generate_match_events_log(),
+            "error": lambda g: g.generate_game_error_log(),
+        },
+        {"general": 0.4, "events": 0.3, "match": 0.3, "error": 0.1},
+    ),
+    "user-service": ServiceSpec(
+        "user-service/GenLogs-user-service.py", "UserServiceLogGenerator",
+        {
+            "user": lambda g: g.write_log_entry(g.generate_user_log(), g.user_log_path),
+            "access": lambda g: g.write_log_entry(g.generate_access_log(), g.user_access_log_path),
+            "error": lambda g: g.write_log_entry(g.generate_error_log(), g.user_error_log_path),
+        },
+        {"user": 1, "access": 1, "error": 1},
+    ),
+    "file-service": ServiceSpec(
+        "user-service/Gen-logs-file-service.py", "FileServiceLogger",
+        {
+            "upload": lambda g: g.write_log(g.generate_upload_log()),
+            "download": lambda g: g.write_log(g.generate_download_log()),
+            "delete": lambda g: g.write_log(g.generate_delete_log()),
+            "metadata": lambda g: g.write_log(g.generate_metadata_log()),
+            "system": lambda g: g.write_log(g.generate_system_log()),
+            "error": lambda g: g.write_log(g.generate_upload_log(success=False)),
+        },
+        {"upload": 40, "download": 30, "delete": 10, "metadata": 15, "system": 5},
+    ),
+    "tournament-service": ServiceSpec(
+        "tournament-service/Gen-Logs-tournament-service.py", "TournamentServiceLogGenerator",
+        {
+            "tournament": lambda g: g.generate_tournament_log(),
+            "error": lambda g: g.generate_tournament_error_log(),
+        },
+        {"tournament": 0.9, "error": 0.1},
+    ),
+}
+
+
+def build_generators(services: List[str], root: Path, clock, rotation=None,
+                     seed: Optional[int] = None,
+                     population: Optional[Population] = None) -> Dict[str, Any]:
+    """One generator per service, writing under ``root/<service>`` and sharing ``clock``"""
+    generators: Dict[str, Any] = {}
+    for service in services:
+        spec = SERVICES[service]
+        kwargs: Dict[str, Any] = {"clock": clock, "rotation": rotation, "population": population}
+        if service == "chat-service":
+            kwargs["seed"] = seed
+        module = load_script(spec.script)
+        generators[service] = getattr(module, spec.class_name)(str(Path(root) / service), **kwargs)
+    return generators
+
+
+def attach_sinks(generators: Dict[str, Any], args):
+    """Swap each generator's writer for the bulk, Beats or stream sink selected on the command line"""
+    for service, generator in generators.items():
+        writer = getattr(generator, "writer", None)
+        if writer is None:
+            continue
+        sink = (build_bulk_sink(args, service) or build_beats_output(args, service, writer.base_dir)
+                or build_sink(args, service))
+        if sink is not None:
+            writer.close()
+            generator.writer = sink
+
+
+def close_generators(generators: Dict[str, Any], emitted: Dict[str, int]):
+    """Flush every generator's output and print what each one wrote"""
+    for service, generator in generators.items():
+        writer = getattr(generator, "writer", None)
+        if writer is not None:
+            writer.close()
+            print(f"{service}: {emitted.get(service, 0)} events\n{writer.report()}")
+        else:
+            print(f"{service}: {emitted.get(service, 0)} events")
+
+
+class RateCurve:
+    """Events/sec over the seconds of one phase.
+
+    ``points`` are ``(offset, rate)`` pairs interpolated linearly, or
+    geometrically with ``shape="exponential"``; ``step`` holds each rate
+    until the next point. The last rate holds to the end of the phase.
+    """
+
+    SHAPES = ("linear", "exponential", "step")
+
+    def __init__(self, points: List[Tuple[float, float]], shape: str = "linear"):
+        if not points:
+            raise ValueError("a rate curve needs at least one point")
+        if shape not in self.SHAPES:
+            raise ValueError(f"curve shape must be one of {self.SHAPES}, got '{shape}'")
+        if any(rate < 0 for _, rate in points):
+            raise ValueError("rates must not be negative")
+        if shape == "exponential" and any(rate <= 0 for _, rate in points):
+            raise ValueError("exponential curves need positive rates")
+        self.points = sorted(points)
+        self.shape = shape
+
+    @classmethod
+    def constant(cls, rate: float) -> "RateCurve":
+        return cls([(0.0, rate)])
+
+    @property
+    def is_constant(self) -> bool:
+        return len({rate for _, rate in self.points}) == 1
+
+    @property
+    def peak(self) -> float:
+        return max(rate for _, rate in self.points)
+
+    def rate(self, offset: float) -> float:
+        points = self.points
+        if offset <= points[0][0]:
+            return points[0][1]
+        for (t0, r0), (t1, r1) in zip(points, points[1:]):
+            if offset < t1:
+                if self.shape == "step":
+                    return r0
+                fraction = (offset - t0) / (t1 - t0)
+                if self.shape == "exponential":
+                    return r0 * (r1 / r0) ** fraction
+                return r0 + (r1 - r0) * fraction
+        return points[-1][1]
+
+    def scaled(self, factor: float) -> "RateCurve":
+        return RateCurve([(t, rate * factor) for t, rate in self.points], self.shape)
+
+
+def _parse_rate_value(value, base: Optional[float]) -> float:
+    """A rate as events/sec: ``200``, ``"5k/s"``, or ``"30x"`` of the service's baseline rate"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    if text.endswith("x"):
+        if base is None:
+            raise ValueError(f"relative rate '{value}' needs a constant baseline rate for the service")
+        return float(text[:-1]) * base
+    return parse_rate(text)
+
+
+def parse_curve(value, duration: float, base: Optional[float] = None) -> RateCurve:
+    """Rate curve from a scenario ``rate``: a constant, ``{"from", "to", "shape"}`` or ``{"points"}``"""
+    if not isinstance(value, dict):
+        return RateCurve.constant(_parse_rate_value(value, base))
+    shape = value.get("shape", "linear")
+    if "points" in value:
+        points = [(parse_duration(offset), _parse_rate_value(rate, base)) for offset, rate in value["points"]]
+        return RateCurve(points, shape)
+    if "from" not in value or "to" not in value:
+        raise ValueError(f"rate curve needs 'from' and 'to' or 'points': {value}")
+    start, end = _parse_rate_value(value["from"], base), _parse_rate_value(value["to"], base)
+    if shape == "step":
+        # A step switches halfway through unless told otherwise
+        at = parse_duration(value.get("at", duration / 2))
+        return RateCurve([(0.0, start), (at, end)], "step")
+    return RateCurve([(0.0, start), (duration, end)], shape)
+
+
+@dataclass
+class StreamPlan:
+    """What one service does during one phase"""
+    curve: RateCurve
+    weights: List[float]
+
+
+@dataclass
+class Phase:
+    name: str
+    start: float
+    duration: float
+    streams: Dict[str, StreamPlan] = field(default_factory=dict)
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+
+def _mix_weights(service: str, mix: Optional[Dict[str, float]], errors: Optional[float]) -> List[float]:
+    spec = SERVICES[service]
+    mix = spec.mix if mix is None else mix
+    unknown = set(mix) - set(spec.events)
+    if unknown:
+        raise ValueError(f"{service} has no events {sorted(unknown)}; choose from {sorted(spec.events)}")
+    weights = [float(mix.get(name, 0.0)) for name in spec.events]
+    if errors is None:
+        if sum(weights) <= 0:
+            raise ValueError(f"{service} mix has no positive weight")
+        return weights
+    if not 0.0 <= errors <= 1.0:
+        raise ValueError(f"{service} errors must be a fraction between 0 and 1, got {errors}")
+
+    # Spread ``errors`` over the error events and the rest over everything else,
+    # keeping the relative weights the mix gives each group
+    is_error = [name in spec.errors for name in spec.events]
+    error_total = sum(w for w, e in zip(weights, is_error) if e)
+    other_total = sum(w for w, e in zip(weights, is_error) if not e)
+    if error_total <= 0:
+        weights = [1.0 if e else w for w, e in zip(weights, is_error)]
+        error_total = float(sum(is_error))
+    if other_total <= 0 and errors < 1.0:
+        raise ValueError(f"{service} mix has no non-error events to fill the other {1 - errors:.0%}")
+    return [errors * w / error_total if e else (1.0 - errors) * w / other_total
+            for w, e in zip(weights, is_error)]
+
+
+@dataclass
+class Scenario:
+    """A parsed scenario: a start time and consecutive phases of per-service streams"""
+    name: str
+    start: datetime.datetime
+    phases: List[Phase]
+    seed: int = 0
+    arrivals: str = "poisson"
+    description: str = ""
+
+    @property
+    def duration(self) -> float:
+        return self.phases[-1].end if self.phases else 0.0
+
+    @property
+    def services(self) -> List[str]:
+        return [name for name in SERVICES if any(name in phase.streams for phase in self.phases)]
+
+    @classmethod
+    def load(cls, path: Path) -> "Scenario":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls.from_dict(data, default_name=Path(path).stem)
+
+    @classmethod
+    def from_dict(cls, data: Dict, default_name: str = "scenario") -> "Scenario":
+        start = data.get("start")
+        start = (datetime.datetime.fromisoformat(start) if start
+                 else datetime.datetime.now().replace(microsecond=0))
+        if start.tzinfo is not None:
+            start = start.astimezone().replace(tzinfo=None)
+        arrivals = data.get("arrivals", "poisson")
+        if arrivals not in ARRIVALS:
+            raise ValueError(f"arrivals must be one of {ARRIVALS}, got '{arrivals}'")
+
+        baseline = data.get("services", {})
+        for service in baseline:
+            if service not in SERVICES:
+                raise ValueError(f"unknown service '{service}'; choose from {sorted(SERVICES)}")
+
+        phases: List[Phase] = []
+        offset = 0.0
+        for index, raw in enumerate(data.get("phases", [])):
+            name = raw.get("name", f"phase-{index + 1}")
+            if "at" in raw:
+                at = cls._resolve_at(raw["at"], start)
+                if at < offset:
+                    raise ValueError(f"phase '{name}' starts at {raw['at']}, before the previous phase ends")
+                if at > offset:
+                    # Fill the gap with the baseline so traffic never silently stops
+                    phases.append(cls._phase("baseline", offset, at - offset, baseline, {}))
+                offset = at
+            if "duration" not in raw:
+                raise ValueError(f"phase '{name}' needs a duration")
+            phase = cls._phase(name, offset, parse_duration(raw["duration"]), baseline, raw.get("services", {}))
+            phases.append(phase)
+            offset = phase.end
+        if not phases:
+            raise ValueError("a scenario needs at least one phase")
+
+        return cls(data.get("name", default_name), start, phases, int(data.get("seed", 0)), arrivals,
+                   data.get("description", ""))
+
+    @staticmethod
+    def _resolve_at(value: str, start: datetime.datetime) -> float:
+        """Seconds from ``start`` to an ``at`` given as ISO 8601 or a time of day on the start date"""
+        text = str(value)
+        if "T" in text or "-" in text:
+            when = datetime.datetime.fromisoformat(text)
+        else:
+            when = datetime.datetime.combine(start.date(), datetime.time.fromisoformat(text))
+        return (when - start).total_seconds()
+
+    @staticmethod
+    def _phase(name: str, offset: float, duration: float, baseline: Dict, overrides: Dict) -> Phase:
+        phase = Phase(name, offset, duration)
+        for service in list(baseline) + [s for s in overrides if s not in baseline]:
+            if service not in SERVICES:
+                raise ValueError(f"unknown service '{service}' in phase '{name}'")
+            base = baseline.get(service, {})
+            settings = {**base, **overrides.get(service, {})}
+            if "rate" not in settings:
+                raise ValueError(f"{service} has no rate in phase '{name}'")
+            base_rate = None
+            if "rate" in base and not isinstance(base["rate"], dict):
+                base_rate = _parse_rate_value(base["rate"], None)
+            curve = parse_curve(settings["rate"], duration, base_rate)
+            if curve.peak <= 0:
+                continue
+            phase.streams[service] = StreamPlan(curve, _mix_weights(service, settings.get("mix"),
+                                                                    settings.get("errors")))
+        return phase
+
+
+def _arrival_times(curve: RateCurve, start: float, duration: float, poisson: bool,
+                   rng: random.Random) -> array:
+    """Arrival offsets of one stream over one phase, integrating the curve bin by bin"""
+    times = array("d")
+    append = times.append
+    draw = rng.expovariate
+    # Constant arrivals fall on start + k / rate, the first one on start itself
+    need = draw(1.0) if poisson else 0.0
+    constant = curve.rate(0.0) if curve.is_constant else None
+    t = bin_start = 0.0
+    while bin_start < duration:
+        bin_end = min(bin_start + _BIN_SECONDS, duration) if constant is None else duration
+        lam = constant if constant is not None else curve.rate((bin_start + bin_end) / 2)
+        if lam > 0:
+            while True:
+                available = lam * (bin_end - t)
+                # Arrivals stay strictly inside [start, start + duration)
+                if need >= available:
+                    need -= available
+                    break
+                t += need / lam
+                append(start + t)
+                need = draw(1.0) if poisson else 1.0
+        t = bin_start = bin_end
+    return times
+
+
+class CompiledSchedule:
+    """Every arrival of a scenario, precomputed: per service, sorted offsets and event indices"""
+
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.services: List[str] = []
+        self.times: Dict[str, array] = {}
+        self.events: Dict[str, array] = {}
+        # Per phase, events per service
+        self.phase_counts: List[Dict[str, int]] = []
+        self.compile_seconds = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(times) for times in self.times.values())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.itemsize * len(t) + e.itemsize * len(e)
+                   for t, e in zip(self.times.values(), self.events.values()))
+
+    def merged(self) -> Iterator[Tuple[float, int, int]]:
+        """``(offset, service index, event index)`` for every arrival, in time order"""
+        streams = [zip(self.times[name], itertools.repeat(index), self.events[name])
+                   for index, name in enumerate(self.services)]
+        return heapq.merge(*streams)
+
+    def summary(self) -> str:
+        scenario = self.scenario
+        lines = [f"Scenario {scenario.name}: {scenario.start.isoformat()} + {scenario.duration:.0f}s, "
+                 f"{len(self)} events compiled in {self.compile_seconds:.2f}s "
+                 f"({self.nbytes / 1e6:.1f} MB schedule)"]
+        for phase, counts in zip(scenario.phases, self.phase_counts):
+            total = sum(counts.values())
+            lines.append(f"  {phase.name:16s} +{phase.start:7.0f}s {phase.duration:7.0f}s "
+                         f"{total:10d} events ({total / phase.duration if phase.duration else 0:9.1f}/s)")
+            for service, count in counts.items():
+                plan = phase.streams[service]
+                lines.append(f"    {service:14s} {count:10d}  peak {plan.curve.peak:9.1f}/s")
+        return "\n".join(lines)
+
+
+def compile_scenario(scenario: Scenario, seed: Optional[int] = None, scale: float = 1.0,
+                     only: Optional[List[str]] = None) -> CompiledSchedule:
+    """Precompute arrival times and event choices for every stream of ``scenario``"""
+    started = time.perf_counter()
+    seed = scenario.seed if seed is None else seed
+    poisson = scenario.arrivals == "poisson"
+    schedule = CompiledSchedule(scenario)
+    schedule.services = [s for s in scenario.services if only is None or s in only]
+    for service in schedule.services:
+        schedule.times[service] = array("d")
+        schedule.events[service] = array("B")
+
+    # One RNG per service, so adding a service to a scenario leaves the others' schedules alone
+    rngs = {service: random.Random(f"{seed}:{service}") for service in schedule.services}
+    for phase in scenario.phases:
+        counts = {}
+        for service, plan in phase.streams.items():
+            if service not in rngs:
+                continue
+            rng = rngs[service]
+            curve = plan.curve if scale == 1.0 else plan.curve.scaled(scale)
+            times = _arrival_times(curve, phase.start, phase.duration, poisson, rng)
+            events = AliasTable(range(len(plan.weights)), plan.weights, rng=rng).sample(len(times))
+            schedule.times[service].extend(times)
+            schedule.events[service].extend(events)
+            counts[service] = len(times)
+        schedule.phase_counts.append(counts)
+    schedule.compile_seconds = time.perf_counter() - started
+    return schedule
+
+
+class ScenarioRunner:
+    """Replays a compiled schedule through one generator per service.
+
+    In simulated mode (the default) events are stamped with scenario time
+    and written as fast as the generators go; ``realtime`` paces them
+    against the wall clock instead, ``speed`` times faster than scheduled.
+    """
+
+    def __init__(self, schedule: CompiledSchedule, root: Path, realtime: bool = False,
+                 speed: float = 1.0, rotation=None, population: Optional[Population] = None):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.schedule = schedule
+        self.root = Path(root)
+        self.realtime = realtime
+        self.speed = speed
+        scenario = schedule.scenario
+        if realtime:
+            self.clock = WallClock()
+        else:
+            end = scenario.start + datetime.timedelta(seconds=max(1.0, scenario.duration))
+            self.clock = SimulatedClock(scenario.start, end)
+
+        random.seed(scenario.seed)
+        self.generators = build_generators(schedule.services, self.root, self.clock, rotation,
+                                           scenario.seed, population)
+        self.emitted: Dict[str, int] = {service: 0 for service in schedule.services}
+
+    def run(self) -> float:
+        """Replay every event; returns the wall-clock seconds it took"""
+        schedule = self.schedule
+        scenario = schedule.scenario
+        actions = [[functools.partial(action, self.generators[service])
+                    for action in SERVICES[service].events.values()]
+                   for service in schedule.services]
+        counts = [0] * len(schedule.services)
+        boundaries = [phase.end for phase in scenario.phases]
+        phase_index = 0
+        clock = self.clock
+        start = scenario.start
+        timedelta = datetime.timedelta
+        sleep, perf_counter = time.sleep, time.perf_counter
+
+        print(f"Replaying {len(schedule)} events of {scenario.name} "
+              f"({'real time x%g' % self.speed if self.realtime else 'simulated time'}) into {self.root}")
+        wall_start = phase_wall = perf_counter()
+        phase_emitted = 0
+        try:
+            for offset, service, event in schedule.merged():
+                while phase_index < len(boundaries) - 1 and offset >= boundaries[phase_index]:
+                    self._report_phase(scenario.phases[phase_index], phase_emitted, perf_counter() - phase_wall)
+                    phase_index += 1
+                    phase_wall, phase_emitted = perf_counter(), 0
+                if self.realtime:
+                    delay = wall_start + offset / self.speed - perf_counter()
+                    if delay > 0.001:
+                        sleep(delay)
+                else:
+                    clock.current = start + timedelta(seconds=offset)
+                actions[service][event]()
+                counts[service] += 1
+                phase_emitted += 1
+        except KeyboardInterrupt:
+            print("\nScenario interrupted.")
+        self._report_phase(scenario.phases[phase_index], phase_emitted, perf_counter() - phase_wall)
+        elapsed = perf_counter() - wall_start
+        for service, count in zip(schedule.services, counts):
+            self.emitted[service] = count
+        return elapsed
+
+    @staticmethod
+    def _report_phase(phase: Phase, emitted: int, elapsed: float):
+        rate = emitted / elapsed if elapsed > 0 else 0.0
+        print(f"  {phase.name:16s} {emitted:10d} events in {elapsed:7.2f}s ({rate:9.0f}/s)")
+
+    def close(self):
+        close_generators(self.generators, self.emitted)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a JSON traffic scenario and replay it through "
+                                                 "the ft-transcendence log generators")
+    parser.add_argument("scenario", type=Path, help="Scenario file (see scenarios/)")
+    parser.add_argument("--root", type=Path, default=Path(LOG_ROOT),
+                        help=f"Directory laid out like {LOG_ROOT}; one subdirectory per service")
+    parser.add_argument("--seed", type=int, help="Override the scenario's seed")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every rate, e.g. 0.01 for a smoke test")
+    parser.add_argument("--only", help="Comma-separated services to run: " + ", ".join(SERVICES))
+    parser.add_argument("--compile-only", action="store_true", help="Print the compiled schedule and exit")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Pace events against the wall clock instead of simulating time")
+    parser.add_argument("--speed", type=float, default=1.0, help="With --realtime, run this many times faster")
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        scenario = Scenario.load(args.scenario)
+    except (OSError, ValueError) as e:
+        parser.error(f"{args.scenario}: {e}")
+    if args.seed is not None:
+        scenario.seed = args.seed
+    only = args.only.split(",") if args.only else None
+    if only is not None and set(only) - set(SERVICES):
+        parser.error(f"unknown services in --only: {', '.join(sorted(set(only) - set(SERVICES)))}")
+
+    schedule = compile_scenario(scenario, scale=args.scale, only=only)
+    print(schedule.summary())
+    if args.compile_only:
+        return 0
+
+    serve_metrics(args)
+    runner = ScenarioRunner(schedule, args.root, args.realtime, args.speed, build_rotation(args),
+                            build_population(args))
+    attach_sinks(runner.generators, args)
+    elapsed = runner.run()
+    runner.close()
+    total = sum(runner.emitted.values())
+    print(f"Replayed {total} events in {elapsed:.2f}s ({total / elapsed if elapsed > 0 else 0:.0f} events/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
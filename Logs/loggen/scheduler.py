@@ -0,0 +1,172 @@
+"""
+Open-loop target-rate scheduler for the ft-transcendence log generators
+Emits event slots at a requested rate regardless of how long generation takes
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from . import metrics
+
+ARRIVALS = ("constant", "poisson")
+
+_RATE_UNITS = {"s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0}
+
+# Being ahead of schedule by less than this is not worth a sleep() call
+_MIN_SLEEP = 0.001
+
+
+def parse_rate(text: str) -> float:
+    """Parse a rate such as ``5000``, ``5000/s``, ``300/m`` or ``10k/s`` into events/sec"""
+    value, _, unit = str(text).strip().lower().partition("/")
+    multiplier = 1.0
+    if value.endswith("k"):
+        value, multiplier = value[:-1], 1000.0
+    elif value.endswith("m"):
+        value, multiplier = value[:-1], 1000000.0
+
+    unit = unit or "s"
+    if unit not in _RATE_UNITS:
+        raise ValueError(f"unknown rate unit '{unit}' in '{text}'")
+
+    rate = float(value) * multiplier / _RATE_UNITS[unit]
+    if rate <= 0:
+        raise ValueError(f"rate must be positive, got '{text}'")
+    return rate
+
+
+@dataclass
+class SchedulerStats:
+    """Target versus achieved throughput for one scheduler"""
+    name: str
+    target_rate: float
+    emitted: int
+    elapsed: float
+    max_lag: float
+
+    @property
+    def achieved_rate(self) -> float:
+        return self.emitted / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def shortfall(self) -> float:
+        """Events/sec below target (0 when on or above target)"""
+        return max(0.0, self.target_rate - self.achieved_rate)
+
+    @property
+    def shortfall_pct(self) -> float:
+        return 100.0 * self.shortfall / self.target_rate if self.target_rate else 0.0
+
+    @classmethod
+    def combine(cls, name: str, parts: List["SchedulerStats"]) -> "SchedulerStats":
+        """Aggregate the stats of schedulers that ran side by side"""
+        return cls(
+            name=name,
+            target_rate=sum(p.target_rate for p in parts),
+            emitted=sum(p.emitted for p in parts),
+            elapsed=max((p.elapsed for p in parts), default=0.0),
+            max_lag=max((p.max_lag for p in parts), default=0.0),
+        )
+
+    def __str__(self) -> str:
+        return (f"{self.name}: target {self.target_rate:.1f}/s, "
+                f"achieved {self.achieved_rate:.1f}/s ({self.emitted} events in {self.elapsed:.1f}s), "
+                f"shortfall {self.shortfall:.1f}/s ({self.shortfall_pct:.2f}%), "
+                f"max lag {self.max_lag * 1000:.1f}ms")
+
+
+class RateScheduler:
+    """Hands out event slots at ``rate`` events/sec.
+
+    Arrival times are computed from the schedule itself, not from when the
+    previous event finished, so a stall in generation is made up by emitting
+    the overdue slots back to back. Iterating yields the slot index until
+    ``duration`` seconds have been scheduled or ``stop()`` is called.
+    """
+
+    def __init__(self, rate: float, arrivals: str = "constant", duration: Optional[float] = None,
+                 name: str = "scheduler", seed: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if arrivals not in ARRIVALS:
+            raise ValueError(f"arrivals must be one of {ARRIVALS}, got '{arrivals}'")
+
+        self.rate = rate
+        self.arrivals = arrivals
+        self.duration = duration
+        self.name = name
+        self.rng = random.Random(seed)
+
+        self.emitted = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._start: Optional[float] = None
+        self._end: Optional[float] = None
+        self._next: float = 0.0
+        self._stopped = threading.Event()
+        metrics.track_scheduler(self)
+
+    def _gap(self) -> float:
+        if self.arrivals == "poisson":
+            return self.rng.expovariate(self.rate)
+        return 1.0 / self.rate
+
+    def wait(self) -> bool:
+        """Block until the next slot is due; False once the run is over"""
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+            self._next = now
+
+        if self.duration is not None and self._next - self._start >= self.duration:
+            return self._finish()
+
+        delay = self._next - now
+        self.lag = max(0.0, -delay)
+        if delay > _MIN_SLEEP:
+            # Event.wait doubles as an interruptible sleep for stop()
+            if self._stopped.wait(delay):
+                return self._finish()
+        elif self.lag > self.max_lag:
+            self.max_lag = self.lag
+
+        if self._stopped.is_set():
+            return self._finish()
+
+        self.emitted += 1
+        self._next += self._gap()
+        return True
+
+    def _finish(self) -> bool:
+        if self._end is None:
+            self._end = time.monotonic()
+        return False
+
+    def __iter__(self) -> Iterator[int]:
+        while self.wait():
+            yield self.emitted - 1
+
+    def stop(self):
+        """End the run; a blocked ``wait()`` returns False immediately"""
+        self._stopped.set()
+
+    def stats(self) -> SchedulerStats:
+        if self._start is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._end if self._end is not None else time.monotonic()) - self._start
+        return SchedulerStats(self.name, self.rate, self.emitted, elapsed, self.max_lag)
+
+    def report(self) -> str:
+        return str(self.stats())
+
+
+def add_rate_arguments(parser, default_arrivals: str = "poisson"):
+    """Add the shared ``--rate`` / ``--arrivals`` options to an argparse parser"""
+    parser.add_argument("--rate", type=parse_rate,
+                        help="Target event rate, e.g. 5000/s, 300/m or 10k/s")
+    parser.add_argument("--arrivals", choices=ARRIVALS, default=default_arrivals,
+                        help=f"Inter-arrival distribution for --rate (default: {default_arrivals})")
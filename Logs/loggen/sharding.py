@@ -0,0 +1,197 @@
+"""
+Multi-process sharded batch generation for the ft-transcendence log generators
+Splits a batch across worker processes and merges the shards by timestamp,
+into the log files or into the sink the run was asked to write to
+"""
+
+import contextlib
+import heapq
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Lines per in-memory sorted run when a shard file is not already in order
+RUN_LINES = 500000
+
+_TIMESTAMP_RE = re.compile(rb'"timestamp":\s*"([^"]*)"')
+_LEVEL_RE = re.compile(rb'"level":\s*"([^"]*)"')
+
+
+def timestamp_key(line: bytes) -> bytes:
+    """Sortable key for a JSON log line: its ``timestamp`` normalised to microseconds"""
+    match = _TIMESTAMP_RE.search(line)
+    if match is None:
+        return b""
+    ts = match.group(1).rstrip(b"Z")
+    # isoformat() drops the fraction on whole seconds, which would sort after .xxxxxx
+    if b"." not in ts:
+        ts += b".000000"
+    return ts
+
+
+def split_count(count: int, parts: int) -> List[int]:
+    """Split ``count`` into ``parts`` near-equal non-zero shares"""
+    parts = max(1, min(parts, count))
+    share, extra = divmod(count, parts)
+    return [share + (1 if i < extra else 0) for i in range(parts)]
+
+
+def _generate_shard(factory: Callable[[str], Any], method: str, count: int, shard_dir: str,
+                    seed: int, kwargs: Dict) -> float:
+    """Worker: run one generator's batch method into its own shard directory"""
+    # Each process gets its own stream of the global RNG the generators use
+    random.seed(seed)
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        generator = factory(shard_dir)
+        getattr(generator, method)(count, **kwargs)
+        writer = getattr(generator, "writer", None)
+        if writer is not None:
+            # multiprocessing workers exit without running atexit hooks
+            writer.close()
+    _sort_shard_files(Path(shard_dir))
+    return time.perf_counter() - started
+
+
+def _sort_shard_files(shard_dir: Path):
+    """Turn every log file in a shard into one or more timestamp-sorted runs"""
+    for path in list(shard_dir.rglob("*.log")):
+        if _is_sorted(path):
+            continue
+        with open(path, "rb") as f:
+            run_index = 0
+            while True:
+                chunk = [line for _, line in zip(range(RUN_LINES), f)]
+                if not chunk:
+                    break
+                chunk.sort(key=timestamp_key)
+                with open(path.with_name(f"{path.name}.run{run_index:04d}"), "wb") as run:
+                    run.writelines(chunk)
+                run_index += 1
+        path.unlink()
+
+
+def _is_sorted(path: Path) -> bool:
+    previous = b""
+    with open(path, "rb") as f:
+        for line in f:
+            key = timestamp_key(line)
+            if key < previous:
+                return False
+            previous = key
+    return True
+
+
+def _read_run(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        yield from f
+
+
+def _merge_runs(target: str, runs: List[str]) -> Tuple[str, int]:
+    """Worker: stream a k-way merge of sorted runs onto the end of ``target``"""
+    lines = 0
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "ab", buffering=1 << 20) as out:
+        for line in heapq.merge(*(_read_run(Path(run)) for run in runs), key=timestamp_key):
+            out.write(line)
+            lines += 1
+    return target, lines
+
+
+def _merge_into_sink(sink, path: str, runs: List[str]) -> int:
+    """Stream a k-way merge of sorted runs into ``sink`` as lines of ``path``"""
+    lines = 0
+    write = sink.write
+    for line in heapq.merge(*(_read_run(Path(run)) for run in runs), key=timestamp_key):
+        match = _LEVEL_RE.search(line)
+        write(path, line.rstrip(b"\n").decode("utf-8"), match.group(1).decode() if match else None)
+        lines += 1
+    return lines
+
+
+def _collect_runs(shard_root: Path, output_dir: Path) -> Dict[str, List[str]]:
+    """Map each canonical log file to the sorted runs that make it up"""
+    runs: Dict[str, List[str]] = {}
+    for shard_dir in sorted(shard_root.iterdir()):
+        for path in sorted(shard_dir.rglob("*")):
+            if not path.is_file():
+                continue
+            relative = path.relative_to(shard_dir)
+            name = relative.name
+            if ".log.run" in name:
+                name = name[:name.index(".log.run") + len(".log")]
+            elif not name.endswith(".log"):
+                continue
+            if path.stat().st_size == 0:
+                continue
+            target = output_dir / relative.with_name(name)
+            runs.setdefault(str(target), []).append(str(path))
+    return runs
+
+
+def run_sharded(factory: Callable[[str], Any], method: str, count: int, processes: int,
+                output_dir: str, seed: Optional[int] = None, sink=None, **kwargs) -> Dict[str, int]:
+    """Generate ``count`` units of ``factory(dir).method(count)`` across processes.
+
+    Every worker builds its own generator pointed at a private shard
+    directory with its own RNG seed, then the shard files are merged by
+    timestamp (one merge process per canonical file) and appended to the
+    matching files under ``output_dir``. With a ``sink`` (any writer a
+    generator accepts, e.g. from ``--sink``, ``--bulk-url`` or ``--beats``)
+    the parent streams each merged file into it instead, as lines of the
+    file's path relative to ``output_dir``. Returns lines written per file.
+    """
+    output_dir = Path(output_dir)
+    shard_root = output_dir / f".shards-{os.getpid()}"
+    if seed is None:
+        seed = random.randrange(1 << 32)
+
+    counts = split_count(count, processes)
+    jobs = [
+        (factory, method, shard_count, str(shard_root / f"shard-{index:03d}"), seed + index, kwargs)
+        for index, shard_count in enumerate(counts)
+    ]
+
+    print(f"Generating {count} units across {len(jobs)} processes (seed {seed})...")
+    started = time.perf_counter()
+    try:
+        with multiprocessing.Pool(len(jobs)) as pool:
+            shard_times = pool.starmap(_generate_shard, jobs)
+            generated = time.perf_counter()
+            print(f"Shards generated in {generated - started:.2f}s "
+                  f"(slowest shard {max(shard_times):.2f}s)")
+
+            runs = _collect_runs(shard_root, output_dir)
+            if sink is None:
+                merged = dict(pool.starmap(_merge_runs, sorted(runs.items())))
+            else:
+                merged = {}
+                for target, target_runs in sorted(runs.items()):
+                    path = Path(target).relative_to(output_dir).as_posix()
+                    merged[path] = _merge_into_sink(sink, path, target_runs)
+                sink.flush()
+    finally:
+        shutil.rmtree(shard_root, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    total = sum(merged.values())
+    for target, lines in sorted(merged.items()):
+        print(f"  {target}: {lines} lines")
+    print(f"Merged {total} lines in {time.perf_counter() - generated:.2f}s; "
+          f"total {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} lines/sec)")
+    if sink is not None:
+        print(sink.report())
+    return merged
+
+
+def add_shard_arguments(parser):
+    """Add the shared ``--processes`` / ``--seed`` options to an argparse parser"""
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Split batch generation across N worker processes")
+    parser.add_argument("--seed", type=int,
+                        help="Base RNG seed; shard i uses seed + i")
@@ -0,0 +1,348 @@
+"""
+Output sinks for the ft-transcendence log generators
+Send generated lines to stdout, a named pipe or a Unix socket instead of the
+log files, or count and drop them, so a run can be timed with the disk out
+of the picture; a bundled reader drains a pipe or socket and reports its rate
+
+Run from Logs/:  python -m loggen.sinks drain unix:/tmp/loggen.sock
+                 python chat-service/Gen-Logs-chat-service.py --batch 100000 --sink unix:/tmp/loggen.sock
+"""
+
+import argparse
+import os
+import socket
+import stat
+import sys
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from . import metrics
+from .writer import BufferedLogWriter, PathLike, WriterStats, _Target
+
+SINKS = ("file", "null", "stdout", "fifo", "unix")
+
+# Lines buffered before a stream sink writes; smaller than the file writer's so readers see a steady flow
+DEFAULT_STREAM_BUFFER = 256 << 10
+
+
+def parse_sink(text: str) -> Tuple[str, Optional[str]]:
+    """Split a sink spec such as ``null``, ``stdout``, ``fifo:/tmp/logs.fifo`` or ``unix:/tmp/logs.sock``"""
+    kind, _, address = str(text).strip().partition(":")
+    kind = kind.lower()
+    if kind not in SINKS:
+        raise ValueError(f"unknown sink '{kind}', expected one of {', '.join(SINKS)}")
+    if kind in ("fifo", "unix") and not address:
+        raise ValueError(f"the {kind} sink needs a path, e.g. {kind}:/tmp/loggen.{kind}")
+    if kind not in ("fifo", "unix") and address:
+        raise ValueError(f"the {kind} sink takes no address, got '{text}'")
+    return kind, address or None
+
+
+class NullSink:
+    """Drop-in replacement for a generator's ``BufferedLogWriter`` that counts lines and drops them.
+
+    Lines are still encoded, so the byte counts match what the file writer
+    would have written; nothing is buffered and nothing touches the disk.
+    """
+
+    def __init__(self, service: Optional[str] = None, encoding: str = "utf-8"):
+        self.service = service
+        self.encoding = encoding
+        self.base_dir = None
+        self._stats: Dict[PathLike, WriterStats] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        metrics.track_writer(self)
+
+    def write(self, path: PathLike, line: str, level: Optional[str] = None):
+        """Count one log line for ``path``"""
+        size = len(line.encode(self.encoding)) + 1
+        with self._lock:
+            if self._closed:
+                metrics.record_drop(self.service, "writer_closed")
+                raise ValueError("write to closed NullSink")
+            metrics.record_event(self.service, path, level)
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = WriterStats()
+            stats.lines += 1
+            stats.bytes += size
+
+    def write_many(self, path: PathLike, lines: List[str], level: Optional[str] = None):
+        """Count a block of log lines for ``path``"""
+        if not lines:
+            return
+        size = len("\n".join(lines).encode(self.encoding)) + 1
+        with self._lock:
+            if self._closed:
+                metrics.record_drop(self.service, "writer_closed", len(lines))
+                raise ValueError("write to closed NullSink")
+            metrics.record_event(self.service, path, level, len(lines))
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = WriterStats()
+            stats.lines += len(lines)
+            stats.bytes += size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+
+    @property
+    def buffered_bytes(self) -> int:
+        return 0
+
+    def stats(self) -> Dict[str, WriterStats]:
+        """Counters per target path, as passed to ``write``"""
+        with self._lock:
+            return {str(path): WriterStats(s.lines, s.bytes, s.flushes) for path, s in self._stats.items()}
+
+    def total_stats(self) -> WriterStats:
+        total = WriterStats()
+        for stats in self.stats().values():
+            total.lines += stats.lines
+            total.bytes += stats.bytes
+        return total
+
+    def report(self) -> str:
+        lines = [f"  {path}: {stats.lines} lines, {stats.bytes} bytes"
+                 for path, stats in sorted(self.stats().items())]
+        total = self.total_stats()
+        lines.append(f"  total: {total.lines} lines, {total.bytes} bytes")
+        return "Null sink stats (nothing written):\n" + "\n".join(lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StreamSink(BufferedLogWriter):
+    """``BufferedLogWriter`` whose targets all write, interleaved, to one binary stream.
+
+    Buffering, metrics and stats work as for log files; lines are kept
+    whole, and closing the sink calls ``on_close`` instead of closing the
+    stream per target. A reader that goes away closes the sink and raises
+    BrokenPipeError once.
+    """
+
+    def __init__(self, stream: BinaryIO, name: str, service: Optional[str] = None,
+                 max_buffer_bytes: int = DEFAULT_STREAM_BUFFER, flush_interval: float = 1.0,
+                 on_close: Optional[Callable[[], None]] = None):
+        super().__init__(None, max_buffer_bytes, flush_interval, service=service)
+        self.stream = stream
+        self.name = name
+        self._on_close = on_close or stream.close
+
+    def _open(self, target: _Target):
+        target.handle = self.stream
+
+    def _release(self, target: _Target):
+        pass
+
+    def _flush_worker(self):
+        try:
+            super()._flush_worker()
+        except BrokenPipeError:
+            pass
+
+    def _flush_locked(self):
+        try:
+            super()._flush_locked()
+        except BrokenPipeError:
+            dropped = sum(target.pending_lines for target in self._targets.values())
+            for target in self._targets.values():
+                target.pending = []
+                target.pending_bytes = 0
+                target.pending_lines = 0
+                target.handle = None
+            self._buffered_bytes = 0
+            self._closed = True
+            metrics.record_drop(self.service, "reader_closed", dropped)
+            raise
+
+    def close(self):
+        try:
+            super().close()
+        except BrokenPipeError:
+            pass
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            try:
+                on_close()
+            except BrokenPipeError:
+                pass
+
+    def report(self) -> str:
+        return super().report().replace("Writer stats:", f"Stream sink stats ({self.name}):", 1)
+
+
+class _SharedStream:
+    """One open stream per address, shared by the sinks of every generator in the process"""
+
+    def __init__(self, key: str, stream: BinaryIO, owned: bool = True):
+        self.key = key
+        self.stream = stream
+        # stdout is borrowed: the last sink flushes it but leaves it open
+        self.owned = owned
+        self.users = 0
+
+    def acquire(self) -> BinaryIO:
+        self.users += 1
+        return self.stream
+
+    def release(self):
+        with _streams_lock:
+            self.users -= 1
+            if self.users:
+                self.stream.flush()
+                return
+            _streams.pop(self.key, None)
+        if self.owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+_streams: Dict[str, _SharedStream] = {}
+_streams_lock = threading.Lock()
+
+
+def open_fifo(path: str) -> BinaryIO:
+    """Create the named pipe if needed and open it for writing; blocks until a reader opens it"""
+    if not os.path.exists(path):
+        os.mkfifo(path)
+    elif not stat.S_ISFIFO(os.stat(path).st_mode):
+        raise ValueError(f"{path} exists and is not a named pipe")
+    print(f"Waiting for a reader on {path}...", file=sys.stderr)
+    return open(path, "wb")
+
+
+def connect_unix(path: str) -> BinaryIO:
+    """Connect to a listening Unix stream socket and return a buffered writer over it"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        stream = sock.makefile("wb")
+    finally:
+        # The file object keeps the connection open until it is closed itself
+        sock.close()
+    return stream
+
+
+def _shared_stream(kind: str, address: Optional[str]) -> _SharedStream:
+    key = f"{kind}:{address or ''}"
+    with _streams_lock:
+        shared = _streams.get(key)
+        if shared is None:
+            if kind == "stdout":
+                # stdout now carries log lines only, so progress output moves to stderr
+                stream = sys.__stdout__.buffer
+                sys.stdout = sys.stderr
+            elif kind == "fifo":
+                stream = open_fifo(address)
+            else:
+                stream = connect_unix(address)
+            shared = _streams[key] = _SharedStream(key, stream, owned=kind != "stdout")
+        shared.acquire()
+    return shared
+
+
+def add_sink_arguments(parser):
+    """Add the shared ``--sink`` option to an argparse parser"""
+    parser.add_argument("--sink", type=parse_sink, default=("file", None), metavar="KIND[:PATH]",
+                        help="Where lines go: file (default), null (count and drop), stdout, "
+                             "fifo:PATH (named pipe) or unix:PATH (Unix stream socket)")
+
+
+def build_sink(args, service: str):
+    """Sink selected by ``--sink``, or None to keep writing log files"""
+    kind, address = getattr(args, "sink", None) or ("file", None)
+    if kind == "file":
+        return None
+    if kind == "null":
+        return NullSink(service)
+    shared = _shared_stream(kind, address)
+    return StreamSink(shared.stream, shared.key.rstrip(":"), service, on_close=shared.release)
+
+
+# --- reader ---------------------------------------------------------------------------------
+
+
+def _drain(stream: BinaryIO, totals: List[int], lock: threading.Lock):
+    with stream:
+        while True:
+            chunk = stream.read1(1 << 20)
+            if not chunk:
+                return
+            with lock:
+                totals[0] += chunk.count(b"\n")
+                totals[1] += len(chunk)
+
+
+def _report_loop(totals: List[int], lock: threading.Lock, interval: float, done: threading.Event):
+    started, last = time.monotonic(), (0, 0)
+    while not done.wait(interval):
+        with lock:
+            current = (totals[0], totals[1])
+        print(f"[{time.monotonic() - started:7.0f}s] {(current[0] - last[0]) / interval:10.0f} lines/s "
+              f"{(current[1] - last[1]) / interval / 1e6:8.2f} MB/s   total {current[0]} lines")
+        last = current
+
+
+def _serve(args) -> int:
+    kind, address = args.source
+    if kind not in ("fifo", "unix"):
+        raise SystemExit("drain reads from fifo:PATH or unix:PATH")
+    totals, lock, done = [0, 0], threading.Lock(), threading.Event()
+    threading.Thread(target=_report_loop, args=(totals, lock, args.interval, done), daemon=True).start()
+    started = time.monotonic()
+    try:
+        if kind == "fifo":
+            if not os.path.exists(address):
+                os.mkfifo(address)
+            print(f"Draining named pipe {address}")
+            # Writers come and go; reopen after each one closes its end
+            while True:
+                with open(address, "rb") as stream:
+                    _drain(stream, totals, lock)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(address)
+            server.listen()
+            print(f"Draining Unix socket {address}")
+            while True:
+                connection, _ = server.accept()
+                threading.Thread(target=_drain, args=(connection.makefile("rb"), totals, lock),
+                                 daemon=True).start()
+                connection.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        done.set()
+        if kind == "unix" and os.path.exists(address):
+            os.unlink(address)
+    elapsed = time.monotonic() - started
+    print(f"Read {totals[0]} lines, {totals[1]} bytes in {elapsed:.1f}s")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Read what a generator sends to a stream sink")
+    commands = parser.add_subparsers(dest="command", required=True)
+    drain = commands.add_parser("drain", help="Read a named pipe or Unix socket and report its rate")
+    drain.add_argument("source", type=parse_sink, metavar="fifo:PATH|unix:PATH")
+    drain.add_argument("--interval", type=float, default=5.0, help="Seconds between throughput lines")
+    args = parser.parse_args(argv)
+    return _serve(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
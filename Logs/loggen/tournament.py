@@ -0,0 +1,598 @@
+"""
+Elimination tournaments for the ft-transcendence log generators
+Single- and double-elimination brackets of up to 64k entrants, seeded by
+rating; every match of a round is played concurrently through the
+game-service match model on a timer heap, and the tournament-service,
+game-service and chat-messages events all carry the tournament's ID
+
+Run from Logs/:  python -m loggen.tournament --root /tmp/logs --entrants 64k --format double
+"""
+
+import argparse
+import datetime
+import heapq
+import random
+import sys
+import time
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from .beats import add_beats_arguments
+from .bulk import add_bulk_arguments
+from .clock import SimulatedClock, WallClock
+from .ids import id_factory
+from .lifecycle import LifecycleTimings
+from .metrics import add_metrics_arguments, serve_metrics
+from .population import Population, add_population_arguments, build_population, parse_count
+from .rating import RatingTable
+from .rotation import add_rotation_arguments, build_rotation
+from .sinks import add_sink_arguments
+from .scenario import SERVICES, attach_sinks, build_generators, close_generators, parse_duration
+
+FORMATS = ("single_elimination", "double_elimination")
+BRACKETS = ("winners", "losers", "grand_final")
+WINNERS, LOSERS, GRAND_FINAL = range(len(BRACKETS))
+
+MAX_ENTRANTS = 1 << 16
+# Stands in for the missing opponent of a player with a bye
+BYE = 0xFFFFFFFF
+
+# Kinds of round; the losers bracket takes in the first round's losers, then
+# alternates between new drop-outs (minor) and its own survivors (major)
+_WINNERS, _INTAKE, _MINOR, _MAJOR, _FINAL, _RESET = range(6)
+
+# Services a tournament writes to; the others are not built
+TOURNAMENT_SERVICES = ("tournament-service", "game-service", "chat-messages")
+
+# Population used when none is given on the command line
+DEFAULT_POPULATION = 100_000
+
+# Tournament phases, and the timer slot that advances a tournament rather than one of its matches
+REGISTRATION, SEEDING, PLAYING, COMPLETE = range(4)
+_STEP = -1
+
+NEW_REQUEST_ID = id_factory("req_", 8).next
+NEW_TOURNAMENT_ID = id_factory("tournament_", 8).next
+NEW_MATCH_ID = id_factory("match_", 8).next
+NEW_GAME_ID = id_factory("game_", 8).next
+
+
+def seed_order(size: int) -> List[int]:
+    """Seed (0 is the top seed) on each line of a bracket of ``size``, a power of two
+
+    Seed ``s`` meets seed ``size - 1 - s`` in the first round and the top
+    seeds can only meet late, so byes (the seeds past the entrants) all
+    go to the strongest players.
+    """
+    order = [0]
+    while len(order) < size:
+        last = 2 * len(order) - 1
+        order = [seed for top in order for seed in (top, last - top)]
+    return order
+
+
+class Round(NamedTuple):
+    """Pairings of one round; ``firsts[i]`` meets ``seconds[i]``, either may be BYE
+
+    ``placement`` is the final place of the players this round knocks out.
+    """
+    bracket: int
+    number: int
+    firsts: array
+    seconds: array
+    placement: int
+
+
+class Bracket:
+    """Seeded elimination bracket over player indices, played one round at a time
+
+    ``next_round()`` hands out the next round's pairings and
+    ``finish_round(winners)`` takes the winner of each, in order. Double
+    elimination drops winners-bracket losers into the losers bracket; its
+    champion meets the winners-bracket champion in a grand final, replayed
+    once if the losers-bracket champion wins it. Lines are typed arrays,
+    4 bytes per entrant.
+    """
+
+    def __init__(self, seeds: Sequence[int], double: bool = False):
+        if len(seeds) < 2:
+            raise ValueError("a bracket needs at least two entrants")
+        if len(seeds) > MAX_ENTRANTS:
+            raise ValueError(f"a bracket holds at most {MAX_ENTRANTS} entrants, got {len(seeds)}")
+        self.double = double
+        self.entrants = len(seeds)
+        self.size = 1 << (len(seeds) - 1).bit_length()
+        self.byes = self.size - len(seeds)
+        self.alive = len(seeds)
+        self._winners = array("I", [seeds[seed] if seed < len(seeds) else BYE for seed in seed_order(self.size)])
+        self._losers = array("I")
+        # Winners-bracket losers waiting for their losers-bracket round
+        self._dropped = array("I")
+        self._kind: Optional[int] = None
+        self._round: Optional[Round] = None
+        self.rounds = [0] * len(BRACKETS)
+        self.champion: Optional[int] = None
+        self.runner_up: Optional[int] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.champion is not None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self._winners, self._losers, self._dropped))
+
+    def _next_kind(self) -> int:
+        kind = self._kind
+        if kind is None or not self.double or kind == _MAJOR:
+            return _WINNERS
+        if kind == _WINNERS:
+            if self.rounds[WINNERS] > 1:
+                return _MINOR
+            if len(self._dropped) > 1:
+                return _INTAKE
+            # Two entrants: the only loser is the losers bracket
+            self._losers, self._dropped = self._dropped, array("I")
+        elif kind == _MINOR and len(self._losers) > 1:
+            return _MAJOR
+        elif kind == _FINAL:
+            return _RESET
+        return _WINNERS if len(self._winners) > 1 else _FINAL
+
+    def next_round(self) -> Optional[Round]:
+        """Pairings of the next round, or None once the bracket has a champion"""
+        if self._round is not None:
+            raise RuntimeError("the current round has not finished")
+        if self.finished:
+            return None
+        kind = self._next_kind()
+        if kind == _WINNERS:
+            bracket, firsts, seconds = WINNERS, self._winners[0::2], self._winners[1::2]
+        elif kind == _INTAKE:
+            bracket, firsts, seconds = LOSERS, self._dropped[0::2], self._dropped[1::2]
+        elif kind == _MINOR:
+            # Reversed, so players who just dropped avoid the ones they beat earlier
+            bracket, firsts, seconds = LOSERS, self._losers, array("I", reversed(self._dropped))
+        elif kind == _MAJOR:
+            bracket, firsts, seconds = LOSERS, self._losers[0::2], self._losers[1::2]
+        else:
+            bracket, firsts, seconds = GRAND_FINAL, self._winners[:1], self._losers[:1]
+        played = sum(1 for first, second in zip(firsts, seconds) if first != BYE and second != BYE)
+        self._kind = kind
+        self.rounds[bracket] += 1
+        self._round = Round(bracket, self.rounds[bracket], firsts, seconds, self.alive - played + 1)
+        return self._round
+
+    def eliminates(self, first: int, winner: int) -> bool:
+        """Whether the loser of the current round's pairing led by ``first`` is out of the tournament"""
+        kind = self._kind
+        if kind == _WINNERS:
+            return not self.double
+        if kind == _FINAL:
+            # The losers-bracket champion needs to win twice
+            return winner == first
+        return True
+
+    def finish_round(self, winners: Sequence[int]):
+        """Record the winner of every pairing of the current round, in pairing order"""
+        current = self._round
+        if current is None:
+            raise RuntimeError("no round in progress")
+        if len(winners) != len(current.firsts):
+            raise ValueError(f"expected {len(current.firsts)} winners, got {len(winners)}")
+        kind = self._kind
+        losers = array("I", [second if winner == first else first
+                             for first, second, winner in zip(current.firsts, current.seconds, winners)])
+        winners = array("I", winners)
+        if kind == _WINNERS:
+            self._winners = winners
+            if self.double:
+                self._dropped = losers
+        elif kind == _FINAL and winners[0] != current.firsts[0]:
+            # Both finalists now have one loss; the same pairing plays again
+            self._round = None
+            return
+        elif kind in (_FINAL, _RESET):
+            self._winners = winners
+        else:
+            self._losers = winners
+            if kind != _MAJOR:
+                self._dropped = array("I")
+        if kind != _WINNERS or not self.double:
+            self.alive -= sum(1 for loser in losers if loser != BYE)
+        if self.alive == 1:
+            self.champion = winners[0]
+            self.runner_up = losers[0]
+        self._round = None
+
+
+class Tournament:
+    """One tournament: its IDs, entrants, bracket and the matches of the round in play"""
+
+    def __init__(self, context: Dict, entrants: array, double: bool):
+        self.context = context
+        self.entrants = entrants
+        self.double = double
+        self.phase = REGISTRATION
+        self.registered = 0
+        self.bracket: Optional[Bracket] = None
+        self.round: Optional[Round] = None
+        # Per pairing of the round: its game-service match (None for a bye), winner and kick-off
+        # offset (negative until the countdown ends)
+        self.matches: List[Optional[Dict]] = []
+        self.winners = array("I")
+        self.kickoff = array("d")
+        self.pending = 0
+        self.round_matches = 0
+        self.opened_at = 0.0
+        self.round_started_at = 0.0
+        self.played = 0
+
+    @property
+    def tournament_id(self) -> str:
+        return self.context["tournament_id"]
+
+
+class TournamentEngine:
+    """Runs tournaments on a timer heap of (due, sequence, tournament, slot)
+
+    Slot -1 advances the tournament itself (a registration, seeding, the
+    start of a round); any other slot is a match of the round in play.
+    Every match of a round starts together, so a 64k-entrant first round
+    is 32k concurrent matches; outcomes follow the players' Elo win
+    probability, and match timings those of the game lifecycle.
+    """
+
+    def __init__(self, generators: Dict[str, Any], population: Population, ratings: RatingTable,
+                 rng: Optional[random.Random] = None, timings: Optional[LifecycleTimings] = None,
+                 registration: float = 1800.0, round_break: float = 300.0):
+        self.generators = generators
+        self.population = population
+        self.ratings = ratings
+        self.rng = rng or random.Random()
+        self.timings = timings or LifecycleTimings()
+        self.registration = registration
+        self.round_break = round_break
+        self.tournaments: List[Tournament] = []
+        self.events: Dict[str, int] = {service: 0 for service in generators}
+        self.matches = 0
+        self.byes = 0
+        self._timers: List = []
+        self._sequence = 0
+        self._taken = set()
+
+    def _emit(self, service: str, action):
+        generator = self.generators.get(service)
+        if generator is not None:
+            action(generator)
+            self.events[service] += 1
+
+    def _schedule(self, due: float, index: int, slot: int):
+        # The sequence number keeps equal due times in FIFO order without comparing slots
+        self._sequence += 1
+        heapq.heappush(self._timers, (due, self._sequence, index, slot))
+
+    def player(self, index: int) -> Dict:
+        population = self.population
+        return {"user_id": population.user_id(index), "username": population.username(index)}
+
+    def _tell(self, tournament: Tournament, level: str, message: str, event_type: str, fields: Dict,
+              action: str, player: Optional[Dict] = None):
+        self._emit("tournament-service", lambda g: g.write_tournament_event(
+            tournament.context, level, message, event_type, fields, action, player))
+
+    def _chat(self, tournament: Tournament, message: str, player: Optional[Dict] = None):
+        self._emit("chat-messages", lambda g: g.write_log_entry(
+            g.generate_tournament_message_log(tournament.tournament_id, message, player)))
+
+    def add(self, entrants: Sequence[int], double: bool = False, name: Optional[str] = None,
+            at: float = 0.0) -> Tournament:
+        """Open a tournament for ``entrants`` (player indices) at offset ``at``; they register over time"""
+        if not 2 <= len(entrants) <= MAX_ENTRANTS:
+            raise ValueError(f"a tournament needs 2 to {MAX_ENTRANTS} entrants, got {len(entrants)}")
+        number = len(self.tournaments) + 1
+        context = {
+            "request_id": NEW_REQUEST_ID(),
+            "tournament_id": NEW_TOURNAMENT_ID(),
+            "name": name or f"Pong Open #{number}",
+            "format": FORMATS[double]
+        }
+        tournament = Tournament(context, array("I", entrants), double)
+        tournament.opened_at = at
+        self.tournaments.append(tournament)
+        self._schedule(at, len(self.tournaments) - 1, _STEP)
+        return tournament
+
+    def add_random(self, entrants: int, double: bool = False, at: float = 0.0) -> Tournament:
+        """Open a tournament for ``entrants`` random players; tournaments added this way never share one"""
+        size, taken = len(self.population), self._taken
+        if len(taken) + entrants > size:
+            raise ValueError(f"a population of {size} cannot fill another {entrants}-player tournament")
+        chosen = array("I")
+        randrange = self.rng.randrange
+        while len(chosen) < entrants:
+            player = randrange(size)
+            if player not in taken:
+                taken.add(player)
+                chosen.append(player)
+        return self.add(chosen, double, at=at)
+
+    def _step(self, index: int, now: float):
+        tournament = self.tournaments[index]
+        context = tournament.context
+        if tournament.phase == REGISTRATION:
+            if tournament.registered == 0:
+                self._tell(tournament, "INFO", f"Tournament {context['name']} created", "tournament_created",
+                           {"name": context["name"], "format": context["format"],
+                            "max_entrants": len(tournament.entrants)}, "tournament_create")
+                self._chat(tournament, f"Registration for {context['name']} is open!")
+            player = tournament.entrants[tournament.registered]
+            tournament.registered += 1
+            self._tell(tournament, "INFO", "Player registered", "player_registered",
+                       {"entrant": tournament.registered, "rating": round(self.ratings.rating(player))},
+                       "tournament_register", self.player(player))
+            if tournament.registered == len(tournament.entrants):
+                tournament.phase = SEEDING
+                self._schedule(max(now, tournament.opened_at + self.registration), index, _STEP)
+            else:
+                # Registrations arrive as a Poisson process filling the registration window
+                rate = len(tournament.entrants) / self.registration if self.registration > 0 else 0.0
+                self._schedule(now + (self.rng.expovariate(rate) if rate else 0.0), index, _STEP)
+        elif tournament.phase == SEEDING:
+            seeds = sorted(tournament.entrants, key=self.ratings.rating, reverse=True)
+            bracket = tournament.bracket = Bracket(seeds, tournament.double)
+            self._tell(tournament, "INFO", "Registration closed", "registration_closed",
+                       {"entrants": bracket.entrants}, "registration_close")
+            self._tell(tournament, "INFO", "Bracket generated", "bracket_generated",
+                       {"format": context["format"], "entrants": bracket.entrants, "bracket_size": bracket.size,
+                        "byes": bracket.byes, "top_seed": self.population.username(seeds[0])},
+                       "bracket_generate")
+            self._chat(tournament, "Tournament bracket updated!")
+            tournament.phase = PLAYING
+            self._start_round(index, now)
+        elif tournament.phase == PLAYING:
+            self._start_round(index, now)
+
+    def _start_round(self, index: int, now: float):
+        tournament = self.tournaments[index]
+        current = tournament.round = tournament.bracket.next_round()
+        bracket = BRACKETS[current.bracket]
+        pairings = len(current.firsts)
+        tournament.matches = [None] * pairings
+        tournament.winners = array("I", bytes(4 * pairings))
+        tournament.kickoff = array("d", [-1.0]) * pairings
+        tournament.round_started_at = now
+        byes = [slot for slot, (first, second) in enumerate(zip(current.firsts, current.seconds))
+                if first == BYE or second == BYE]
+        tournament.pending = tournament.round_matches = pairings - len(byes)
+        self._tell(tournament, "INFO", f"Round {current.number} of the {bracket} bracket started",
+                   "round_started", {"bracket": bracket, "round": current.number,
+                                     "matches": tournament.pending, "byes": len(byes)}, "round_start")
+        if tournament.pending:
+            self._chat(tournament, f"Round {current.number} of the {bracket} bracket is starting!")
+        for slot in byes:
+            first, second = current.firsts[slot], current.seconds[slot]
+            winner = tournament.winners[slot] = second if first == BYE else first
+            if winner != BYE:
+                self.byes += 1
+                self._tell(tournament, "INFO", "Player advanced with a bye", "player_bye",
+                           {"bracket": bracket, "round": current.number}, "bye", self.player(winner))
+        countdown = self.timings.countdown
+        context = tournament.context
+        for slot, (first, second) in enumerate(zip(current.firsts, current.seconds)):
+            if first == BYE or second == BYE:
+                continue
+            match = tournament.matches[slot] = {
+                "request_id": NEW_REQUEST_ID(),
+                "match_id": NEW_MATCH_ID(),
+                "game_id": NEW_GAME_ID(),
+                "player1": self.player(first),
+                "player2": self.player(second),
+                "player_indices": (first, second),
+                "tournament_id": context["tournament_id"]
+            }
+            self._tell(tournament, "INFO", "Match scheduled", "match_scheduled",
+                       {"match_id": match["match_id"], "bracket": bracket, "round": current.number,
+                        "player1": match["player1"]["username"], "player2": match["player2"]["username"]},
+                       "match_schedule")
+            self._emit("game-service", lambda g: g.write_match_event(
+                g.get_timestamp(), match, "INFO", "Match created", "match_created",
+                {"match_type": "tournament", "players": [match["player1"]["username"],
+                                                         match["player2"]["username"]],
+                 "bracket": bracket, "round": current.number}, "match_create"))
+            self._schedule(now + self.rng.uniform(*countdown), index, slot)
+        if not tournament.pending:
+            self._end_round(index, now)
+
+    def _match(self, index: int, slot: int, now: float):
+        tournament = self.tournaments[index]
+        match = tournament.matches[slot]
+        if tournament.kickoff[slot] < 0.0:
+            tournament.kickoff[slot] = now
+            self._emit("game-service", lambda g: g.write_match_event(
+                g.get_timestamp(), match, "INFO", "Match started", "match_started",
+                {"player1": match["player1"]["username"], "player2": match["player2"]["username"]},
+                "match_start"))
+            self._schedule(now + self.rng.uniform(*self.timings.play), index, slot)
+            return
+        current = tournament.round
+        bracket = BRACKETS[current.bracket]
+        first, second = match["player_indices"]
+        winner, loser = first, second
+        if self.rng.random() >= self.ratings.win_probability(first, second):
+            winner, loser = second, first
+        tournament.winners[slot] = winner
+        winner_player, loser_player = self.player(winner), self.player(loser)
+        final_score = f"11-{self.rng.randint(0, 9)}"
+        duration = round(now - tournament.kickoff[slot])
+        self._emit("game-service", lambda g: g.write_match_event(
+            g.get_timestamp(), match, "INFO", "Match ended", "match_ended",
+            {"winner": winner_player["username"], "loser": loser_player["username"],
+             "final_score": final_score, "duration": duration}, "match_end"))
+        if "game-service" in self.generators:
+            self.generators["game-service"].write_rating_change(match, winner, loser)
+        else:
+            self.ratings.record(winner, loser)
+        self._tell(tournament, "INFO", "Match result reported", "match_completed",
+                   {"match_id": match["match_id"], "bracket": bracket, "round": current.number,
+                    "winner": winner_player["username"], "loser": loser_player["username"],
+                    "final_score": final_score}, "match_result", winner_player)
+        if tournament.bracket.eliminates(first, winner):
+            self._tell(tournament, "INFO", f"Player {loser_player['username']} eliminated", "player_eliminated",
+                       {"bracket": bracket, "round": current.number, "placement": current.placement},
+                       "player_eliminate", loser_player)
+        elif current.bracket == WINNERS:
+            self._tell(tournament, "INFO", "Player dropped to the losers bracket", "player_dropped",
+                       {"bracket": bracket, "round": current.number}, "bracket_drop", loser_player)
+        self._chat(tournament, "Great game, advancing to next round!", winner_player)
+        tournament.matches[slot] = None
+        tournament.played += 1
+        self.matches += 1
+        tournament.pending -= 1
+        if not tournament.pending:
+            self._end_round(index, now)
+
+    def _end_round(self, index: int, now: float):
+        tournament = self.tournaments[index]
+        current = tournament.round
+        bracket = tournament.bracket
+        bracket.finish_round(tournament.winners)
+        tournament.round = None
+        name = BRACKETS[current.bracket]
+        self._tell(tournament, "INFO", f"Round {current.number} of the {name} bracket completed",
+                   "round_completed", {"bracket": name, "round": current.number,
+                                       "duration": round(now - tournament.round_started_at),
+                                       "remaining": bracket.alive}, "round_complete")
+        if not bracket.finished:
+            # Rounds made only of byes pass straight on to the next one
+            if tournament.round_matches:
+                self._chat(tournament, "Tournament bracket updated!")
+                self._schedule(now + self.round_break, index, _STEP)
+            else:
+                self._schedule(now, index, _STEP)
+            return
+        tournament.phase = COMPLETE
+        context = tournament.context
+        champion, runner_up = self.player(bracket.champion), self.player(bracket.runner_up)
+        self._tell(tournament, "INFO", f"Tournament {context['name']} completed", "tournament_completed",
+                   {"champion": champion["username"], "runner_up": runner_up["username"],
+                    "entrants": bracket.entrants, "matches": tournament.played,
+                    "duration": round(now - tournament.opened_at)}, "tournament_complete", champion)
+        self._chat(tournament, f"Congratulations {champion['username']}, winner of {context['name']}!")
+
+    def run(self, clock, realtime: bool = False, speed: float = 1.0):
+        """Play every added tournament to the end
+
+        Simulated runs move ``clock`` event by event, as fast as the CPU
+        allows; realtime runs sleep until each event is due (``speed``
+        compresses the timeline).
+        """
+        start = clock.now()
+        wall_start = time.perf_counter()
+        timers = self._timers
+        while timers:
+            now, _, index, slot = heapq.heappop(timers)
+            if realtime:
+                wait = now / speed - (time.perf_counter() - wall_start)
+                if wait > 0:
+                    time.sleep(wait)
+            else:
+                clock.current = start + datetime.timedelta(seconds=now)
+            if slot == _STEP:
+                self._step(index, now)
+            else:
+                self._match(index, slot, now)
+
+    def report(self) -> str:
+        finished = sum(1 for tournament in self.tournaments if tournament.phase == COMPLETE)
+        lines = [f"Tournaments: {len(self.tournaments)} opened, {finished} completed, "
+                 f"{self.matches} matches played, {self.byes} byes"]
+        for tournament in self.tournaments:
+            bracket = tournament.bracket
+            if bracket is None or not bracket.finished:
+                continue
+            rounds = ", ".join(f"{name}={count}" for name, count in zip(BRACKETS, bracket.rounds) if count)
+            lines.append(f"  {tournament.tournament_id} ({tournament.context['format']}, {bracket.entrants} "
+                         f"entrants): champion {self.population.username(bracket.champion)}, "
+                         f"rounds {rounds}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play elimination tournaments and log them across services")
+    parser.add_argument("--root", default="/var/log/ft-transcendence",
+                        help="Directory holding one log directory per service")
+    parser.add_argument("--entrants", type=parse_count, default=64,
+                        help=f"Players per tournament (e.g. 256, 64k; at most {MAX_ENTRANTS})")
+    parser.add_argument("--format", choices=("single", "double"), default="single",
+                        help="Single or double elimination")
+    parser.add_argument("--tournaments", type=int, default=1, help="Tournaments to play")
+    parser.add_argument("--every", default="0s",
+                        help="Time between tournament openings (0 runs them all at once)")
+    parser.add_argument("--registration", default="30m", help="How long registration stays open")
+    parser.add_argument("--round-break", default="5m", help="Pause between rounds")
+    parser.add_argument("--start", help="Simulated start time (ISO 8601, defaults to now)")
+    parser.add_argument("--seed", type=int, help="Seed for a reproducible run")
+    parser.add_argument("--only", nargs="+", choices=TOURNAMENT_SERVICES,
+                        help="Write just these services' side of each tournament")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Pace events on the wall clock instead of a simulated one")
+    parser.add_argument("--speed", type=float, default=1.0, help="Timeline compression for --realtime")
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        if not 2 <= args.entrants <= MAX_ENTRANTS:
+            raise ValueError(f"--entrants must be between 2 and {MAX_ENTRANTS}")
+        if args.tournaments < 1:
+            raise ValueError("--tournaments must be at least 1")
+        every = parse_duration(args.every)
+        registration = parse_duration(args.registration)
+        round_break = parse_duration(args.round_break)
+        population = build_population(args) or Population(
+            max(DEFAULT_POPULATION, args.entrants * args.tournaments), args.population_seed)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    random.seed(args.seed)
+    if args.realtime:
+        clock = WallClock()
+    else:
+        start = datetime.datetime.fromisoformat(args.start) if args.start else datetime.datetime.now()
+        # Nothing schedules against the end; the engine sets the time of every event itself
+        clock = SimulatedClock(start, start + datetime.timedelta(days=1))
+    services = [s for s in SERVICES if s in (args.only or TOURNAMENT_SERVICES)]
+    generators = build_generators(services, args.root, clock, build_rotation(args), args.seed, population)
+    attach_sinks(generators, args)
+    game = generators.get("game-service")
+    ratings = game.ratings if game is not None else RatingTable(
+        len(population), population.skill_level, population.games_played)
+    engine = TournamentEngine(generators, population, ratings, random.Random(args.seed),
+                              registration=registration, round_break=round_break)
+    try:
+        for number in range(args.tournaments):
+            engine.add_random(args.entrants, args.format == "double", at=number * every)
+    except ValueError as exc:
+        parser.error(str(exc))
+    serve_metrics(args)
+
+    started = time.perf_counter()
+    try:
+        engine.run(clock, args.realtime, args.speed)
+    except KeyboardInterrupt:
+        print("Interrupted")
+    elapsed = time.perf_counter() - started
+    close_generators(generators, engine.events)
+    total = sum(engine.events.values())
+    print(engine.report())
+    print(f"Wrote {total} events in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} events/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
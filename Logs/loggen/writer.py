@@ -0,0 +1,236 @@
+"""
+Buffered batched append writer for the ft-transcendence log generators
+Keeps one open handle per target file and flushes encoded lines in batches
+"""
+
+import atexit
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from . import metrics
+from .rotation import RotationPolicy
+
+PathLike = Union[str, Path]
+
+
+@dataclass
+class WriterStats:
+    """Counters for everything a writer has flushed to disk"""
+    lines: int = 0
+    bytes: int = 0
+    flushes: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.lines} lines, {self.bytes} bytes in {self.flushes} flushes"
+
+
+class _Target:
+    """Pending lines and the open handle for one log file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.handle: Optional[BinaryIO] = None
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.pending_lines = 0
+        self.stats = WriterStats()
+        # Current file size and the hour it was opened in, for rotation
+        self.size = 0
+        self.period = 0
+
+
+class BufferedLogWriter:
+    """Appends newline-terminated log lines to files, optionally under a base directory.
+
+    Lines are encoded and held in memory until the buffered size reaches
+    ``max_buffer_bytes``, ``flush_interval`` seconds have passed since the
+    last flush, or the writer is flushed/closed explicitly (also at exit).
+    With a ``rotation`` policy, files are rotated by rename + reopen at flush time.
+    """
+
+    def __init__(self, base_dir: Optional[PathLike] = None, max_buffer_bytes: int = 1 << 20,
+                 flush_interval: float = 1.0, encoding: str = "utf-8", service: Optional[str] = None,
+                 rotation: Optional[RotationPolicy] = None):
+        self.base_dir = Path(base_dir) if base_dir is not None else None
+        self.max_buffer_bytes = max_buffer_bytes
+        self.flush_interval = flush_interval
+        self.encoding = encoding
+        # Label for the Prometheus metrics of this writer
+        self.service = service
+        self.rotation = rotation
+
+        self._targets: Dict[PathLike, _Target] = {}
+        self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Background flusher so idle generators still hit the time threshold
+        self._stop_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        atexit.register(self.close)
+        metrics.track_writer(self)
+
+    def _target(self, path: PathLike) -> _Target:
+        target = self._targets.get(path)
+        if target is None:
+            full_path = Path(path) if self.base_dir is None else self.base_dir / path
+            target = _Target(full_path)
+            self._targets[path] = target
+        return target
+
+    def write(self, path: PathLike, line: str, level: Optional[str] = None):
+        """Queue one log line (without trailing newline) for ``path``"""
+        data = line.encode(self.encoding) + b"\n"
+        with self._lock:
+            if self._closed:
+                metrics.record_drop(self.service, "writer_closed")
+                raise ValueError("write to closed BufferedLogWriter")
+            metrics.record_event(self.service, path, level)
+            target = self._target(path)
+            target.pending.append(data)
+            target.pending_bytes += len(data)
+            target.pending_lines += 1
+            self._buffered_bytes += len(data)
+
+            if (self._buffered_bytes >= self.max_buffer_bytes
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+        if self._flusher is None and self.flush_interval > 0:
+            self._start_flusher()
+
+    def write_many(self, path: PathLike, lines: List[str], level: Optional[str] = None):
+        """Queue a block of log lines for ``path``, encoded and counted in one step"""
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode(self.encoding)
+        with self._lock:
+            if self._closed:
+                metrics.record_drop(self.service, "writer_closed", len(lines))
+                raise ValueError("write to closed BufferedLogWriter")
+            metrics.record_event(self.service, path, level, len(lines))
+            target = self._target(path)
+            target.pending.append(data)
+            target.pending_bytes += len(data)
+            target.pending_lines += len(lines)
+            self._buffered_bytes += len(data)
+
+            if (self._buffered_bytes >= self.max_buffer_bytes
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+        if self._flusher is None and self.flush_interval > 0:
+            self._start_flusher()
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None or self._closed:
+                return
+            self._flusher = threading.Thread(target=self._flush_worker, daemon=True)
+            self._flusher.start()
+
+    def _flush_worker(self):
+        """Flush buffers that went stale while no one was writing"""
+        while not self._stop_event.wait(self.flush_interval):
+            with self._lock:
+                if self._buffered_bytes and time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush_locked()
+
+    def _flush_locked(self):
+        for path, target in self._targets.items():
+            if not target.pending:
+                continue
+            data = b"".join(target.pending)
+            if target.handle is None:
+                self._open(target)
+            if self.rotation is not None and self.rotation.due(target.size, len(data), target.period):
+                target.handle.close()
+                self.rotation.rotate(target.path)
+                self._open(target)
+            started = time.perf_counter()
+            target.handle.write(data)
+            target.handle.flush()
+            target.size += len(data)
+            if metrics.ENABLED:
+                metrics.WRITE_LATENCY.observe((self.service or "unknown", str(path)),
+                                              time.perf_counter() - started)
+
+            target.stats.lines += target.pending_lines
+            target.stats.bytes += target.pending_bytes
+            target.stats.flushes += 1
+            target.pending = []
+            target.pending_bytes = 0
+            target.pending_lines = 0
+
+        self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+
+    def _open(self, target: _Target):
+        target.path.parent.mkdir(parents=True, exist_ok=True)
+        target.handle = open(target.path, "ab")
+        target.size = os.fstat(target.handle.fileno()).st_size
+        if self.rotation is not None:
+            target.period = self.rotation.period()
+
+    def _release(self, target: _Target):
+        target.handle.close()
+
+    def flush(self):
+        """Write out every pending line now"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush pending lines and close every open handle"""
+        self._stop_event.set()
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            for target in self._targets.values():
+                if target.handle is not None:
+                    self._release(target)
+                    target.handle = None
+            self._closed = True
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=1.0)
+        if self.rotation is not None:
+            self.rotation.drain()
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes currently waiting to be flushed"""
+        return self._buffered_bytes
+
+    def stats(self) -> Dict[str, WriterStats]:
+        """Flushed counters per target path, as passed to ``write``"""
+        with self._lock:
+            return {str(path): WriterStats(t.stats.lines, t.stats.bytes, t.stats.flushes)
+                    for path, t in self._targets.items()}
+
+    def total_stats(self) -> WriterStats:
+        """Flushed counters summed over every target"""
+        total = WriterStats()
+        for stats in self.stats().values():
+            total.lines += stats.lines
+            total.bytes += stats.bytes
+            total.flushes += stats.flushes
+        return total
+
+    def report(self) -> str:
+        """Human-readable summary of what has been flushed so far"""
+        lines = [f"  {path}: {stats}" for path, stats in sorted(self.stats().items())]
+        lines.append(f"  total: {self.total_stats()}")
+        return "Writer stats:\n" + "\n".join(lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Tournament Service Log Generator for ft-transcendence
+Generates realistic logs for tournament service including:
+- tournament.log: Tournament lifecycle, registrations, brackets and results
+- tournament-error.log: Error logs
+
+Run on its own it writes independent events; whole tournaments, with the
+game-service matches and chat messages that go with them, come from
+loggen.tournament
+"""
+
+import functools
+import random
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from loggen import (AliasTable, BufferedLogWriter, Population, WallClock, add_clock_arguments,
+                    add_metrics_arguments, add_population_arguments, add_rate_arguments,
+                    add_rotation_arguments, add_shard_arguments, build_clock, build_population,
+                    build_rotation, make_scheduler, run_sharded, serve_metrics)
+from loggen.beats import add_beats_arguments, build_beats_output
+from loggen.bulk import add_bulk_arguments, build_bulk_sink
+from loggen.sinks import add_sink_arguments, build_sink
+from loggen import TemplateEncoder, id_factory
+
+NEW_REQUEST_ID = id_factory("req_", 8).next
+NEW_TOURNAMENT_ID = id_factory("tournament_", 8).next
+NEW_MATCH_ID = id_factory("match_", 8).next
+ENCODER = TemplateEncoder()
+
+FORMATS = ("single_elimination", "double_elimination")
+
+def _population_player(population: Population, index: int) -> Dict:
+    return {
+        "user_id": population.user_id(index),
+        "username": population.username(index)
+    }
+
+class TournamentServiceLogGenerator:
+    def __init__(self, log_base_path: str = "/var/log/ft-transcendence/tournament-service", clock=None,
+                 rotation=None, population: Optional[Population] = None):
+        self.log_base_path = log_base_path
+        self.clock = clock or WallClock()
+        self.population = population
+        self.ensure_directories()
+        self.writer = BufferedLogWriter(self.log_base_path, service="tournament-service", rotation=rotation)
+
+        self.players = self.generate_players()
+        self.tournament_names = [
+            "Weekly Pong Cup", "Friday Night Smash", "Rookie Open", "Masters Invitational",
+            "Summer Championship", "Paddle Wars", "Campus Showdown", "Grand Slam"
+        ]
+        self.bracket_sizes = [4, 8, 16, 32, 64, 128]
+        self.brackets = ["winners", "losers", "grand_final"]
+
+    def ensure_directories(self):
+        """Create necessary directories if they don't exist"""
+        os.makedirs(self.log_base_path, exist_ok=True)
+
+        log_files = [
+            f"{self.log_base_path}/tournament.log",
+            f"{self.log_base_path}/tournament-error.log"
+        ]
+
+        for log_file in log_files:
+            if not os.path.exists(log_file):
+                with open(log_file, 'w') as f:
+                    f.write("")
+
+    def generate_players(self) -> Sequence[Dict]:
+        """Generate a pool of fake players"""
+        if self.population is not None:
+            return self.population.view(_population_player)
+        usernames = [
+            "player1", "pongmaster", "ballbuster", "paddle_pro", "gameking",
+            "speedster", "champion42", "rookie_player", "pro_gamer", "legend123",
+            "newbie", "veteran", "challenger", "grandmaster", "elite_player"
+        ]
+        return [{"user_id": f"user_{i+1000}", "username": username} for i, username in enumerate(usernames)]
+
+    def get_random_player(self) -> Dict:
+        """Get a random player from the pool"""
+        return random.choice(self.players)
+
+    def generate_request_id(self) -> str:
+        """Generate a unique request ID"""
+        return NEW_REQUEST_ID()
+
+    def get_timestamp(self) -> str:
+        """Get current timestamp in ISO format"""
+        return self.clock.utcnow().isoformat() + "Z"
+
+    def write_log(self, log_file: str, log_entry: Dict):
+        """Write a log entry to the specified file"""
+        self.writer.write(log_file, ENCODER.encode(log_entry), log_entry.get("level"))
+
+    def new_tournament(self, name: Optional[str] = None, tournament_format: Optional[str] = None) -> Dict:
+        """IDs, name and format of a tournament that is about to open"""
+        return {
+            "request_id": self.generate_request_id(),
+            "tournament_id": NEW_TOURNAMENT_ID(),
+            "name": name or random.choice(self.tournament_names),
+            "format": tournament_format or random.choice(FORMATS)
+        }
+
+    def write_tournament_event(self, tournament: Dict, level: str, message: str, event_type: str, fields: Dict,
+                               action: str, player: Optional[Dict] = None):
+        """Write one event of a known tournament to tournament.log (tournament-error.log from WARN up)"""
+        log_entry = {
+            "timestamp": self.get_timestamp(),
+            "level": level,
+            "service": "tournament-service",
+            "message": message,
+            "request_id": tournament["request_id"],
+            "tournament_id": tournament["tournament_id"]
+        }
+        if player is not None:
+            log_entry["user_id"] = player["user_id"]
+            log_entry["username"] = player["username"]
+        log_entry["event_type"] = event_type
+        log_entry.update(fields)
+        log_entry["action"] = action
+        self.write_log("tournament-error.log" if level in ("WARN", "ERROR", "FATAL") else "tournament.log",
+                       log_entry)
+
+    def generate_tournament_log(self):
+        """Generate one tournament event of a random tournament"""
+        tournament = self.new_tournament()
+        player = self.get_random_player()
+        opponent = self.get_random_player()
+        size = random.choice(self.bracket_sizes)
+        round_number = random.randint(1, size.bit_length() - 1)
+
+        event_patterns = [
+            ("INFO", f"Tournament {tournament['name']} created", "tournament_created",
+             {"name": tournament["name"], "format": tournament["format"], "max_entrants": size},
+             "tournament_create", None),
+            ("INFO", f"Player {player['username']} registered", "player_registered",
+             {"entrant": random.randint(1, size), "rating": random.randint(900, 2100)},
+             "tournament_register", player),
+            ("INFO", "Bracket generated", "bracket_generated",
+             {"format": tournament["format"], "entrants": size, "bracket_size": size, "byes": 0},
+             "bracket_generate", None),
+            ("INFO", f"Round {round_number} started", "round_started",
+             {"bracket": random.choice(self.brackets), "round": round_number,
+              "matches": size >> round_number, "byes": 0},
+             "round_start", None),
+            ("INFO", "Match result reported", "match_completed",
+             {"match_id": NEW_MATCH_ID(), "bracket": "winners", "round": round_number,
+              "winner": player["username"], "loser": opponent["username"],
+              "final_score": f"11-{random.randint(0, 9)}"},
+             "match_result", player),
+            ("INFO", f"Player {opponent['username']} eliminated", "player_eliminated",
+             {"bracket": "winners", "round": round_number, "placement": (size >> round_number) + 1},
+             "player_eliminate", opponent),
+            ("INFO", f"Tournament {tournament['name']} completed", "tournament_completed",
+             {"champion": player["username"], "runner_up": opponent["username"], "entrants": size,
+              "matches": size - 1},
+             "tournament_complete", player)
+        ]
+
+        level, message, event_type, fields, action, subject = random.choice(event_patterns)
+        self.write_tournament_event(tournament, level, message, event_type, fields, action, subject)
+
+    def generate_tournament_error_log(self):
+        """Generate tournament service error logs"""
+        tournament = self.new_tournament()
+        player = self.get_random_player()
+
+        error_patterns = [
+            ("WARN", "Player missed check-in, match forfeited", "match_forfeited",
+             {"match_id": NEW_MATCH_ID(), "error": "Check-in window closed"}, "match_forfeit", player),
+            ("ERROR", "Registration rejected: tournament is full", "registration_failed",
+             {"error": "Maximum entrants reached", "error_code": "TOURNAMENT_FULL"},
+             "tournament_register", player),
+            ("ERROR", "Conflicting match results reported", "result_conflict",
+             {"match_id": NEW_MATCH_ID(), "error": "Both players reported a win",
+              "error_code": "RESULT_CONFLICT"}, "match_result", player),
+            ("ERROR", "Failed to persist bracket", "bracket_error",
+             {"error": "Database write timeout after 5000ms", "error_code": "DB_TIMEOUT"},
+             "bracket_generate", None)
+        ]
+
+        level, message, event_type, fields, action, subject = random.choice(error_patterns)
+        self.write_tournament_event(tournament, level, message, event_type, fields, action, subject)
+
+    def generate_logs_continuously(self, duration_seconds: int = 300, rate: Optional[float] = None,
+                                   arrivals: str = "poisson"):
+        """Generate logs continuously for the specified duration"""
+        if rate is None:
+            rate = 1.0
+        scheduler = make_scheduler(rate, arrivals, duration_seconds, name="tournament-service", clock=self.clock)
+
+        if self.clock.simulated:
+            print(f"Simulating {self.clock.start.isoformat()} -> {self.clock.end.isoformat()}...")
+        else:
+            print(f"Starting log generation for {duration_seconds} seconds...")
+        print(f"Target rate: {rate:.1f} events/sec ({arrivals} arrivals)")
+        print(f"Logs will be written to: {self.log_base_path}")
+
+        next_log_generator = AliasTable([self.generate_tournament_log, self.generate_tournament_error_log],
+                                        [0.9, 0.1]).draw
+
+        try:
+            for _ in scheduler:
+                next_log_generator()()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            print("\nLog generation stopped by user.")
+
+        self.writer.flush()
+        print("Log generation completed!")
+        print(self.writer.report())
+        print(scheduler.report())
+
+    def generate_batch_logs(self, num_logs: int = 100):
+        """Generate a batch of logs quickly"""
+        print(f"Generating {num_logs} log entries...")
+
+        for i in range(num_logs):
+            if random.random() < 0.9:
+                self.generate_tournament_log()
+            else:
+                self.generate_tournament_error_log()
+
+            if (i + 1) % 25 == 0:
+                print(f"Generated {i + 1} logs...")
+
+        self.writer.flush()
+        print("Batch log generation completed!")
+        print(self.writer.report())
+
+def main():
+    """Main function to run the log generator"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate tournament service logs for ft-transcendence')
+    parser.add_argument('--path', default='/var/log/ft-transcendence/tournament-service',
+                       help='Base path for log files')
+    parser.add_argument('--duration', type=int, default=300,
+                       help='Duration to generate logs in seconds (default: 300)')
+    parser.add_argument('--batch', type=int, help='Generate a batch of N logs and exit')
+    parser.add_argument('--continuous', action='store_true',
+                       help='Generate logs continuously')
+    add_rate_arguments(parser)
+    add_shard_arguments(parser)
+    add_clock_arguments(parser)
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
+
+    args = parser.parse_args()
+    serve_metrics(args)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    clock = build_clock(args)
+    population = build_population(args)
+    generator = TournamentServiceLogGenerator(args.path, clock, build_rotation(args), population)
+    sink = (build_bulk_sink(args, "tournament-service")
+            or build_beats_output(args, "tournament-service", generator.writer.base_dir)
+            or build_sink(args, "tournament-service"))
+    if sink is not None:
+        generator.writer.close()
+        generator.writer = sink
+
+    if args.batch and args.processes > 1:
+        run_sharded(functools.partial(TournamentServiceLogGenerator, population=population),
+                    "generate_batch_logs", args.batch, args.processes, args.path, seed=args.seed, sink=sink)
+        return
+
+    if args.batch:
+        generator.generate_batch_logs(args.batch)
+    elif args.continuous or clock.simulated:
+        try:
+            generator.generate_logs_continuously(args.duration, args.rate, args.arrivals)
+        except KeyboardInterrupt:
+            print("\nLog generation stopped by user.")
+    else:
+        # Default: generate a small batch
+        generator.generate_batch_logs(50)
+
+if __name__ == "__main__":
+    main()
@@ -4,25 +4,99 @@ File Service Log Generator for ft-transcendence
 Generates realistic logs for file uploads, downloads, and operations
 """
 
+import functools
+import itertools
 import json
-import logging
+import operator
 import random
-import time
-import uuid
-from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
-import threading
+from typing import Dict, List, Optional, Tuple
 import sys
-import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from loggen import (AliasTable, BufferedLogWriter, Population, WallClock, add_clock_arguments,
+                    add_metrics_arguments, add_population_arguments, add_rate_arguments,
+                    add_rotation_arguments, add_shard_arguments, build_clock, build_population,
+                    build_rotation, make_scheduler, run_sharded, serve_metrics)
+from loggen.beats import add_beats_arguments, build_beats_output
+from loggen.bulk import add_bulk_arguments, build_bulk_sink
+from loggen.columnar import (DEFAULT_CHUNK, picks, quoted_picks, randints, random_words,
+                             spread_timestamps, uniforms, write_lines)
+from loggen.sinks import add_sink_arguments, build_sink
+from loggen import metrics
+from loggen import TemplateEncoder, id_factory
+
+NEW_REQUEST_ID = id_factory("req_", 12).next
+NEW_FILE_ID = id_factory("file_", 16).next
+NEW_SESSION_ID = id_factory("session_", 8).next
+NEW_BACKUP_ID = id_factory("backup_", 8).next
+NEW_SCAN_ID = id_factory("scan_", 8).next
+TAKE_REQUEST_IDS = id_factory("req_", 12).take
+TAKE_FILE_IDS = id_factory("file_", 16).take
+TAKE_SESSION_IDS = id_factory("session_", 8).take
+ENCODER = TemplateEncoder(ensure_ascii=False)
+
+# Row templates of the columnar engine: the same JSON text ENCODER gives for each log type
+LEVELS = ("ERROR", "INFO")
+OUTCOMES = ("failed", "completed")
+BOOLS = ("false", "true")
+UPLOAD_ROW = (
+    '{"timestamp": "%s", "level": "%s", "service": "file-service", "message": "File upload %s: %s", '
+    '"request_id": "%s", "user_id": "user_%d", "username": %s, "session_id": "%s", '
+    '"action": "file_upload", "success": %s, "file_id": "%s", "filename": "%s", "file_size": %d, '
+    '"file_type": "%s", "storage_path": "/storage/files/%s", "request": {"method": "POST", '
+    '"url": "/api/files/upload", "ip": %s, "user_agent": %s}, '
+    '"response": {"status": %d, "duration": %r, "bytes_processed": %d}%s}')
+DOWNLOAD_ROW = (
+    '{"timestamp": "%s", "level": "%s", "service": "file-service", "message": "File download %s: %s", '
+    '"request_id": "%s", "user_id": "user_%d", "username": %s, "session_id": "%s", '
+    '"action": "file_download", "success": %s, "file_id": "%s", "filename": %s, "file_size": %d, '
+    '"request": {"method": "GET", "url": "/api/files/%s/download", "ip": %s, "user_agent": %s}, '
+    '"response": {"status": %d, "duration": %r}%s}')
+DELETE_ROW = (
+    '{"timestamp": "%s", "level": "%s", "service": "file-service", "message": "File deletion %s", '
+    '"request_id": "%s", "user_id": "user_%d", "username": %s, "session_id": "%s", '
+    '"action": "file_delete", "success": %s, "file_id": "%s", '
+    '"request": {"method": "DELETE", "url": "/api/files/%s", "ip": %s, "user_agent": %s}, '
+    '"response": {"status": %d, "duration": %r}%s}')
+METADATA_ROW = (
+    '{"timestamp": "%s", "level": "%s", "service": "file-service", "message": "File metadata operation %s %s", '
+    '"request_id": "%s", "user_id": "user_%d", "username": %s, "session_id": "%s", '
+    '"action": "%s", "success": %s, "file_id": %s, '
+    '"request": {"method": "%s", "url": "%s", "ip": %s, "user_agent": %s}, '
+    '"response": {"status": %d, "duration": %r}%s%s}')
+SYSTEM_ROW = (
+    '{"timestamp": "%s", "level": "%s", "service": "file-service", "message": "System event: %s %s", '
+    '"request_id": "%s", "action": "%s", "success": %s, "event_type": "system", "duration": %r%s%s}')
+
+
+def _scaled(word: int, low: int, high: int) -> int:
+    """Map a 64-bit random word onto ``low..high`` inclusive"""
+    return low + (word * (high - low + 1) >> 64)
+
+
+def _system_extra(event: str, first: int, second: int) -> str:
+    """Event-specific fields of a system log, drawn from two 64-bit random words"""
+    if event == 'storage_cleanup':
+        return f', "files_cleaned": {_scaled(first, 0, 100)}, "space_freed": {_scaled(second, 0, 1000000000)}'
+    if event == 'quota_check':
+        return f', "users_checked": {_scaled(first, 100, 1000)}, "quota_violations": {_scaled(second, 0, 10)}'
+    if event in ('backup_started', 'backup_completed'):
+        return f', "backup_id": "{NEW_BACKUP_ID()}", "files_processed": {_scaled(first, 1000, 10000)}'
+    if event == 'virus_scan_started':
+        return f', "scan_id": "{NEW_SCAN_ID()}", "files_scanned": {_scaled(first, 100, 1000)}'
+    if event == 'virus_scan_completed':
+        return (f', "scan_id": "{NEW_SCAN_ID()}", "files_scanned": {_scaled(first, 100, 1000)}, '
+                f'"threats_found": {_scaled(second, 0, 3)}')
+    return ""
 
 class FileServiceLogger:
-    def __init__(self, log_dir: str = "/var/log/ft-transcendence/file-service"):
+    def __init__(self, log_dir: str = "/var/log/ft-transcendence/file-service", clock=None,
+                 rotation=None, population: Optional[Population] = None):
         self.log_dir = Path(log_dir)
+        self.clock = clock or WallClock()
         self.log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Setup loggers
-        self.setup_loggers()
+        self.writer = BufferedLogWriter(self.log_dir, service="file-service", rotation=rotation)
         
         # Sample data for realistic logs
         self.file_types = [
@@ -56,6 +130,11 @@ class FileServiceLogger:
             'game_master', 'pong_champion', 'rookie_player'
         ]
         
+        if population is not None:
+            # Columns of the shared population stand in for the sample lists
+            self.usernames = population.column('username')
+            self.ip_addresses = population.column('ip_address')
+        
         self.error_types = [
             'file_too_large', 'invalid_file_type', 'storage_full',
             'permission_denied', 'file_corrupted', 'upload_timeout',
@@ -63,57 +142,47 @@ class FileServiceLogger:
             'network_error', 'database_error', 'auth_failed'
         ]
         
-        self.running = False
-        
-    def setup_loggers(self):
-        """Setup separate loggers for different log types"""
-        # Main file service logger
-        self.file_logger = logging.getLogger('file_service')
-        self.file_logger.setLevel(logging.INFO)
+        # Fixed distributions as alias tables: draw() is O(1) instead of random.choices()
+        self.log_types = AliasTable(['upload', 'download', 'delete', 'metadata', 'system'],
+                                    [40, 30, 10, 15, 5])
+        self.upload_success = AliasTable([True, False], [85, 15])
+        self.download_success = AliasTable([True, False], [90, 10])
+        self.delete_success = AliasTable([True, False], [95, 5])
+        self.metadata_success = AliasTable([True, False], [92, 8])
+        self.system_success = AliasTable([True, False], [95, 5])
         
-        file_handler = logging.FileHandler(self.log_dir / 'file.log')
-        file_handler.setFormatter(logging.Formatter('%(message)s'))
-        self.file_logger.addHandler(file_handler)
-        
-        # Error logger
-        self.error_logger = logging.getLogger('file_service_error')
-        self.error_logger.setLevel(logging.ERROR)
-        
-        error_handler = logging.FileHandler(self.log_dir / 'file-error.log')
-        error_handler.setFormatter(logging.Formatter('%(message)s'))
-        self.error_logger.addHandler(error_handler)
+        self.running = False
+        self.scheduler = None
         
-        # Prevent duplicate logs in console
-        self.file_logger.propagate = False
-        self.error_logger.propagate = False
-    
     def generate_request_id(self) -> str:
         """Generate a unique request ID"""
-        return f"req_{uuid.uuid4().hex[:12]}"
+        return NEW_REQUEST_ID()
     
     def generate_file_id(self) -> str:
         """Generate a unique file ID"""
-        return f"file_{uuid.uuid4().hex[:16]}"
+        return NEW_FILE_ID()
     
-    def generate_upload_log(self) -> Dict:
-        """Generate file upload log entry"""
-        request_id = self.generate_request_id()
+    def generate_upload_log(self, success: Optional[bool] = None, identity=None,
+                            category: Optional[str] = None) -> Dict:
+        """Generate file upload log entry (``success`` forces the outcome, ``identity`` pins the IDs)"""
+        request_id = identity.request_id if identity else self.generate_request_id()
         file_id = self.generate_file_id()
-        username = random.choice(self.usernames)
-        filename = f"{random.choice(['avatar', 'banner', 'screenshot', 'document'])}_{random.randint(1, 999)}.{random.choice(['jpg', 'png', 'pdf', 'mp4'])}"
+        username = identity.username if identity else random.choice(self.usernames)
+        filename = f"{category or random.choice(['avatar', 'banner', 'screenshot', 'document'])}_{random.randint(1, 999)}.{random.choice(['jpg', 'png', 'pdf', 'mp4'])}"
         file_size = random.randint(1024, 50 * 1024 * 1024)  # 1KB to 50MB
         
-        success = random.choices([True, False], weights=[85, 15])[0]
+        if success is None:
+            success = self.upload_success.draw()
         
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self.clock.now().isoformat(),
             "level": "INFO" if success else "ERROR",
             "service": "file-service",
             "message": f"File upload {'completed' if success else 'failed'}: {filename}",
             "request_id": request_id,
-            "user_id": f"user_{random.randint(1, 1000)}",
+            "user_id": identity.user_id if identity else f"user_{random.randint(1, 1000)}",
             "username": username,
-            "session_id": f"session_{uuid.uuid4().hex[:8]}",
+            "session_id": identity.session_id if identity else NEW_SESSION_ID(),
             "action": "file_upload",
             "success": success,
             "file_id": file_id,
@@ -124,8 +193,8 @@ class FileServiceLogger:
             "request": {
                 "method": "POST",
                 "url": f"/api/files/upload",
-                "ip": random.choice(self.ip_addresses),
-                "user_agent": random.choice(self.user_agents)
+                "ip": identity.ip_address if identity else random.choice(self.ip_addresses),
+                "user_agent": identity.user_agent if identity else random.choice(self.user_agents)
             },
             "response": {
                 "status": 200 if success else random.choice([400, 413, 500, 507]),
@@ -148,17 +217,17 @@ class FileServiceLogger:
         username = random.choice(self.usernames)
         filename = random.choice(self.file_types)
         
-        success = random.choices([True, False], weights=[90, 10])[0]
+        success = self.download_success.draw()
         
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self.clock.now().isoformat(),
             "level": "INFO" if success else "ERROR",
             "service": "file-service",
             "message": f"File download {'completed' if success else 'failed'}: {filename}",
             "request_id": request_id,
             "user_id": f"user_{random.randint(1, 1000)}",
             "username": username,
-            "session_id": f"session_{uuid.uuid4().hex[:8]}",
+            "session_id": NEW_SESSION_ID(),
             "action": "file_download",
             "success": success,
             "file_id": file_id,
@@ -189,17 +258,17 @@ class FileServiceLogger:
         file_id = self.generate_file_id()
         username = random.choice(self.usernames)
         
-        success = random.choices([True, False], weights=[95, 5])[0]
+        success = self.delete_success.draw()
         
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self.clock.now().isoformat(),
             "level": "INFO" if success else "ERROR",
             "service": "file-service",
             "message": f"File deletion {'completed' if success else 'failed'}",
             "request_id": request_id,
             "user_id": f"user_{random.randint(1, 1000)}",
             "username": username,
-            "session_id": f"session_{uuid.uuid4().hex[:8]}",
+            "session_id": NEW_SESSION_ID(),
             "action": "file_delete",
             "success": success,
             "file_id": file_id,
@@ -231,17 +300,17 @@ class FileServiceLogger:
         actions = ['get_metadata', 'update_metadata', 'list_files']
         action = random.choice(actions)
         
-        success = random.choices([True, False], weights=[92, 8])[0]
+        success = self.metadata_success.draw()
         
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self.clock.now().isoformat(),
             "level": "INFO" if success else "ERROR",
             "service": "file-service",
             "message": f"File metadata operation {action} {'completed' if success else 'failed'}",
             "request_id": request_id,
             "user_id": f"user_{random.randint(1, 1000)}",
             "username": username,
-            "session_id": f"session_{uuid.uuid4().hex[:8]}",
+            "session_id": NEW_SESSION_ID(),
             "action": action,
             "success": success,
             "file_id": file_id if action != 'list_files' else None,
@@ -276,10 +345,10 @@ class FileServiceLogger:
         ]
         
         event = random.choice(events)
-        success = random.choices([True, False], weights=[95, 5])[0]
+        success = self.system_success.draw()
         
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self.clock.now().isoformat(),
             "level": "INFO" if success else "ERROR",
             "service": "file-service",
             "message": f"System event: {event} {'completed' if success else 'failed'}",
@@ -297,10 +366,10 @@ class FileServiceLogger:
             log_entry["users_checked"] = random.randint(100, 1000)
             log_entry["quota_violations"] = random.randint(0, 10)
         elif event in ['backup_started', 'backup_completed']:
-            log_entry["backup_id"] = f"backup_{uuid.uuid4().hex[:8]}"
+            log_entry["backup_id"] = NEW_BACKUP_ID()
             log_entry["files_processed"] = random.randint(1000, 10000)
         elif event in ['virus_scan_started', 'virus_scan_completed']:
-            log_entry["scan_id"] = f"scan_{uuid.uuid4().hex[:8]}"
+            log_entry["scan_id"] = NEW_SCAN_ID()
             log_entry["files_scanned"] = random.randint(100, 1000)
             if event == 'virus_scan_completed':
                 log_entry["threats_found"] = random.randint(0, 3)
@@ -336,24 +405,22 @@ class FileServiceLogger:
     
     def write_log(self, log_entry: Dict):
         """Write log entry to appropriate log file"""
-        log_json = json.dumps(log_entry, ensure_ascii=False)
-        
-        if log_entry["level"] == "ERROR":
-            self.error_logger.error(log_json)
-        else:
-            self.file_logger.info(log_json)
+        log_file = 'file-error.log' if log_entry["level"] == "ERROR" else 'file.log'
+        self.writer.write(log_file, ENCODER.encode(log_entry), log_entry["level"])
     
-    def generate_logs_continuously(self, interval: float = 1.0):
+    def generate_logs_continuously(self, interval: float = 1.0, rate: Optional[float] = None,
+                                   arrivals: str = "constant", duration: Optional[float] = None):
         """Generate logs continuously"""
         self.running = True
+        self.scheduler = make_scheduler(rate if rate is not None else 1.0 / interval,
+                                        arrivals, duration, name="file-service", clock=self.clock)
         
-        while self.running:
+        for _ in self.scheduler:
+            if not self.running:
+                break
             try:
                 # Generate different types of logs with different probabilities
-                log_type = random.choices(
-                    ['upload', 'download', 'delete', 'metadata', 'system'],
-                    weights=[40, 30, 10, 15, 5]
-                )[0]
+                log_type = self.log_types.draw()
                 
                 if log_type == 'upload':
                     log_entry = self.generate_upload_log()
@@ -368,29 +435,28 @@ class FileServiceLogger:
                 
                 self.write_log(log_entry)
                 
-                # Add some randomness to interval
-                sleep_time = interval + random.uniform(-0.3, 0.3)
-                time.sleep(max(0.1, sleep_time))
-                
             except KeyboardInterrupt:
                 break
             except Exception as e:
+                metrics.record_drop("file-service", "error")
                 print(f"Error generating logs: {e}")
-                time.sleep(1)
+        
+        self.writer.flush()
+        print(self.writer.report())
+        print(self.scheduler.report())
     
     def stop(self):
         """Stop log generation"""
         self.running = False
+        if self.scheduler is not None:
+            self.scheduler.stop()
     
     def generate_batch_logs(self, count: int = 100):
         """Generate a batch of logs"""
         print(f"Generating {count} log entries...")
         
         for i in range(count):
-            log_type = random.choices(
-                ['upload', 'download', 'delete', 'metadata', 'system'],
-                weights=[40, 30, 10, 15, 5]
-            )[0]
+            log_type = self.log_types.draw()
             
             if log_type == 'upload':
                 log_entry = self.generate_upload_log()
@@ -408,7 +474,153 @@ class FileServiceLogger:
             if (i + 1) % 10 == 0:
                 print(f"Generated {i + 1}/{count} logs")
         
+        self.writer.flush()
         print(f"✓ Generated {count} log entries successfully!")
+        print(self.writer.report())
+    
+    def _columnar_errors(self, ok: List[bool], errors: List[str], prefix: str) -> List[str]:
+        """Error fields for the failed rows of a chunk (empty text for the others)"""
+        n = len(ok)
+        heads = [f', "error": {json.dumps(error, ensure_ascii=False)}, '
+                 f'"error_reason": {json.dumps(self.get_error_reason(error), ensure_ascii=False)}, '
+                 f'"error_code": "{prefix}_' for error in errors]
+        return ["" if success else f'{head}{code}"'
+                for success, head, code in zip(ok, picks(heads, n), randints(n, 1000, 9999))]
+    
+    def _columnar_clients(self, n: int) -> Tuple[List, ...]:
+        """Request IDs, user numbers, usernames, session IDs, IPs and user agents for ``n`` rows"""
+        return (TAKE_REQUEST_IDS(n),
+                randints(n, 1, 1000),
+                quoted_picks(self.usernames, n, ensure_ascii=False),
+                TAKE_SESSION_IDS(n),
+                quoted_picks(self.ip_addresses, n, ensure_ascii=False),
+                quoted_picks(self.user_agents, n, ensure_ascii=False))
+    
+    @staticmethod
+    def _statuses(ok: List[bool], failures: List[int]) -> List[int]:
+        return [200 if success else status for success, status in zip(ok, picks(failures, len(ok)))]
+    
+    def _columnar_upload(self, stamps: List[str]) -> Tuple[List[str], List[bool]]:
+        """Upload log lines for one timestamp each, and whether each succeeded"""
+        n = len(stamps)
+        ok = self.upload_success.sample(n)
+        request_ids, users, usernames, sessions, ips, agents = self._columnar_clients(n)
+        extensions = picks(['jpg', 'png', 'pdf', 'mp4'], n)
+        filenames = [f"{category}_{number}.{extension}" for category, number, extension in
+                     zip(picks(['avatar', 'banner', 'screenshot', 'document'], n), randints(n, 1, 999), extensions)]
+        sizes = randints(n, 1024, 50 * 1024 * 1024)
+        file_ids = TAKE_FILE_IDS(n)
+        processed = [size if success else word * (size + 1) >> 64
+                     for success, size, word in zip(ok, sizes, random_words(n))]
+        rows = zip(stamps, map(LEVELS.__getitem__, ok), map(OUTCOMES.__getitem__, ok), filenames,
+                   request_ids, users, usernames, sessions, map(BOOLS.__getitem__, ok), file_ids, filenames,
+                   sizes, extensions, [f"{file_id[:2]}/{file_id[2:4]}/{file_id}" for file_id in file_ids],
+                   ips, agents, self._statuses(ok, [400, 413, 500, 507]), uniforms(n, 0.1, 5.0), processed,
+                   self._columnar_errors(ok, self.error_types, "FILE"))
+        return list(map(UPLOAD_ROW.__mod__, rows)), ok
+    
+    def _columnar_download(self, stamps: List[str]) -> Tuple[List[str], List[bool]]:
+        """Download log lines for one timestamp each, and whether each succeeded"""
+        n = len(stamps)
+        ok = self.download_success.sample(n)
+        request_ids, users, usernames, sessions, ips, agents = self._columnar_clients(n)
+        filenames = quoted_picks(self.file_types, n, ensure_ascii=False)
+        file_ids = TAKE_FILE_IDS(n)
+        rows = zip(stamps, map(LEVELS.__getitem__, ok), map(OUTCOMES.__getitem__, ok),
+                   [name[1:-1] for name in filenames], request_ids, users, usernames, sessions,
+                   map(BOOLS.__getitem__, ok), file_ids, filenames, randints(n, 1024, 10 * 1024 * 1024),
+                   file_ids, ips, agents, self._statuses(ok, [404, 403, 500]), uniforms(n, 0.05, 2.0),
+                   self._columnar_errors(ok, ['file_not_found', 'access_denied', 'storage_error'], "DOWNLOAD"))
+        return list(map(DOWNLOAD_ROW.__mod__, rows)), ok
+    
+    def _columnar_delete(self, stamps: List[str]) -> Tuple[List[str], List[bool]]:
+        """Deletion log lines for one timestamp each, and whether each succeeded"""
+        n = len(stamps)
+        ok = self.delete_success.sample(n)
+        request_ids, users, usernames, sessions, ips, agents = self._columnar_clients(n)
+        file_ids = TAKE_FILE_IDS(n)
+        rows = zip(stamps, map(LEVELS.__getitem__, ok), map(OUTCOMES.__getitem__, ok), request_ids, users,
+                   usernames, sessions, map(BOOLS.__getitem__, ok), file_ids, file_ids, ips, agents,
+                   self._statuses(ok, [404, 403, 500]), uniforms(n, 0.02, 0.5),
+                   self._columnar_errors(ok, ['file_not_found', 'permission_denied', 'storage_error'], "DELETE"))
+        return list(map(DELETE_ROW.__mod__, rows)), ok
+    
+    def _columnar_metadata(self, stamps: List[str]) -> Tuple[List[str], List[bool]]:
+        """Metadata log lines for one timestamp each, and whether each succeeded"""
+        n = len(stamps)
+        ok = self.metadata_success.sample(n)
+        request_ids, users, usernames, sessions, ips, agents = self._columnar_clients(n)
+        actions = picks(['get_metadata', 'update_metadata', 'list_files'], n)
+        file_ids = TAKE_FILE_IDS(n)
+        listing = [action == 'list_files' for action in actions]
+        counts = [f', "files_count": {count}' if listed else ""
+                  for listed, count in zip(listing, randints(n, 0, 500))]
+        rows = zip(stamps, map(LEVELS.__getitem__, ok), actions, map(OUTCOMES.__getitem__, ok), request_ids,
+                   users, usernames, sessions, actions, map(BOOLS.__getitem__, ok),
+                   ["null" if listed else f'"{file_id}"' for listed, file_id in zip(listing, file_ids)],
+                   ["PUT" if action == 'update_metadata' else "GET" for action in actions],
+                   ["/api/files" if listed else f"/api/files/{file_id}/metadata"
+                    for listed, file_id in zip(listing, file_ids)],
+                   ips, agents, self._statuses(ok, [404, 403, 500]), uniforms(n, 0.01, 0.3), counts,
+                   self._columnar_errors(ok, ['file_not_found', 'database_error', 'invalid_metadata'], "META"))
+        return list(map(METADATA_ROW.__mod__, rows)), ok
+    
+    def _columnar_system(self, stamps: List[str]) -> Tuple[List[str], List[bool]]:
+        """System log lines for one timestamp each, and whether each succeeded"""
+        n = len(stamps)
+        events = picks(['storage_cleanup', 'quota_check', 'backup_started', 'backup_completed',
+                        'virus_scan_started', 'virus_scan_completed', 'cache_cleanup',
+                        'storage_health_check', 'database_connection_check'], n)
+        ok = self.system_success.sample(n)
+        rows = zip(stamps, map(LEVELS.__getitem__, ok), events, map(OUTCOMES.__getitem__, ok),
+                   TAKE_REQUEST_IDS(n), events, map(BOOLS.__getitem__, ok),
+                   uniforms(n, 0.1, 30.0), list(map(_system_extra, events, random_words(n), random_words(n))),
+                   self._columnar_errors(ok, ['storage_error', 'database_error', 'network_error'], "SYS"))
+        return list(map(SYSTEM_ROW.__mod__, rows)), ok
+    
+    def generate_columnar_logs(self, count: int = 100, chunk: int = DEFAULT_CHUNK):
+        """Generate a batch of logs column by column, ``chunk`` entries at a time"""
+        print(f"Generating {count} log entries (columnar, {chunk} per chunk)...")
+        renderers = {
+            'upload': self._columnar_upload,
+            'download': self._columnar_download,
+            'delete': self._columnar_delete,
+            'metadata': self._columnar_metadata,
+            'system': self._columnar_system,
+        }
+        
+        done = 0
+        previous = self.clock.now()
+        while done < count:
+            n = min(chunk, count - done)
+            # Timestamps are spread over the time the previous chunk took, in entry order
+            now = self.clock.now()
+            stamps = spread_timestamps(previous, now, n)
+            previous = now
+            
+            positions = {log_type: [] for log_type in renderers}
+            for position, log_type in enumerate(self.log_types.sample(n)):
+                positions[log_type].append(position)
+            lines: List[Optional[str]] = [None] * n
+            ok = [True] * n
+            for log_type, render in renderers.items():
+                rows = positions[log_type]
+                if not rows:
+                    continue
+                rendered, outcomes = render([stamps[position] for position in rows])
+                for position, line, success in zip(rows, rendered, outcomes):
+                    lines[position] = line
+                    ok[position] = success
+            
+            write_lines(self.writer, 'file.log', list(itertools.compress(lines, ok)), "INFO")
+            write_lines(self.writer, 'file-error.log',
+                        list(itertools.compress(lines, map(operator.not_, ok))), "ERROR")
+            done += n
+            print(f"Generated {done}/{count} logs")
+        
+        self.writer.flush()
+        print(f"✓ Generated {count} log entries successfully!")
+        print(self.writer.report())
 
 def main():
     """Main function"""
@@ -422,18 +634,52 @@ def main():
     parser.add_argument('--batch', type=int, help='Generate batch of logs and exit')
     parser.add_argument('--continuous', action='store_true',
                         help='Generate logs continuously')
+    parser.add_argument('--duration', type=float,
+                        help='Stop continuous generation after N seconds')
+    parser.add_argument('--columnar', action='store_true',
+                        help='Draw --batch column by column, a chunk of entries at a time (for large fixtures)')
+    add_rate_arguments(parser, default_arrivals='constant')
+    add_shard_arguments(parser)
+    add_clock_arguments(parser)
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
     
     args = parser.parse_args()
+    serve_metrics(args)
+    
+    if args.seed is not None:
+        random.seed(args.seed)
     
-    logger = FileServiceLogger(args.log_dir)
+    clock = build_clock(args)
+    population = build_population(args)
+    logger = FileServiceLogger(args.log_dir, clock, build_rotation(args), population)
+    sink = (build_bulk_sink(args, "file-service")
+            or build_beats_output(args, "file-service", logger.writer.base_dir)
+            or build_sink(args, "file-service"))
+    if sink is not None:
+        logger.writer.close()
+        logger.writer = sink
+    
+    batch_method = 'generate_columnar_logs' if args.columnar else 'generate_batch_logs'
+    if args.batch and args.processes > 1:
+        run_sharded(functools.partial(FileServiceLogger, population=population), batch_method,
+                    args.batch, args.processes, args.log_dir, seed=args.seed, sink=sink)
+        return
     
     if args.batch:
-        logger.generate_batch_logs(args.batch)
-    elif args.continuous:
-        print(f"Starting continuous log generation (interval: {args.interval}s)")
+        getattr(logger, batch_method)(args.batch)
+    elif args.continuous or clock.simulated:
+        if args.rate:
+            print(f"Starting continuous log generation (rate: {args.rate:.1f}/s)")
+        else:
+            print(f"Starting continuous log generation (interval: {args.interval}s)")
         print("Press Ctrl+C to stop...")
         try:
-            logger.generate_logs_continuously(args.interval)
+            logger.generate_logs_continuously(args.interval, args.rate, args.arrivals, args.duration)
         except KeyboardInterrupt:
             print("\nStopping log generation...")
             logger.stop()
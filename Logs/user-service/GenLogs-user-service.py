@@ -4,21 +4,37 @@ User Service Log Generator for ft-transcendence
 Generates realistic logs that match the ELK stack configuration
 """
 
-import json
+import functools
 import random
 import time
 import os
+import sys
 import threading
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Dict, List, Optional
-import uuid
-import logging
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from loggen import (AliasTable, BufferedLogWriter, Population, RateScheduler, SchedulerStats, WallClock,
+                    add_clock_arguments, add_metrics_arguments, add_population_arguments, add_rate_arguments,
+                    add_rotation_arguments, add_shard_arguments, build_clock, build_population,
+                    build_rotation, make_scheduler, run_sharded, serve_metrics)
+from loggen.beats import add_beats_arguments, build_beats_output
+from loggen.bulk import add_bulk_arguments, build_bulk_sink
+from loggen.sinks import add_sink_arguments, build_sink
+from loggen import TemplateEncoder, id_factory, uuid_factory
+
+NEW_REQUEST_ID = id_factory("req_", 12).next
+NEW_UUID = uuid_factory().next
+ENCODER = TemplateEncoder()
+
 class UserServiceLogGenerator:
-    def __init__(self, log_dir: str = "/var/log/ft-transcendence/user-service"):
+    def __init__(self, log_dir: str = "/var/log/ft-transcendence/user-service", clock=None,
+                 rotation=None, population: Optional[Population] = None):
         self.log_dir = Path(log_dir)
+        self.clock = clock or WallClock()
         self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.writer = BufferedLogWriter(service="user-service", rotation=rotation)
         
         # Log file paths
         self.user_log_path = self.log_dir / "user.log"
@@ -37,7 +53,7 @@ class UserServiceLogGenerator:
         ]
         
         self.user_ids = [f"user_{i:04d}" for i in range(1, 101)]
-        self.session_ids = [str(uuid.uuid4()) for _ in range(50)]
+        self.session_ids = [NEW_UUID() for _ in range(50)]
         
         self.user_actions = [
             "login", "logout", "register", "profile_update", "password_change",
@@ -61,6 +77,13 @@ class UserServiceLogGenerator:
             "203.0.113.2", "198.51.100.1", "198.51.100.2", "127.0.0.1"
         ]
         
+        if population is not None:
+            # Columns of the shared population stand in for the sample lists
+            self.usernames = population.column("username")
+            self.user_ids = population.column("user_id")
+            self.session_ids = population.column("session_id")
+            self.ip_addresses = population.column("ip_address")
+        
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -78,35 +101,44 @@ class UserServiceLogGenerator:
             "/api/v1/users/privacy", "/api/v1/users/notifications", "/api/v1/users/preferences"
         ]
         
+        # Average interval (seconds) between entries of each log type
+        self.stream_intervals = {"user": 2.0, "access": 1.0, "error": 8.0}
+        
+        # Fixed distributions as alias tables: draw() is O(1) instead of random.choices()
+        self.user_levels = AliasTable(["INFO", "DEBUG", "WARN"], [0.7, 0.2, 0.1])
+        self.access_methods = AliasTable(["GET", "POST", "PUT", "DELETE", "PATCH"],
+                                         [0.5, 0.3, 0.1, 0.05, 0.05])
+        self.access_statuses = AliasTable([200, 201, 204, 400, 401, 403, 404, 422, 500],
+                                          [0.6, 0.1, 0.05, 0.08, 0.05, 0.03, 0.04, 0.03, 0.02])
+        self.error_levels = AliasTable(["ERROR", "WARN", "FATAL"], [0.8, 0.15, 0.05])
+        
         # Running flag for threads
         self.running = False
         self.threads = []
+        self.schedulers: List[RateScheduler] = []
 
-    def generate_timestamp(self) -> str:
+    def generate_timestamp(self, jitter: bool = True) -> str:
         """Generate ISO timestamp with slight randomization"""
-        base_time = datetime.now()
-        random_offset = random.randint(-300, 300)  # ±5 minutes
+        base_time = self.clock.now()
+        random_offset = random.randint(-300, 300) if jitter else 0  # ±5 minutes
         timestamp = base_time + timedelta(seconds=random_offset)
         return timestamp.isoformat() + "Z"
 
     def generate_request_id(self) -> str:
         """Generate unique request ID"""
-        return f"req_{uuid.uuid4().hex[:12]}"
+        return NEW_REQUEST_ID()
 
-    def generate_user_log(self) -> Dict:
-        """Generate general user service log entry"""
-        log_levels = ["INFO", "DEBUG", "WARN"]
-        weights = [0.7, 0.2, 0.1]
-        
+    def generate_user_log(self, identity=None, action: Optional[str] = None) -> Dict:
+        """Generate general user service log entry (``identity`` pins the user, session and request IDs)"""
         log_entry = {
-            "timestamp": self.generate_timestamp(),
-            "level": random.choices(log_levels, weights=weights)[0],
+            "timestamp": self.generate_timestamp(jitter=identity is None),
+            "level": self.user_levels.draw(),
             "service": "user-service",
-            "request_id": self.generate_request_id(),
-            "user_id": random.choice(self.user_ids),
-            "username": random.choice(self.usernames),
-            "session_id": random.choice(self.session_ids),
-            "action": random.choice(self.user_actions),
+            "request_id": identity.request_id if identity else self.generate_request_id(),
+            "user_id": identity.user_id if identity else random.choice(self.user_ids),
+            "username": identity.username if identity else random.choice(self.usernames),
+            "session_id": identity.session_id if identity else random.choice(self.session_ids),
+            "action": action or random.choice(self.user_actions),
             "success": random.choice([True, True, True, False]),  # 75% success rate
         }
         
@@ -133,30 +165,25 @@ class UserServiceLogGenerator:
         
         return log_entry
 
-    def generate_access_log(self) -> Dict:
+    def generate_access_log(self, identity=None, method: Optional[str] = None,
+                            url: Optional[str] = None) -> Dict:
         """Generate user access log entry (HTTP requests)"""
-        methods = ["GET", "POST", "PUT", "DELETE", "PATCH"]
-        method_weights = [0.5, 0.3, 0.1, 0.05, 0.05]
-        
-        status_codes = [200, 201, 204, 400, 401, 403, 404, 422, 500]
-        status_weights = [0.6, 0.1, 0.05, 0.08, 0.05, 0.03, 0.04, 0.03, 0.02]
-        
         log_entry = {
-            "timestamp": self.generate_timestamp(),
+            "timestamp": self.generate_timestamp(jitter=identity is None),
             "level": "INFO",
             "service": "user-service",
-            "request_id": self.generate_request_id(),
-            "user_id": random.choice(self.user_ids),
-            "username": random.choice(self.usernames),
-            "session_id": random.choice(self.session_ids),
+            "request_id": identity.request_id if identity else self.generate_request_id(),
+            "user_id": identity.user_id if identity else random.choice(self.user_ids),
+            "username": identity.username if identity else random.choice(self.usernames),
+            "session_id": identity.session_id if identity else random.choice(self.session_ids),
             "request": {
-                "method": random.choices(methods, weights=method_weights)[0],
-                "url": random.choice(self.endpoints),
-                "ip": random.choice(self.ip_addresses),
-                "user_agent": random.choice(self.user_agents)
+                "method": method or self.access_methods.draw(),
+                "url": url or random.choice(self.endpoints),
+                "ip": identity.ip_address if identity else random.choice(self.ip_addresses),
+                "user_agent": identity.user_agent if identity else random.choice(self.user_agents)
             },
             "response": {
-                "status": random.choices(status_codes, weights=status_weights)[0],
+                "status": self.access_statuses.draw(),
                 "time": round(random.uniform(0.05, 3.0), 3),
                 "duration": round(random.uniform(50, 3000), 2)
             }
@@ -179,12 +206,9 @@ class UserServiceLogGenerator:
 
     def generate_error_log(self) -> Dict:
         """Generate user service error log entry"""
-        error_levels = ["ERROR", "WARN", "FATAL"]
-        level_weights = [0.8, 0.15, 0.05]
-        
         log_entry = {
             "timestamp": self.generate_timestamp(),
-            "level": random.choices(error_levels, weights=level_weights)[0],
+            "level": self.error_levels.draw(),
             "service": "user-service",
             "request_id": self.generate_request_id(),
             "user_id": random.choice(self.user_ids),
@@ -245,31 +269,34 @@ class UserServiceLogGenerator:
 
     def write_log_entry(self, log_entry: Dict, file_path: Path):
         """Write log entry to file"""
-        with open(file_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        self.writer.write(file_path, ENCODER.encode(log_entry), log_entry.get("level"))
 
-    def generate_user_logs(self, interval: float = 2.0):
+    def generate_user_logs(self, scheduler: RateScheduler):
         """Generate user.log entries"""
-        while self.running:
+        for _ in scheduler:
+            if not self.running:
+                break
             log_entry = self.generate_user_log()
             self.write_log_entry(log_entry, self.user_log_path)
-            time.sleep(interval + random.uniform(-0.5, 0.5))
 
-    def generate_access_logs(self, interval: float = 1.0):
+    def generate_access_logs(self, scheduler: RateScheduler):
         """Generate user-access.log entries"""
-        while self.running:
+        for _ in scheduler:
+            if not self.running:
+                break
             log_entry = self.generate_access_log()
             self.write_log_entry(log_entry, self.user_access_log_path)
-            time.sleep(interval + random.uniform(-0.3, 0.3))
 
-    def generate_error_logs(self, interval: float = 8.0):
+    def generate_error_logs(self, scheduler: RateScheduler):
         """Generate user-error.log entries"""
-        while self.running:
+        for _ in scheduler:
+            if not self.running:
+                break
             log_entry = self.generate_error_log()
             self.write_log_entry(log_entry, self.user_error_log_path)
-            time.sleep(interval + random.uniform(-2.0, 2.0))
 
-    def start_generation(self):
+    def start_generation(self, rate: Optional[float] = None, arrivals: str = "poisson",
+                         duration: Optional[float] = None):
         """Start log generation in separate threads"""
         self.running = True
         
@@ -277,11 +304,26 @@ class UserServiceLogGenerator:
         for log_file in [self.user_log_path, self.user_access_log_path, self.user_error_log_path]:
             log_file.touch(exist_ok=True)
         
+        # Each stream keeps its relative frequency; --rate scales the total
+        stream_rates = {name: 1.0 / interval for name, interval in self.stream_intervals.items()}
+        if rate is not None:
+            scale = rate / sum(stream_rates.values())
+            stream_rates = {name: stream_rate * scale for name, stream_rate in stream_rates.items()}
+        
+        if self.clock.simulated:
+            self.generate_simulated(stream_rates, arrivals)
+            return
+        
+        self.schedulers = [
+            RateScheduler(stream_rates[name], arrivals, duration, name=f"user-service {name}")
+            for name in ("user", "access", "error")
+        ]
+        
         # Start threads for each log type
         self.threads = [
-            threading.Thread(target=self.generate_user_logs, daemon=True),
-            threading.Thread(target=self.generate_access_logs, daemon=True),
-            threading.Thread(target=self.generate_error_logs, daemon=True)
+            threading.Thread(target=self.generate_user_logs, args=(self.schedulers[0],), daemon=True),
+            threading.Thread(target=self.generate_access_logs, args=(self.schedulers[1],), daemon=True),
+            threading.Thread(target=self.generate_error_logs, args=(self.schedulers[2],), daemon=True)
         ]
         
         for thread in self.threads:
@@ -292,14 +334,49 @@ class UserServiceLogGenerator:
         print(f"📄 User logs: {self.user_log_path}")
         print(f"📄 Access logs: {self.user_access_log_path}")
         print(f"📄 Error logs: {self.user_error_log_path}")
+        print(f"⏱  Target rate: {sum(stream_rates.values()):.1f} events/sec ({arrivals} arrivals)")
         print(" Press Ctrl+C to stop...")
 
+    def generate_simulated(self, stream_rates: Dict[str, float], arrivals: str = "poisson"):
+        """Run every stream on one virtual timeline until the simulated clock ends"""
+        streams = {
+            "user": (self.generate_user_log, self.user_log_path),
+            "access": (self.generate_access_log, self.user_access_log_path),
+            "error": (self.generate_error_log, self.user_error_log_path),
+        }
+        names = list(stream_rates)
+        weights = [stream_rates[name] for name in names]
+        next_stream = AliasTable(names, weights).draw
+        scheduler = make_scheduler(sum(weights), arrivals, name="user-service", clock=self.clock)
+        self.schedulers = [scheduler]
+        
+        print(f"⏱  Simulating {self.clock.start.isoformat()} -> {self.clock.end.isoformat()} "
+              f"at {sum(weights):.1f} events/sec on average")
+        try:
+            for _ in scheduler:
+                generate, path = streams[next_stream()]
+                self.write_log_entry(generate(), path)
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+    def is_generating(self) -> bool:
+        """True while any generation thread is still running"""
+        return self.running and any(thread.is_alive() for thread in self.threads)
+
     def stop_generation(self):
         """Stop log generation"""
         self.running = False
+        for scheduler in self.schedulers:
+            scheduler.stop()
         for thread in self.threads:
             if thread.is_alive():
                 thread.join(timeout=1.0)
+        self.writer.close()
+        print(self.writer.report())
+        for scheduler in self.schedulers:
+            print(scheduler.report())
+        if len(self.schedulers) > 1:
+            print(SchedulerStats.combine("user-service", [s.stats() for s in self.schedulers]))
         print(" Log generation stopped")
 
     def generate_sample_logs(self, count: int = 10):
@@ -322,9 +399,10 @@ class UserServiceLogGenerator:
             self.write_log_entry(error_log, self.user_error_log_path)
             
             print(f"Generated log set {i+1}/{count}")
-            time.sleep(0.1)  # Small delay to ensure different timestamps
         
+        self.writer.flush()
         print(f"✓ Sample logs generated successfully!")
+        print(self.writer.report())
         print(f"📂 Check logs in: {self.log_dir}")
 
 
@@ -338,21 +416,49 @@ def main():
     parser.add_argument("--sample", type=int, help="Generate N sample logs and exit")
     parser.add_argument("--continuous", action="store_true", 
                        help="Generate logs continuously")
+    parser.add_argument("--duration", type=float, help="Stop continuous generation after N seconds")
+    add_rate_arguments(parser)
+    add_shard_arguments(parser)
+    add_clock_arguments(parser)
+    add_metrics_arguments(parser)
+    add_rotation_arguments(parser)
+    add_population_arguments(parser)
+    add_bulk_arguments(parser)
+    add_beats_arguments(parser)
+    add_sink_arguments(parser)
     
     args = parser.parse_args()
+    serve_metrics(args)
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    clock = build_clock(args)
+    population = build_population(args)
+    generator = UserServiceLogGenerator(args.log_dir, clock, build_rotation(args), population)
+    sink = (build_bulk_sink(args, "user-service")
+            or build_beats_output(args, "user-service", generator.writer.base_dir)
+            or build_sink(args, "user-service"))
+    if sink is not None:
+        generator.writer.close()
+        generator.writer = sink
     
-    generator = UserServiceLogGenerator(args.log_dir)
+    if args.sample and args.processes > 1:
+        run_sharded(functools.partial(UserServiceLogGenerator, population=population), "generate_sample_logs",
+                    args.sample, args.processes, args.log_dir, seed=args.seed, sink=sink)
+        return
     
     if args.sample:
         generator.generate_sample_logs(args.sample)
-    elif args.continuous:
+    elif args.continuous or clock.simulated:
         try:
-            generator.start_generation()
+            generator.start_generation(args.rate, args.arrivals, args.duration)
             # Keep the main thread alive
-            while True:
+            while generator.is_generating():
                 time.sleep(1)
         except KeyboardInterrupt:
-            generator.stop_generation()
+            pass
+        generator.stop_generation()
     else:
         # Default: generate 20 sample logs
         generator.generate_sample_logs(20)